@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Local Content-Addressed Artifact Cache
+
+Model files downloaded from DataStore (and files written by the merge step)
+are stored once under a content key (LFS sha256, or git blob id for small
+files) and materialized into output directories with reflinks or hardlinks,
+falling back to a plain copy. Consecutive exports of the same base model
+family then skip the network for shared files and use almost no extra disk.
+
+The cache is capped by total size; least recently used objects are evicted
+first (every hit refreshes the object's atime; mtimes are left alone, since
+objects are hardlinked into output directories whose checksum manifests
+rely on them).
+
+A second cache holds complete merge results keyed by a fingerprint of the
+base model revision, adapter weights/config and merge options, so re-running
+merge_adapter_with_base.py for the same inputs returns in seconds.
+
+Usage:
+    python artifact_cache.py stats
+    python artifact_cache.py gc                   # enforce the default size cap
+    python artifact_cache.py gc --max-size-gb 20  # shrink to 20 GB
+    python artifact_cache.py gc --max-size-gb 0   # empty the cache
+    python artifact_cache.py gc --merged-max-size-gb 0   # drop all cached merges
+
+Environment:
+    NEMO_ARTIFACT_CACHE          cache directory (default: ~/.cache/nemo-customizer-test/artifacts)
+    NEMO_ARTIFACT_CACHE_MAX_GB   size cap in GB (default: 50)
+    NEMO_MERGE_CACHE             merge result cache (default: ~/.cache/nemo-customizer-test/merged)
+    NEMO_MERGE_CACHE_MAX_GB      size cap in GB (default: 100)
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "NEMO_ARTIFACT_CACHE",
+    str(Path.home() / ".cache" / "nemo-customizer-test" / "artifacts")
+)
+DEFAULT_MAX_SIZE_GB = float(os.getenv("NEMO_ARTIFACT_CACHE_MAX_GB", "50"))
+DEFAULT_MERGE_CACHE_DIR = os.getenv(
+    "NEMO_MERGE_CACHE",
+    str(Path.home() / ".cache" / "nemo-customizer-test" / "merged")
+)
+DEFAULT_MERGE_CACHE_MAX_GB = float(os.getenv("NEMO_MERGE_CACHE_MAX_GB", "100"))
+
+# ioctl number for FICLONE (Linux: btrfs, XFS with reflink=1, ...)
+FICLONE = 0x40049409
+
+
+def file_sha256(file_path, chunk_size=8 * 1024 * 1024):
+    """sha256 hex digest of a local file."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def memoized_sha256(file_path, memo_path):
+    """
+    sha256 of a file, remembered by (path, size, mtime) in a JSON memo so
+    multi-GB files are only hashed again after they change.
+    """
+    file_path = Path(file_path).resolve()
+    stat = file_path.stat()
+    memo_key = f"{file_path}:{stat.st_size}:{stat.st_mtime_ns}"
+    memo_path = Path(memo_path)
+    try:
+        memo = json.loads(memo_path.read_text())
+    except (OSError, ValueError):
+        memo = {}
+    if memo_key not in memo:
+        memo[memo_key] = file_sha256(file_path)
+        memo_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = memo_path.with_name(f".{memo_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(memo))
+        os.replace(tmp, memo_path)
+    return memo[memo_key]
+
+
+def cache_key(remote_file):
+    """Content key for a DataStore file entry (from list_remote_files)."""
+    if remote_file.get("sha256"):
+        return remote_file["sha256"]
+    if remote_file.get("oid"):
+        return f"git-{remote_file['oid']}"
+    return None
+
+
+def _reflink(src, dest):
+    import fcntl
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+def link_or_copy(src, dest):
+    """
+    Materialize src at dest without duplicating data when possible.
+
+    Tries a reflink (copy-on-write, safe to modify), then a hardlink, then a
+    regular copy. dest is replaced atomically. Returns the method used.
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.link-tmp")
+    tmp.unlink(missing_ok=True)
+    method = None
+    try:
+        _reflink(src, tmp)
+        method = "reflink"
+    except (OSError, ImportError):
+        tmp.unlink(missing_ok=True)
+        try:
+            os.link(src, tmp)
+            method = "hardlink"
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+            shutil.copyfile(src, tmp)
+            method = "copy"
+    os.replace(tmp, dest)
+    return method
+
+
+def unlink_if_shared(file_path):
+    """
+    Delete file_path if it is hardlinked (e.g. to a cache object), so that a
+    file written at that path later cannot corrupt the cache. The contents
+    are not kept: callers rewrite the file afterwards.
+    """
+    file_path = Path(file_path)
+    if file_path.is_file() and file_path.stat().st_nlink > 1:
+        file_path.unlink()
+
+
+def _touch(path):
+    """LRU: mark a cached object as recently used by its atime, keeping its mtime."""
+    os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+
+
+class ArtifactCache:
+    """Content-addressed object store with an LRU size cap."""
+
+    def __init__(self, root=None, max_size_gb=None):
+        self.root = Path(root or DEFAULT_CACHE_DIR)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int((DEFAULT_MAX_SIZE_GB if max_size_gb is None else max_size_gb) * 1024 ** 3)
+
+    def path_for(self, key):
+        return self.objects / key[-2:] / key
+
+    def has(self, key, size=None):
+        path = self.path_for(key)
+        return path.is_file() and (size is None or path.stat().st_size == size)
+
+    def materialize(self, key, dest, size=None):
+        """Place the cached object for key at dest. Returns the method used, or None on a miss."""
+        if not key or not self.has(key, size):
+            return None
+        path = self.path_for(key)
+        _touch(path)
+        return link_or_copy(path, dest)
+
+    def insert(self, src, key):
+        """Add src to the cache under key (no-op if already present)."""
+        path = self.path_for(key)
+        if path.is_file():
+            _touch(path)
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        link_or_copy(src, path)
+        return path
+
+    def adopt(self, file_path, key=None):
+        """
+        Deduplicate a local file through the cache: hash it (unless its
+        sha256 is passed as key), store it, and replace it with a link to the
+        cached object. Returns (key, existed), where existed tells whether
+        the content was already cached.
+        """
+        key = key or file_sha256(file_path)
+        existed = self.has(key)
+        self.insert(file_path, key)
+        if existed:
+            link_or_copy(self.path_for(key), file_path)
+        return key, existed
+
+    def _entries(self):
+        entries = []
+        for path in self.objects.glob("*/*"):
+            if path.is_file() and not path.name.startswith("."):
+                stat = path.stat()
+                entries.append((stat.st_atime, stat.st_size, stat.st_nlink, path))
+        return entries
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            "root": str(self.root),
+            "objects": len(entries),
+            "total_bytes": sum(e[1] for e in entries),
+            "max_bytes": self.max_bytes,
+            # Objects with st_nlink == 1 are only held by the cache
+            "unshared_bytes": sum(e[1] for e in entries if e[2] == 1),
+        }
+
+    def gc(self, max_bytes=None):
+        """Evict least recently used objects until the cache fits in max_bytes."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self._entries())  # least recently used first
+        total = sum(e[1] for e in entries)
+        evicted = 0
+        freed = 0
+        for _, size, _, path in entries:
+            if total <= limit:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            freed += size
+            evicted += 1
+        return {"evicted": evicted, "freed_bytes": freed, "total_bytes": total}
+
+
+class MergeCache:
+    """
+    Complete merge outputs keyed by fingerprint, with an LRU size cap.
+
+    Each entry is a directory <root>/<fingerprint>/ holding the merged files
+    plus a .complete marker (written last, so partial entries are ignored).
+    """
+
+    MARKER = ".complete"
+
+    def __init__(self, root=None, max_size_gb=None):
+        self.root = Path(root or DEFAULT_MERGE_CACHE_DIR)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int((DEFAULT_MERGE_CACHE_MAX_GB if max_size_gb is None else max_size_gb) * 1024 ** 3)
+
+    def lookup(self, fingerprint):
+        """Cached entry directory for fingerprint, or None."""
+        entry = self.root / fingerprint
+        marker = entry / self.MARKER
+        if not marker.is_file():
+            return None
+        os.utime(marker)  # LRU: mark as recently used
+        return entry
+
+    def materialize(self, fingerprint, output_path):
+        """Link a cached merge into output_path. Returns the number of files, or None on a miss."""
+        entry = self.lookup(fingerprint)
+        if entry is None:
+            return None
+        count = 0
+        for src in entry.rglob("*"):
+            if src.is_file() and src.name != self.MARKER:
+                link_or_copy(src, Path(output_path) / src.relative_to(entry))
+                count += 1
+        return count
+
+    def store(self, fingerprint, output_path, components=None):
+        """Add the files of a finished merge in output_path under fingerprint."""
+        entry = self.root / fingerprint
+        if (entry / self.MARKER).is_file():
+            return entry
+        tmp = self.root / f".{fingerprint}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        total = 0
+        for src in Path(output_path).rglob("*"):
+            if src.is_file():
+                link_or_copy(src, tmp / src.relative_to(output_path))
+                total += src.stat().st_size
+        (tmp / self.MARKER).write_text(json.dumps({
+            "components": components or {},
+            "total_bytes": total,
+            "created_at": time.time()
+        }, indent=2))
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        return entry
+
+    def _entries(self):
+        entries = []
+        for entry in self.root.iterdir():
+            marker = entry / self.MARKER
+            if entry.is_dir() and marker.is_file():
+                size = sum(f.stat().st_size for f in entry.rglob("*") if f.is_file())
+                entries.append((marker.stat().st_mtime, size, entry))
+        return entries
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            "root": str(self.root),
+            "entries": len(entries),
+            "total_bytes": sum(e[1] for e in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def gc(self, max_bytes=None):
+        """Evict least recently used merges until the cache fits in max_bytes."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self._entries())
+        total = sum(e[1] for e in entries)
+        evicted = 0
+        freed = 0
+        for _, size, entry in entries:
+            if total <= limit:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            freed += size
+            evicted += 1
+        return {"evicted": evicted, "freed_bytes": freed, "total_bytes": total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local content-addressed artifact cache")
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Cache directory (default: {DEFAULT_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--merge-cache-dir",
+        type=str,
+        default=DEFAULT_MERGE_CACHE_DIR,
+        help=f"Merge result cache directory (default: {DEFAULT_MERGE_CACHE_DIR})"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show cache size and object count")
+    gc_parser = subparsers.add_parser("gc", help="Evict least recently used objects")
+    gc_parser.add_argument(
+        "--max-size-gb",
+        type=float,
+        default=DEFAULT_MAX_SIZE_GB,
+        help=f"Target cache size in GB (default: {DEFAULT_MAX_SIZE_GB:g})"
+    )
+    gc_parser.add_argument(
+        "--merged-max-size-gb",
+        type=float,
+        default=DEFAULT_MERGE_CACHE_MAX_GB,
+        help=f"Target merge result cache size in GB (default: {DEFAULT_MERGE_CACHE_MAX_GB:g})"
+    )
+
+    args = parser.parse_args()
+    cache = ArtifactCache(args.cache_dir)
+    merge_cache = MergeCache(args.merge_cache_dir)
+
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"📦 Artifact cache: {stats['root']}")
+        print(f"   Objects: {stats['objects']}")
+        print(f"   Size: {stats['total_bytes'] / 1024 ** 3:.2f} GB (cap {stats['max_bytes'] / 1024 ** 3:.2f} GB)")
+        print(f"   Not linked into any output dir: {stats['unshared_bytes'] / 1024 ** 3:.2f} GB")
+        stats = merge_cache.stats()
+        print(f"🔀 Merge result cache: {stats['root']}")
+        print(f"   Entries: {stats['entries']}")
+        print(f"   Size: {stats['total_bytes'] / 1024 ** 3:.2f} GB (cap {stats['max_bytes'] / 1024 ** 3:.2f} GB)")
+    else:
+        result = cache.gc(int(args.max_size_gb * 1024 ** 3))
+        print(f"🧹 Evicted {result['evicted']} object(s), freed {result['freed_bytes'] / 1024 ** 3:.2f} GB")
+        print(f"   Cache size now: {result['total_bytes'] / 1024 ** 3:.2f} GB")
+        result = merge_cache.gc(int(args.merged_max_size_gb * 1024 ** 3))
+        print(f"🧹 Evicted {result['evicted']} cached merge(s), freed {result['freed_bytes'] / 1024 ** 3:.2f} GB")
+        print(f"   Merge cache size now: {result['total_bytes'] / 1024 ** 3:.2f} GB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
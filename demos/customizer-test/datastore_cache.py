@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+DataStore Metadata Cache
+
+Remembers which DataStore namespaces, repo namespaces (Gitea owners),
+repos and revisions are known to exist, so the notebook helpers can skip
+their existence checks: the namespace GET, the throwaway
+namespace-init-temp repo that creates the Gitea owner, and the
+revision/main GET before reusing a repo. Only positive facts are cached;
+anything unknown still goes to the server.
+
+Entries live in process and in a JSON file shared by all processes,
+scoped by DataStore URL, and expire after a TTL. Calls that change the
+DataStore (repo create/delete, uploads, repairs after a 500) forget the
+affected entries. Another client deleting a repo is only noticed once
+the entry expires.
+
+Usage:
+    from datastore_cache import MetadataCache
+    cache = MetadataCache(DATASTORE_URL)
+    if not cache.repo_namespace_known(namespace):
+        ...                                   # create and delete the temp repo
+        cache.remember_repo_namespace(namespace)
+
+    python datastore_cache.py show
+    python datastore_cache.py clear
+
+Environment:
+    NEMO_DATASTORE_CACHE       cache file (default: ~/.cache/nemo-customizer-test/datastore-metadata.json)
+    NEMO_DATASTORE_CACHE_TTL   seconds an entry stays valid (default: 900; 0 disables the cache)
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+
+DEFAULT_CACHE_FILE = os.getenv(
+    "NEMO_DATASTORE_CACHE",
+    str(Path.home() / ".cache" / "nemo-customizer-test" / "datastore-metadata.json")
+)
+DEFAULT_TTL = float(os.getenv("NEMO_DATASTORE_CACHE_TTL", "900"))
+
+_LOCK = threading.Lock()
+_LOADED = {}  # cache file -> (mtime, entries)
+
+
+def _read(path):
+    try:
+        return json.loads(path.read_text()).get("entries", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _load(path):
+    """Entries of a cache file, re-read only when the file changed (caller holds _LOCK)."""
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    cached = _LOADED.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, _read(path) if mtime is not None else {})
+        _LOADED[path] = cached
+    return cached[1]
+
+
+class MetadataCache:
+    """
+    TTL cache of DataStore metadata for one DataStore URL (the scope).
+
+    Keys are "<scope> <kind> <name>", with kinds namespace (DataStore
+    namespace entity), repo-namespace (Gitea owner of repos), repo
+    ("dataset:<ns>/<name>") and revision ("dataset:<ns>/<name>@main").
+    """
+
+    def __init__(self, scope, path=DEFAULT_CACHE_FILE, ttl=DEFAULT_TTL):
+        self.scope = scope.rstrip("/")
+        self.path = Path(path)
+        self.ttl = ttl
+
+    def _key(self, kind, name):
+        return f"{self.scope} {kind} {name}"
+
+    def get(self, kind, name):
+        """Cached value, or None if unknown or expired."""
+        if self.ttl <= 0:
+            return None
+        with _LOCK:
+            entry = _load(self.path).get(self._key(kind, name))
+        if entry and entry["expires_at"] > time.time():
+            return entry["value"]
+        return None
+
+    def _update(self, change):
+        """Apply change(entries) to the file's current entries, drop expired ones and save atomically."""
+        with _LOCK:
+            entries = _read(self.path)
+            change(entries)
+            now = time.time()
+            entries = {key: entry for key, entry in entries.items() if entry["expires_at"] > now}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"version": 1, "entries": entries}, indent=2))
+            os.replace(tmp, self.path)
+            _LOADED[self.path] = (self.path.stat().st_mtime_ns, entries)
+
+    def put(self, kind, name, value=True):
+        if self.ttl <= 0:
+            return
+        entry = {"value": value, "expires_at": time.time() + self.ttl}
+        self._update(lambda entries: entries.__setitem__(self._key(kind, name), entry))
+
+    def forget(self, match):
+        """Forget this scope's entries for which match(kind, name) is true."""
+        prefix = f"{self.scope} "
+
+        def change(entries):
+            for key in list(entries):
+                if key.startswith(prefix):
+                    kind, _, name = key[len(prefix):].partition(" ")
+                    if match(kind, name):
+                        del entries[key]
+        self._update(change)
+
+    def clear(self):
+        """Forget everything cached for this scope."""
+        self.forget(lambda kind, name: True)
+
+    # DataStore namespace entities (/v1/datastore/namespaces)
+
+    def namespace_known(self, namespace):
+        return self.get("namespace", namespace) is not None
+
+    def remember_namespace(self, namespace):
+        self.put("namespace", namespace)
+
+    # Gitea owners, which repo creation needs (see ensure_datastore_namespace in customize-model.ipynb)
+
+    def repo_namespace_known(self, namespace):
+        return self.get("repo-namespace", namespace) is not None
+
+    def remember_repo_namespace(self, namespace):
+        self.put("repo-namespace", namespace)
+
+    def forget_namespace(self, namespace):
+        """Forget a namespace and every repo and revision in it."""
+        def match(kind, name):
+            if kind in ("namespace", "repo-namespace"):
+                return name == namespace
+            return name.partition(":")[2].startswith(f"{namespace}/")
+        self.forget(match)
+
+    # Repos and revisions
+
+    def repo_known(self, repo_id, repo_type="dataset"):
+        return self.get("repo", f"{repo_type}:{repo_id}") is not None
+
+    def remember_repo(self, repo_id, repo_type="dataset"):
+        """A repo exists (which also proves its Gitea owner exists)."""
+        self.put("repo", f"{repo_type}:{repo_id}")
+        self.put("repo-namespace", repo_id.split("/", 1)[0])
+
+    def forget_repo(self, repo_id, repo_type="dataset"):
+        """Forget a repo and its revisions (after deleting or recreating it)."""
+        name = f"{repo_type}:{repo_id}"
+        self.forget(lambda kind, key: (kind == "repo" and key == name) or
+                    (kind == "revision" and key.startswith(f"{name}@")))
+
+    def revision(self, repo_id, revision="main", repo_type="dataset"):
+        """Cached revision info (True if only its existence is known), or None."""
+        return self.get("revision", f"{repo_type}:{repo_id}@{revision}")
+
+    def remember_revision(self, repo_id, revision="main", info=True, repo_type="dataset"):
+        self.put("revision", f"{repo_type}:{repo_id}@{revision}", info)
+        self.remember_repo(repo_id, repo_type)
+
+    def forget_revisions(self, repo_id, repo_type="dataset"):
+        """Forget a repo's revisions (after a commit moved them)."""
+        name = f"{repo_type}:{repo_id}@"
+        self.forget(lambda kind, key: kind == "revision" and key.startswith(name))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or clear the DataStore metadata cache")
+    parser.add_argument(
+        "command",
+        choices=["show", "clear"],
+        help="show: list valid entries; clear: remove all entries (or those of --datastore-url)"
+    )
+    parser.add_argument(
+        "--datastore-url",
+        default=None,
+        help="Only entries for this DataStore URL (default: all)"
+    )
+    parser.add_argument(
+        "--cache-file",
+        default=DEFAULT_CACHE_FILE,
+        help=f"Cache file (default: {DEFAULT_CACHE_FILE})"
+    )
+    args = parser.parse_args()
+
+    path = Path(args.cache_file)
+    if args.command == "clear":
+        if args.datastore_url:
+            MetadataCache(args.datastore_url, path).clear()
+        else:
+            path.unlink(missing_ok=True)
+        print(f"✅ Cleared DataStore metadata cache: {path}")
+        return 0
+
+    now = time.time()
+    entries = {key: entry for key, entry in _read(path).items() if entry["expires_at"] > now}
+    if args.datastore_url:
+        entries = {key: entry for key, entry in entries.items()
+                   if key.startswith(f"{args.datastore_url.rstrip('/')} ")}
+    if not entries:
+        print(f"ℹ️  No valid entries in {path}")
+        return 0
+    print(f"📋 {len(entries)} entr{'y' if len(entries) == 1 else 'ies'} in {path}")
+    for key, entry in sorted(entries.items()):
+        print(f"   {key} (expires in {entry['expires_at'] - now:.0f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,16 +10,29 @@ Usage:
     
     Or specify files_url directly:
     python download_model_from_datastore.py --files-url "hf://datasets/<namespace>/model-name" --output-dir ./downloaded_model
+
+    Only download what the next step needs (default: auto), or everything:
+    python download_model_from_datastore.py --model-info model_info.json --profile full
+
+    Interrupted downloads resume from the last completed chunk when re-run with
+    the same --output-dir. Use --engine snapshot for huggingface_hub.snapshot_download.
 """
 
 import os
 import sys
 import json
+import time
+import fnmatch
+import hashlib
 import argparse
 import tempfile
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+from artifact_cache import ArtifactCache, DEFAULT_CACHE_DIR, cache_key
+from nemo_client import DataStoreClient, backoff_delay, make_session
+
 # Load environment variables from env.donotcommit if it exists
 try:
     from dotenv import load_dotenv
@@ -43,6 +56,42 @@ else:
 
 NDS_TOKEN = os.getenv("NDS_TOKEN", "token")
 
+# Native download engine defaults (override with --workers / --chunk-size-mb)
+DEFAULT_DOWNLOAD_WORKERS = int(os.getenv("DATASTORE_DOWNLOAD_WORKERS", "8"))
+DEFAULT_CHUNK_SIZE_MB = int(os.getenv("DATASTORE_CHUNK_SIZE_MB", "32"))
+CHUNK_RETRIES = 5
+
+# Partial files and resume state live here (relative to the output dir);
+# '.cache' is already excluded from the downloaded-files listing
+DOWNLOAD_STATE_DIR = Path(".cache") / "download"
+
+# Named download profiles, resolved against the remote file list before any
+# bytes move. Globs match the path relative to the repo root or the file's
+# basename, so profiles exclude checkpoint directories explicitly.
+DOWNLOAD_PROFILES = {
+    # What merge_adapter_with_base.py needs: the LoRA weights and config
+    "adapter-only": {
+        "include": ["adapter_config.json", "adapter_model.safetensors"],
+        "exclude": ["checkpoint*/*", "checkpoints/*"]
+    },
+    # What the serving runtime needs from a full model: one weight format,
+    # config and tokenizer
+    "serving": {
+        "include": [
+            "*.safetensors", "*.safetensors.index.json",
+            "config.json", "generation_config.json",
+            "tokenizer*", "special_tokens_map.json", "*.tiktoken", "chat_template*"
+        ],
+        "exclude": ["checkpoint*/*", "checkpoints/*", "adapter_*"]
+    },
+    "full": {
+        "include": ["*"],
+        "exclude": []
+    },
+}
+# Never needed by any later step
+ALWAYS_EXCLUDE = ["*.lock", "*.metadata", ".cache/*", ".gitignore", ".gitattributes"]
+
 
 def parse_files_url(files_url):
     """Parse files_url to extract repository information."""
@@ -76,9 +125,351 @@ def parse_files_url(files_url):
     return repo_namespace, repo_name, repo_type, revision
 
 
-def download_model(files_url, output_dir, datastore_url=None, job_id=None, model_name=None):
+def resolve_repo_type(api, repo_id, repo_type, errors=None):
+    """
+    Return the repo type under which repo_id actually exists, or None.
+    
+    Customizer stores output models as "model" type in DataStore, even if the
+    files_url uses the "datasets/" prefix, so the other type is tried too.
+    The error of each type that was tried is stored in `errors` (a dict).
+    """
+    other_type = "model" if repo_type == "dataset" else "dataset"
+    for candidate in (repo_type, other_type):
+        try:
+            api.repo_info(repo_id=repo_id, repo_type=candidate)
+            return candidate
+        except Exception as e:
+            if errors is not None:
+                errors[candidate] = e
+    return None
+
+
+def list_remote_files(api, repo_id, repo_type, revision=None):
+    """
+    List files in a DataStore repo without downloading anything.
+    
+    Returns a list of {"path", "size", "sha256", "oid"} dicts; sha256 is the
+    LFS oid (None for small files stored directly in git) and oid is the git
+    blob id.
+    """
+    files = []
+    for entry in api.list_repo_tree(repo_id=repo_id, repo_type=repo_type, revision=revision, recursive=True):
+        if not hasattr(entry, "size") or not hasattr(entry, "blob_id"):
+            continue  # RepoFolder
+        lfs = getattr(entry, "lfs", None)
+        files.append({
+            "path": entry.path,
+            "size": entry.size,
+            "sha256": lfs["sha256"] if lfs else None,
+            "oid": entry.blob_id
+        })
+    return files
+
+
+def resolve_profile(remote_files, profile="auto"):
+    """
+    Pick a download profile for a repo.
+    
+    "auto" selects the smallest profile the next step needs: "adapter-only"
+    for LoRA outputs (which are merged next) and "serving" for full models
+    (which are uploaded next).
+    """
+    if profile != "auto":
+        return profile
+    if any(f["path"] == "adapter_config.json" for f in remote_files):
+        return "adapter-only"
+    return "serving"
+
+
+def select_files(remote_files, profile="auto", include=None, exclude=None):
+    """
+    Filter the remote file list by profile plus extra include/exclude globs.
+    
+    Returns (resolved_profile, selected_files).
+    """
+    profile = resolve_profile(remote_files, profile)
+    include_globs = DOWNLOAD_PROFILES[profile]["include"] + list(include or [])
+    exclude_globs = DOWNLOAD_PROFILES[profile]["exclude"] + ALWAYS_EXCLUDE + list(exclude or [])
+    
+    def matches(path, globs):
+        return any(fnmatch.fnmatch(path, g) or fnmatch.fnmatch(Path(path).name, g) for g in globs)
+    
+    selected = [
+        f for f in remote_files
+        if matches(f["path"], include_globs) and not matches(f["path"], exclude_globs)
+    ]
+    return profile, selected
+
+
+def _write_json_atomic(path, data):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def verify_file(file_path, remote_file):
+    """
+    Check a downloaded file against DataStore metadata.
+    
+    LFS files are checked against their sha256 oid; small git files against
+    their git blob sha1. Returns (ok, digest_used).
+    """
+    if remote_file.get("sha256"):
+        digest = hashlib.sha256()
+        expected = remote_file["sha256"]
+    elif remote_file.get("oid"):
+        digest = hashlib.sha1(f"blob {remote_file['size']}\0".encode())
+        expected = remote_file["oid"]
+    else:
+        return Path(file_path).stat().st_size == remote_file["size"], None
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(8 * 1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest() == expected, expected
+
+
+class RangeNotSupported(IOError):
+    """The server answered a partial range request with the whole file (HTTP 200)."""
+
+
+def fetch_range(session, url, dest_path, start, end, size=None, ranged=True):
+    """
+    Download bytes [start, end] of url into dest_path at the same offset.
+    
+    A 200 answer (the server ignored Range) is accepted when the range is
+    the whole file of the given size; for a partial range it raises
+    RangeNotSupported, and the caller fetches the whole file instead with
+    ranged=False (a plain GET of bytes [0, size - 1]).
+    
+    Retries with jittered backoff because port-forwarded connections drop
+    during long transfers. Raises after CHUNK_RETRIES failed attempts.
+    """
+    whole_file = start == 0 and size is not None and end == size - 1
+    for attempt in range(1, CHUNK_RETRIES + 1):
+        try:
+            headers = {"Range": f"bytes={start}-{end}"} if ranged else {}
+            with session.get(url, headers=headers, stream=True, timeout=(10, 120)) as response:
+                if not ranged:
+                    expected = (200,)
+                elif whole_file:
+                    expected = (206, 200)
+                elif response.status_code == 200:
+                    raise RangeNotSupported(f"Range request not honoured (HTTP 200) for bytes {start}-{end}")
+                else:
+                    expected = (206,)
+                if response.status_code not in expected:
+                    raise IOError(f"Unexpected HTTP {response.status_code} for bytes {start}-{end}")
+                written = 0
+                with open(dest_path, "r+b") as f:
+                    f.seek(start)
+                    for block in response.iter_content(chunk_size=1024 * 1024):
+                        f.write(block)
+                        written += len(block)
+                if written != end - start + 1:
+                    raise IOError(f"Short read: got {written} of {end - start + 1} bytes")
+                return
+        except RangeNotSupported:
+            raise
+        except Exception:
+            if attempt == CHUNK_RETRIES:
+                raise
+            time.sleep(backoff_delay(attempt, base=1))
+
+
+def download_repo_native(api, repo_id, repo_type, revision, output_path, hf_endpoint, hf_token,
+                         workers=DEFAULT_DOWNLOAD_WORKERS, chunk_size_mb=DEFAULT_CHUNK_SIZE_MB, cache=None,
+                         remote_files=None):
+    """
+    Download a DataStore repo with concurrent HTTP range requests.
+    
+    Every file is split into chunks of chunk_size_mb that are fetched in
+    parallel (across all files) into a preallocated partial file under
+    DOWNLOAD_STATE_DIR. Finished chunks are recorded in a sidecar state file
+    so an interrupted run resumes where it stopped. Each completed file is
+    verified against its LFS sha256 (or git blob id) before it is moved into
+    place. Files already present and verified are skipped.
+    
+    With an ArtifactCache, files whose content key is cached are linked into
+    place without touching the network, and verified downloads are added to
+    the cache.
+    
+    remote_files restricts the download to a pre-selected subset of
+    list_remote_files() (e.g. from select_files); by default everything is
+    downloaded.
+    
+    Returns the list of downloaded relative paths, or None on failure.
+    """
+    from huggingface_hub import hf_hub_url
+    
+    chunk_size = chunk_size_mb * 1024 * 1024
+    state_root = output_path / DOWNLOAD_STATE_DIR
+    
+    if remote_files is None:
+        remote_files = list_remote_files(api, repo_id, repo_type, revision)
+    total_bytes = sum(f["size"] for f in remote_files)
+    print(f"   📋 {len(remote_files)} file(s) to fetch ({total_bytes / (1024 * 1024):.1f} MB)")
+    
+    session = make_session(pool_size=workers, token=hf_token, compress=False)
+    
+    jobs = []  # one entry per file still to download
+    skipped = 0
+    from_cache = 0
+    for remote_file in remote_files:
+        final_path = output_path / remote_file["path"]
+        partial_path = state_root / (remote_file["path"] + ".incomplete")
+        state_path = state_root / (remote_file["path"] + ".state.json")
+        verified_path = state_root / (remote_file["path"] + ".verified")
+        expected = remote_file.get("sha256") or remote_file.get("oid")
+        
+        # Already downloaded and verified by an earlier run
+        if (final_path.exists() and final_path.stat().st_size == remote_file["size"]
+                and verified_path.exists() and verified_path.read_text().strip() == expected):
+            skipped += 1
+            continue
+        
+        partial_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Shared with an earlier export (same LFS oid / blob id)
+        if cache is not None and cache.materialize(cache_key(remote_file), final_path, remote_file["size"]):
+            verified_path.write_text(expected or "")
+            from_cache += 1
+            continue
+        
+        state = {"size": remote_file["size"], "expected": expected, "chunk_size": chunk_size, "done": []}
+        if state_path.exists() and partial_path.exists():
+            try:
+                previous = json.loads(state_path.read_text())
+                if all(previous.get(k) == state[k] for k in ("size", "expected", "chunk_size")):
+                    state = previous
+            except (OSError, ValueError):
+                pass
+        if not state["done"] or not partial_path.exists():
+            state["done"] = []
+            with open(partial_path, "wb") as f:
+                f.truncate(remote_file["size"])
+        
+        n_chunks = max(1, -(-remote_file["size"] // chunk_size))
+        done = set(state["done"])
+        pending = [i for i in range(n_chunks) if i not in done]
+        jobs.append({
+            "remote": remote_file,
+            "url": hf_hub_url(repo_id, remote_file["path"], repo_type=repo_type,
+                              revision=revision, endpoint=hf_endpoint),
+            "final_path": final_path,
+            "partial_path": partial_path,
+            "state_path": state_path,
+            "verified_path": verified_path,
+            "state": state,
+            "pending": pending,
+            "chunks": n_chunks,
+            "remaining": len(pending),
+            "whole": False,
+            "lock": threading.Lock()
+        })
+    
+    if skipped:
+        print(f"   ⏭️  {skipped} file(s) already downloaded and verified")
+    if from_cache:
+        print(f"   📦 {from_cache} file(s) linked from the artifact cache ({cache.root})")
+    resumed = sum(1 for job in jobs if job["state"]["done"])
+    if resumed:
+        print(f"   🔁 Resuming {resumed} partially downloaded file(s)")
+    
+    def finalize(job):
+        ok, _ = verify_file(job["partial_path"], job["remote"])
+        if not ok:
+            # Start this file from scratch next time
+            job["state_path"].unlink(missing_ok=True)
+            job["partial_path"].unlink(missing_ok=True)
+            raise ValueError("checksum mismatch")
+        job["final_path"].parent.mkdir(parents=True, exist_ok=True)
+        os.replace(job["partial_path"], job["final_path"])
+        job["verified_path"].write_text(job["state"]["expected"] or "")
+        job["state_path"].unlink(missing_ok=True)
+        key = cache_key(job["remote"])
+        if cache is not None and key:
+            cache.insert(job["final_path"], key)
+    
+    def fetch_whole_file(job):
+        # The server ignores Range: fetch the file once with a plain GET instead of chunk by chunk
+        size = job["remote"]["size"]
+        with job["lock"]:
+            if job["whole"]:
+                return None
+            fetch_range(session, job["url"], job["partial_path"], 0, size - 1, size, ranged=False)
+            job["whole"] = True
+            job["state"]["done"] = list(range(job["chunks"]))
+            job["remaining"] = 0
+            _write_json_atomic(job["state_path"], job["state"])
+        finalize(job)
+        return job
+    
+    def fetch_chunk(job, index):
+        size = job["remote"]["size"]
+        if size > 0:
+            start = index * chunk_size
+            end = min(start + chunk_size, size) - 1
+            try:
+                fetch_range(session, job["url"], job["partial_path"], start, end, size)
+            except RangeNotSupported:
+                return fetch_whole_file(job)
+        with job["lock"]:
+            if job["whole"]:
+                return None
+            job["state"]["done"].append(index)
+            job["remaining"] -= 1
+            _write_json_atomic(job["state_path"], job["state"])
+            is_last = job["remaining"] == 0
+        if is_last:
+            finalize(job)
+            return job
+        return None
+    
+    downloaded = []
+    failed = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(fetch_chunk, job, index): job
+            for job in jobs for index in job["pending"]
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                finished = future.result()
+                if finished:
+                    downloaded.append(finished["remote"]["path"])
+                    print(f"   ✅ {finished['remote']['path']} ({finished['remote']['size']:,} bytes, verified)")
+            except Exception as e:
+                if job["remote"]["path"] not in failed:
+                    failed[job["remote"]["path"]] = e
+                    print(f"   ⚠️  Failed to download {job['remote']['path']}: {str(e)[:80]}")
+    
+    if cache is not None:
+        evicted = cache.gc()["evicted"]
+        if evicted:
+            print(f"   🧹 Evicted {evicted} least recently used object(s) from the artifact cache")
+    
+    if failed:
+        print(f"   ❌ {len(failed)} file(s) failed; re-run to resume from the last completed chunk")
+        return None
+    return downloaded
+
+
+def download_model(files_url, output_dir, datastore_url=None, job_id=None, model_name=None,
+                   engine="native", workers=DEFAULT_DOWNLOAD_WORKERS, chunk_size_mb=DEFAULT_CHUNK_SIZE_MB,
+                   cache_dir=DEFAULT_CACHE_DIR, profile="auto", include=None, exclude=None):
     """Download model files from DataStore using HuggingFace API.
     
+    engine="native" uses parallel, resumable range requests with checksum
+    verification (see download_repo_native); engine="snapshot" hands the
+    whole repo to huggingface_hub.snapshot_download. The native engine
+    shares files across exports through the artifact cache in cache_dir
+    (None disables it).
+    
+    Only files selected by the download profile (plus include/exclude globs)
+    are fetched; see DOWNLOAD_PROFILES and select_files.
+    
     If DataStore is empty, this will suggest checking EntityHandler logs and retrying after export completes.
     """
     if datastore_url is None:
@@ -116,52 +507,64 @@ def download_model(files_url, output_dir, datastore_url=None, job_id=None, model
         # IMPORTANT: Customizer stores output models as "model" type in DataStore,
         # even if the files_url uses "datasets/" prefix. Try both types.
         print(f"\n📋 Verifying repository exists...")
-        repo_info = None
-        actual_repo_type = None
+        errors = {}
+        actual_repo_type = resolve_repo_type(api, repo_id, repo_type, errors)
+        if actual_repo_type is None:
+            print(f"   ❌ Repository not found as either type")
+            print(f"   Repository: {repo_id}")
+            for tried, error in errors.items():
+                print(f"   Tried as {tried}: {str(error)[:100]}")
+            print(f"   DataStore URL: {datastore_url}")
+            return False
+        if actual_repo_type != repo_type:
+            print(f"   ⚠️  Not found as {repo_type}, found as {actual_repo_type}")
+        print(f"   ✅ Repository found as {actual_repo_type}: {repo_id}")
+        if actual_repo_type != repo_type:
+            print(f"   💡 Note: files_url used '{repo_type}' prefix, but actual storage is '{actual_repo_type}'")
+            repo_type = actual_repo_type  # Update for download
         
-        # Try the parsed repo_type first
-        try:
-            repo_info = api.repo_info(repo_id=repo_id, repo_type=repo_type)
-            actual_repo_type = repo_type
-            print(f"   ✅ Repository found as {repo_type}: {repo_id}")
-            print(f"   Repository ID: {repo_info.id}")
-        except Exception as e:
-            # If failed, try the other type (models are often stored as "model" even if URL says "datasets")
-            other_type = "model" if repo_type == "dataset" else "dataset"
-            try:
-                print(f"   ⚠️  Not found as {repo_type}, trying as {other_type}...")
-                repo_info = api.repo_info(repo_id=repo_id, repo_type=other_type)
-                actual_repo_type = other_type
-                print(f"   ✅ Repository found as {other_type}: {repo_id}")
-                print(f"   Repository ID: {repo_info.id}")
-                print(f"   💡 Note: files_url used '{repo_type}' prefix, but actual storage is '{other_type}'")
-                repo_type = other_type  # Update for download
-            except Exception as e2:
-                print(f"   ❌ Repository not found as either type")
-                print(f"   Repository: {repo_id}")
-                print(f"   Tried as {repo_type}: {str(e)[:100]}")
-                print(f"   Tried as {other_type}: {str(e2)[:100]}")
-                print(f"   DataStore URL: {datastore_url}")
-                return False
+        # Resolve the profile against the remote file list before any bytes move
+        all_remote_files = list_remote_files(api, repo_id, repo_type, revision)
+        profile, remote_files = select_files(all_remote_files, profile, include, exclude)
+        selected_bytes = sum(f["size"] for f in remote_files)
+        total_bytes = sum(f["size"] for f in all_remote_files)
+        print(f"\n🎯 Download profile: {profile}")
+        print(f"   Selected {len(remote_files)} of {len(all_remote_files)} file(s) "
+              f"({selected_bytes / (1024 * 1024):.1f} of {total_bytes / (1024 * 1024):.1f} MB)")
+        if not remote_files:
+            print(f"   ❌ No files match profile '{profile}'")
+            print(f"   Remote files: {', '.join(f['path'] for f in all_remote_files[:10])}")
+            print(f"   Try --profile full or --include <glob>")
+            return False
         
-        # Download entire repository snapshot
-        print(f"\n⬇️  Downloading repository snapshot to: {output_dir}")
         try:
-            # Use snapshot_download to download entire repo
-            # This is more reliable than downloading files individually
-            download_kwargs = {
-                "repo_id": repo_id,
-                "local_dir": str(output_path),
-                "endpoint": hf_endpoint,
-                "token": hf_token,
-                "repo_type": repo_type,
-                "local_dir_use_symlinks": False  # Don't use symlinks, copy files directly
-            }
-            if revision:
-                download_kwargs["revision"] = revision
-                print(f"   📌 Using revision: {revision}")
-            
-            downloaded_path = snapshot_download(**download_kwargs)
+            if engine == "native":
+                print(f"\n⬇️  Downloading repository files to: {output_dir}")
+                print(f"   Engine: native ({workers} parallel range requests, {chunk_size_mb} MB chunks)")
+                if revision:
+                    print(f"   📌 Using revision: {revision}")
+                cache = ArtifactCache(cache_dir) if cache_dir else None
+                if download_repo_native(api, repo_id, repo_type, revision, output_path, hf_endpoint, hf_token,
+                                        workers=workers, chunk_size_mb=chunk_size_mb, cache=cache,
+                                        remote_files=remote_files) is None:
+                    return False
+            else:
+                # Download the selected files of the repository snapshot
+                print(f"\n⬇️  Downloading repository snapshot to: {output_dir}")
+                download_kwargs = {
+                    "repo_id": repo_id,
+                    "local_dir": str(output_path),
+                    "endpoint": hf_endpoint,
+                    "token": hf_token,
+                    "repo_type": repo_type,
+                    "local_dir_use_symlinks": False,  # Don't use symlinks, copy files directly
+                    "allow_patterns": [f["path"] for f in remote_files]
+                }
+                if revision:
+                    download_kwargs["revision"] = revision
+                    print(f"   📌 Using revision: {revision}")
+                
+                downloaded_path = snapshot_download(**download_kwargs)
             
             # Count downloaded files (exclude cache and metadata files)
             all_files = list(output_path.rglob("*"))
@@ -242,6 +645,55 @@ def main():
         default=DATASTORE_URL,
         help=f"DataStore URL (default: {DATASTORE_URL})"
     )
+    parser.add_argument(
+        "--engine",
+        choices=["native", "snapshot"],
+        default="native",
+        help="Download engine: 'native' (parallel range requests, resumable, sha256-verified) "
+             "or 'snapshot' (huggingface_hub.snapshot_download). Default: native"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_DOWNLOAD_WORKERS,
+        help=f"Parallel range requests for the native engine (default: {DEFAULT_DOWNLOAD_WORKERS})"
+    )
+    parser.add_argument(
+        "--chunk-size-mb",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE_MB,
+        help=f"Range request size in MB for the native engine (default: {DEFAULT_CHUNK_SIZE_MB})"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Content-addressed artifact cache shared across exports (default: {DEFAULT_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the artifact cache"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["auto"] + list(DOWNLOAD_PROFILES),
+        default="auto",
+        help="Files to download: 'adapter-only' (LoRA weights + config), 'serving' (safetensors, config, "
+             "tokenizer), 'full' (everything). Default 'auto': adapter-only for LoRA repos, else serving"
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        help="Extra glob to download on top of the profile (repeatable)"
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        help="Glob to skip even if the profile includes it (repeatable)"
+    )
     
     args = parser.parse_args()
     
@@ -274,11 +726,11 @@ def main():
     
     # Check connectivity
     try:
-        health_response = requests.get(f"{args.datastore_url}/v1/health", timeout=5)
-        if health_response.status_code == 200:
+        health_status = DataStoreClient(args.datastore_url).health()
+        if health_status == 200:
             print("✅ DataStore is accessible")
         else:
-            print(f"⚠️  DataStore health check returned: {health_response.status_code}")
+            print(f"⚠️  DataStore health check returned: {health_status}")
     except Exception as e:
         print(f"⚠️  Cannot reach DataStore at {args.datastore_url}")
         print(f"   Error: {e}")
@@ -288,7 +740,18 @@ def main():
         if 'CLUSTER_DATASTORE_URL' in globals():
             print(f"   Cluster-internal URL: {CLUSTER_DATASTORE_URL} (requires running in cluster)")
     
-    success = download_model(files_url, args.output_dir, args.datastore_url)
+    success = download_model(
+        files_url,
+        args.output_dir,
+        args.datastore_url,
+        engine=args.engine,
+        workers=args.workers,
+        chunk_size_mb=args.chunk_size_mb,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        profile=args.profile,
+        include=args.include,
+        exclude=args.exclude
+    )
     
     if success:
         print(f"\n✅ Model downloaded successfully to: {args.output_dir}")
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Export a LoRA Adapter for Multi-LoRA Serving
+
+Instead of merging the adapter into a full copy of the base model, this
+script validates the adapter against the base model architecture, uploads
+only the adapter files (tens of MB) next to the base model that is already
+deployed, and prints the vLLM serving-runtime configuration that registers
+the adapter as a LoRA module. Many fine-tunes can then share one base model
+deployment (and its GPU memory).
+
+Usage:
+    python export_adapter_for_serving.py --adapter-dir ./downloaded_model --lora-name privacy-v1
+
+    From laptop (MinIO port-forward):
+    MINIO_ENDPOINT=http://localhost:9000 python export_adapter_for_serving.py \
+        --adapter-dir ./downloaded_model --lora-name privacy-v1
+
+    Validate only and write the serving config, without uploading:
+    python export_adapter_for_serving.py --adapter-dir ./downloaded_model --lora-name privacy-v1 --skip-upload
+
+The adapter is uploaded under the base model's storage path
+(<base-storage-path>/adapters/<lora-name>) so the serving runtime already
+has it mounted at <model-mount>/adapters/<lora-name>.
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+from artifact_cache import link_or_copy
+from model_manifest import read_safetensors_header
+from upload_model_to_minio import (
+    DEFAULT_WORKERS, DEFAULT_PART_SIZE_MB, NMS_NAMESPACE, get_minio_config, upload_to_minio
+)
+
+# Load environment variables from env.donotcommit if it exists
+try:
+    from dotenv import load_dotenv
+    env_donotcommit_path = Path(__file__).parent / "env.donotcommit"
+    if env_donotcommit_path.exists():
+        load_dotenv(env_donotcommit_path, override=False)
+except ImportError:
+    pass
+
+DEFAULT_BASE_MODEL = "meta-llama/Llama-3.2-1B-Instruct"
+DEFAULT_BASE_STORAGE_PATH = "models/llama-3.2-1b-instruct"
+DEFAULT_MODEL_MOUNT = "/mnt/models"  # where KServe mounts the InferenceService storage path
+DEFAULT_INFERENCE_SERVICE = "anemo-rhoai-model-ssr"
+
+# Files a LoRA module needs; tokenizer files are only present when training added tokens
+ADAPTER_FILES = ["adapter_config.json", "adapter_model.safetensors"]
+ADAPTER_TOKENIZER_FILES = [
+    "tokenizer.json", "tokenizer_config.json", "special_tokens_map.json", "tokenizer.model", "added_tokens.json"
+]
+
+# vLLM --max-lora-rank accepts these values
+VLLM_LORA_RANKS = [8, 16, 32, 64, 128, 256, 320, 512]
+
+# Adapter keys look like base_model.model.<module>.lora_A[.<adapter>].weight
+LORA_KEY = re.compile(
+    r"^(?:base_model\.model\.)?(?P<module>.+?)\."
+    r"(?P<kind>lora_A|lora_B|lora_embedding_A|lora_embedding_B)(?:\.[^.]+)?$"
+)
+
+
+# HuggingFace Hub repo ID: [owner/]name
+HUB_REPO_ID = re.compile(r"^[A-Za-z0-9][\w.-]*(/[A-Za-z0-9][\w.-]*)?$")
+
+
+def default_base_model(adapter_path):
+    """
+    base_model_name_or_path from adapter_config.json if it is an existing
+    directory or a Hub repo ID, else DEFAULT_BASE_MODEL (Customizer outputs
+    often record a path inside the training container).
+    """
+    try:
+        recorded = json.loads((adapter_path / "adapter_config.json").read_text()).get("base_model_name_or_path")
+    except (OSError, ValueError):
+        recorded = None
+    if recorded and (Path(recorded).is_dir() or (HUB_REPO_ID.match(recorded) and ".." not in recorded)):
+        return recorded
+    if recorded:
+        print(f"ℹ️  adapter_config.json names base model {recorded}, which is neither a local directory "
+              f"nor a Hub repo ID; using {DEFAULT_BASE_MODEL} (set --base-model to override)")
+    return DEFAULT_BASE_MODEL
+
+
+def read_safetensors_shapes(path):
+    """{tensor name: shape} from a safetensors header, without reading any weights."""
+    header, _ = read_safetensors_header(path)
+    return {name: entry["shape"] for name, entry in header.items()}
+
+
+def base_model_shapes(base_model, hf_token=None):
+    """
+    {tensor name: shape} of the base model. Local directories are read from
+    their safetensors headers; Hub models via get_safetensors_metadata(),
+    which fetches only the headers (no weights are downloaded).
+    """
+    base_path = Path(base_model)
+    if base_path.is_dir():
+        shapes = {}
+        for shard in sorted(base_path.glob("*.safetensors")):
+            if not shard.name.startswith("adapter"):
+                shapes.update(read_safetensors_shapes(shard))
+        return shapes
+    from huggingface_hub import get_safetensors_metadata
+    metadata = get_safetensors_metadata(base_model, token=hf_token)
+    shapes = {}
+    for file_metadata in metadata.files_metadata.values():
+        for name, info in file_metadata.tensors.items():
+            shapes[name] = list(info.shape)
+    return shapes
+
+
+def validate_adapter(adapter_config, adapter_shapes, base_shapes):
+    """
+    Check that the adapter can be served on top of the base model.
+
+    Every LoRA module must target an existing base weight, and the factor
+    shapes must agree with it (A: [r, in], B: [out, r]). Returns a dict with
+    errors, warnings, rank and target modules.
+    """
+    errors = []
+    warnings = []
+    if adapter_config.get("peft_type", "LORA") != "LORA":
+        errors.append(f"Unsupported adapter type {adapter_config.get('peft_type')} (only LoRA can be served)")
+    if adapter_config.get("use_dora"):
+        errors.append("DoRA adapters cannot be served as LoRA modules; merge them instead")
+
+    factors = {}
+    extra = []
+    for key, shape in adapter_shapes.items():
+        match = LORA_KEY.match(key[:-len(".weight")] if key.endswith(".weight") else key)
+        if match:
+            factors.setdefault(match.group("module"), {})[match.group("kind")] = shape
+        else:
+            extra.append(key)
+    if not factors:
+        errors.append("No LoRA weights found in adapter_model.safetensors")
+
+    fan_in_fan_out = bool(adapter_config.get("fan_in_fan_out"))
+    ranks = set()
+    for module, parts in sorted(factors.items()):
+        embedding = "lora_embedding_A" in parts
+        a = parts.get("lora_embedding_A" if embedding else "lora_A")
+        b = parts.get("lora_embedding_B" if embedding else "lora_B")
+        if a is None or b is None:
+            errors.append(f"{module}: incomplete LoRA factors")
+            continue
+        base = base_shapes.get(f"{module}.weight")
+        if base is None:
+            errors.append(f"{module}: no matching weight in the base model")
+            continue
+        if len(base) != 2:
+            errors.append(f"{module}: base weight has shape {base}, expected a 2-D weight")
+            continue
+        rank = a[0]
+        ranks.add(rank)
+        out_features, in_features = base
+        if embedding or fan_in_fan_out:
+            out_features, in_features = in_features, out_features
+        if b[1] != rank or a[1] != in_features or b[0] != out_features:
+            errors.append(f"{module}: LoRA factors A{a} / B{b} do not fit base weight {base}")
+
+    if extra:
+        warnings.append(
+            f"{len(extra)} non-LoRA tensor(s) (modules_to_save, e.g. {extra[0]}) are not applied by "
+            f"multi-LoRA serving; merge the adapter if the model depends on them"
+        )
+    if adapter_config.get("use_rslora"):
+        warnings.append("use_rslora is set; check that the serving runtime version supports rsLoRA scaling")
+    if len(ranks) > 1:
+        warnings.append(f"Modules use different ranks {sorted(ranks)}; --max-lora-rank must cover the largest")
+
+    return {
+        "errors": errors,
+        "warnings": warnings,
+        "rank": max(ranks) if ranks else adapter_config.get("r"),
+        "target_modules": sorted({module.rsplit(".", 1)[-1] for module in factors}),
+        "lora_modules": len(factors),
+    }
+
+
+def serving_config(lora_name, base_model, rank, target_path, base_storage_path, model_mount, bucket):
+    """
+    vLLM settings that register the adapter on the existing base deployment:
+    startup arguments (--enable-lora --lora-modules) and the equivalent
+    runtime call for servers started with VLLM_ALLOW_RUNTIME_LORA_UPDATING.
+    """
+    if target_path.startswith(f"{base_storage_path}/"):
+        lora_path = f"{model_mount}/{target_path[len(base_storage_path) + 1:]}"
+    else:
+        lora_path = None  # not under the mounted storage path
+    max_rank = next((r for r in VLLM_LORA_RANKS if r >= (rank or 0)), rank)
+    lora_module = {"name": lora_name, "path": lora_path, "base_model_name": base_model}
+    return {
+        "lora_name": lora_name,
+        "base_model": base_model,
+        "rank": rank,
+        "storage": {"bucket": bucket, "path": target_path},
+        "container_path": lora_path,
+        "vllm_args": [
+            "--enable-lora",
+            f"--max-lora-rank={max_rank}",
+            "--lora-modules",
+            json.dumps(lora_module, separators=(",", ":")),
+        ],
+        "runtime_registration": {
+            "env": {"VLLM_ALLOW_RUNTIME_LORA_UPDATING": "True"},
+            "endpoint": "/v1/load_lora_adapter",
+            "body": {"lora_name": lora_name, "lora_path": lora_path},
+        },
+    }
+
+
+def stage_adapter_files(adapter_path, staging_path):
+    """Link the files a LoRA module needs into staging_path. Returns the file names."""
+    staged = []
+    for name in ADAPTER_FILES + ADAPTER_TOKENIZER_FILES:
+        if (adapter_path / name).is_file():
+            link_or_copy(adapter_path / name, staging_path / name)
+            staged.append(name)
+    return staged
+
+
+def export_adapter(adapter_dir, lora_name, base_model, target_path, minio_config=None,
+                   base_storage_path=DEFAULT_BASE_STORAGE_PATH, model_mount=DEFAULT_MODEL_MOUNT, hf_token=None, config_output=None, workers=DEFAULT_WORKERS,
+                   part_size_mb=DEFAULT_PART_SIZE_MB):
+    """
+    Validate an adapter against its base model, upload the adapter files
+    (skipped when minio_config is None) and write the serving config.
+
+    Returns the serving config dict, or None on failure.
+    """
+    adapter_path = Path(adapter_dir)
+    for name in ADAPTER_FILES:
+        if not (adapter_path / name).is_file():
+            print(f"❌ Error: {name} not found in {adapter_dir}")
+            return None
+
+    adapter_config = json.loads((adapter_path / "adapter_config.json").read_text())
+    trained_on = adapter_config.get("base_model_name_or_path")
+    print(f"📋 Adapter: {adapter_dir}")
+    print(f"   Trained on: {trained_on or 'unknown'}")
+    print(f"   Serving base: {base_model}")
+    if trained_on and Path(trained_on).name.lower() != Path(base_model).name.lower():
+        print(f"   ⚠️  adapter_config.json names a different base model; validating shapes anyway")
+    print()
+
+    # Validate
+    print("🔍 Validating adapter against base model architecture...")
+    try:
+        base_shapes = base_model_shapes(base_model, hf_token)
+    except Exception as e:
+        print(f"❌ Error reading base model tensor shapes: {e}")
+        print("   For gated models, set HF_TOKEN environment variable")
+        return None
+    if not base_shapes:
+        print(f"❌ Error: no safetensors weights found for {base_model}")
+        return None
+    result = validate_adapter(adapter_config, read_safetensors_shapes(adapter_path / "adapter_model.safetensors"), base_shapes)
+    for warning in result["warnings"]:
+        print(f"   ⚠️  {warning}")
+    if result["errors"]:
+        for error in result["errors"][:10]:
+            print(f"   ❌ {error}")
+        if len(result["errors"]) > 10:
+            print(f"   ... and {len(result['errors']) - 10} more")
+        print("❌ Adapter does not match the base model")
+        return None
+    print(f"✅ {result['lora_modules']} LoRA module(s) match the base model "
+          f"(rank {result['rank']}, targets: {', '.join(result['target_modules'])})")
+    print()
+
+    # Upload adapter files only
+    if minio_config:
+        staging_path = Path(tempfile.mkdtemp(prefix="lora-adapter-"))
+        try:
+            staged = stage_adapter_files(adapter_path, staging_path)
+            size_mb = sum((staging_path / name).stat().st_size for name in staged) / (1024 * 1024)
+            print(f"📤 Uploading {len(staged)} adapter file(s) ({size_mb:.1f} MB) to {target_path}...")
+            if not upload_to_minio(str(staging_path), target_path, minio_config, workers, part_size_mb, sync=True):
+                print("❌ Adapter upload failed")
+                return None
+        finally:
+            shutil.rmtree(staging_path, ignore_errors=True)
+        print()
+    else:
+        print("⏭️  Skipping upload (--skip-upload)")
+        print()
+
+    config = serving_config(
+        lora_name, base_model, result["rank"], target_path, base_storage_path, model_mount,
+        minio_config['bucket'] if minio_config else None
+    )
+    if config_output:
+        Path(config_output).write_text(json.dumps(config, indent=2))
+        print(f"💾 Serving config written to {config_output}")
+        print()
+    return config
+
+
+def print_serving_instructions(config, inference_service):
+    """Print how to register the exported adapter on the running base deployment."""
+    print("📋 Register the adapter on the base model deployment:")
+    if config["container_path"] is None:
+        print(f"   ⚠️  {config['storage']['path']} is not under the base model's storage path, so the")
+        print(f"      serving runtime cannot see it; re-run with --target-path under --base-storage-path")
+        return
+    args_patch = [{"op": "add", "path": "/spec/predictor/model/args/-", "value": arg} for arg in config["vllm_args"]]
+    print(f"   1. Add the LoRA arguments to the vLLM InferenceService (once per adapter set):")
+    print(f"      oc patch inferenceservice {inference_service} -n {NMS_NAMESPACE} --type='json' \\")
+    print(f"        -p='{json.dumps(args_patch)}'")
+    print(f"      (if the predictor has no args yet, use \"path\": \"/spec/predictor/model/args\" with the full list)")
+    print()
+    print(f"   Or, on a server started with VLLM_ALLOW_RUNTIME_LORA_UPDATING=True, load it without a restart:")
+    print(f"      curl -X POST <inference-url>{config['runtime_registration']['endpoint']} \\")
+    print(f"        -H 'Content-Type: application/json' -d '{json.dumps(config['runtime_registration']['body'])}'")
+    print()
+    print(f"   2. Send requests with \"model\": \"{config['lora_name']}\" (the base model name still serves the base)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export a LoRA adapter for multi-LoRA serving on an existing base model deployment"
+    )
+    parser.add_argument(
+        "--adapter-dir",
+        type=str,
+        required=True,
+        help="Directory containing adapter_config.json and adapter_model.safetensors "
+             "(download with download_model_from_datastore.py --profile adapter-only)"
+    )
+    parser.add_argument(
+        "--lora-name",
+        type=str,
+        help="Name the adapter is served under (default: adapter directory name)"
+    )
+    parser.add_argument(
+        "--base-model",
+        type=str,
+        help="Base model served by the deployment (HuggingFace model ID or local path). "
+             f"Default: base_model_name_or_path from adapter_config.json if it is a local directory "
+             f"or Hub repo ID, else {DEFAULT_BASE_MODEL}"
+    )
+    parser.add_argument(
+        "--base-storage-path",
+        type=str,
+        default=DEFAULT_BASE_STORAGE_PATH,
+        help=f"MinIO path the base InferenceService serves (default: {DEFAULT_BASE_STORAGE_PATH})"
+    )
+    parser.add_argument(
+        "--target-path",
+        type=str,
+        help="MinIO path for the adapter files (default: <base-storage-path>/adapters/<lora-name>)"
+    )
+    parser.add_argument(
+        "--model-mount",
+        type=str,
+        default=DEFAULT_MODEL_MOUNT,
+        help=f"Where the serving runtime mounts the storage path (default: {DEFAULT_MODEL_MOUNT})"
+    )
+    parser.add_argument(
+        "--inference-service",
+        type=str,
+        default=DEFAULT_INFERENCE_SERVICE,
+        help=f"InferenceService serving the base model (default: {DEFAULT_INFERENCE_SERVICE})"
+    )
+    parser.add_argument(
+        "--config-output",
+        type=str,
+        help="Where to write the serving config JSON (default: ./<lora-name>-serving.json)"
+    )
+    parser.add_argument(
+        "--skip-upload",
+        action="store_true",
+        help="Validate and write the serving config without uploading"
+    )
+    parser.add_argument(
+        "--hf-token",
+        type=str,
+        help="HuggingFace token (for gated base models). Can also set HF_TOKEN environment variable"
+    )
+    parser.add_argument(
+        "--minio-endpoint",
+        type=str,
+        help="MinIO endpoint URL (overrides secret)"
+    )
+    parser.add_argument(
+        "--minio-bucket",
+        type=str,
+        help="MinIO bucket name (overrides secret)"
+    )
+    parser.add_argument(
+        "--minio-access-key",
+        type=str,
+        help="MinIO access key (overrides secret)"
+    )
+    parser.add_argument(
+        "--minio-secret-key",
+        type=str,
+        help="MinIO secret key (overrides secret)"
+    )
+
+    args = parser.parse_args()
+
+    adapter_path = Path(args.adapter_dir)
+    lora_name = args.lora_name or adapter_path.resolve().name
+    base_model = args.base_model or default_base_model(adapter_path)
+    target_path = args.target_path or f"{args.base_storage_path}/adapters/{lora_name}"
+    hf_token = args.hf_token or os.getenv("HF_TOKEN")
+
+    minio_config = None
+    if not args.skip_upload:
+        if args.minio_endpoint and args.minio_bucket and args.minio_access_key and args.minio_secret_key:
+            minio_config = {
+                "endpoint": args.minio_endpoint,
+                "bucket": args.minio_bucket,
+                "access_key": args.minio_access_key,
+                "secret_key": args.minio_secret_key
+            }
+        else:
+            minio_config = get_minio_config()
+            if not minio_config:
+                print("\n❌ Error: Could not get MinIO configuration")
+                print("   Use --minio-endpoint, --minio-bucket, --minio-access-key, --minio-secret-key")
+                print("   or --skip-upload to only validate")
+                sys.exit(1)
+            override = os.getenv("MINIO_ENDPOINT")
+            if override:
+                minio_config = {**minio_config, "endpoint": override}
+
+    print("=" * 70)
+    print("Export LoRA Adapter for Multi-LoRA Serving")
+    print("=" * 70)
+    print(f"LoRA name: {lora_name}")
+    print(f"Target path: {target_path}")
+    print()
+
+    config = export_adapter(
+        args.adapter_dir,
+        lora_name,
+        base_model,
+        target_path,
+        minio_config,
+        base_storage_path=args.base_storage_path,
+        model_mount=args.model_mount,
+        hf_token=hf_token,
+        config_output=args.config_output or f"{lora_name}-serving.json"
+    )
+    if config is None:
+        sys.exit(1)
+
+    print("=" * 70)
+    print("✅ Adapter exported")
+    print("=" * 70)
+    print()
+    print_serving_instructions(config, args.inference_service)
+
+
+if __name__ == "__main__":
+    main()
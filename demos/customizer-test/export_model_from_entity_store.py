@@ -24,9 +24,17 @@ Explicit Usage:
 import os
 import sys
 import json
+import io
+import time
+import asyncio
+import threading
 import argparse
 import requests
 from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+
+from job_index import DEFAULT_JOB_INDEX, JobIndex, created_timestamp
+from nemo_client import CustomizerClient, DataStoreClient, EntityStoreClient, NemoHTTPError, backoff_delay
 
 # Load environment variables from env.donotcommit if it exists
 try:
@@ -58,6 +66,19 @@ if not CUSTOMIZER_URL:
 else:
     CLUSTER_CUSTOMIZER_URL = CUSTOMIZER_URL
 
+# Job listing: page size and concurrent page fetches
+JOB_PAGE_SIZE = 100
+JOB_LIST_WORKERS = int(os.getenv("CUSTOMIZER_LIST_WORKERS", "8"))
+# Extra attempts for a job page that failed during a listing
+JOB_PAGE_RETRIES = 2
+
+# Seconds Entity Store has to answer a --model-name lookup before the Customizer job search starts
+ENTITY_STORE_HEAD_START = float(os.getenv("ENTITY_STORE_HEAD_START", "1.0"))
+
+# Auto-mode fallback: concurrent model existence probes and per-request timeout (seconds)
+MODEL_PROBE_CONCURRENCY = int(os.getenv("MODEL_PROBE_CONCURRENCY", "16"))
+MODEL_PROBE_TIMEOUT = 5
+
 # DataStore URL (for checking if models exist)
 DATASTORE_URL = os.getenv("DATASTORE_URL")
 if not DATASTORE_URL:
@@ -94,13 +115,9 @@ def get_model_info_from_entity_store(model_name, entity_store_url=None):
     model_path = f"{model_namespace}/{model_name_only}"
     
     try:
-        response = requests.get(
-            f"{entity_store_url}/v1/models/{model_path}",
-            timeout=30
-        )
+        model_info = EntityStoreClient(entity_store_url).get_model(model_path)
         
-        if response.status_code == 200:
-            model_info = response.json()
+        if model_info is not None:
             files_url = model_info.get('artifact', {}).get('files_url')
             
             print(f"✅ Found model in Entity Store!")
@@ -117,18 +134,18 @@ def get_model_info_from_entity_store(model_name, entity_store_url=None):
                 "model_name_only": model_name_only,
                 "model_version": model_version
             }
-        elif response.status_code == 404:
-            return {
-                "success": False,
-                "error": "Model not found in Entity Store",
-                "model_name": model_name
-            }
         else:
             return {
                 "success": False,
-                "error": f"HTTP {response.status_code}",
+                "error": "Model not found in Entity Store",
                 "model_name": model_name
             }
+    except NemoHTTPError as e:
+        return {
+            "success": False,
+            "error": f"HTTP {e.status_code}",
+            "model_name": model_name
+        }
     except Exception as e:
         return {
             "success": False,
@@ -137,19 +154,37 @@ def get_model_info_from_entity_store(model_name, entity_store_url=None):
         }
 
 
+def job_files_url(output_model):
+    """
+    DataStore files_url of a job's output model. Customizer stores models in
+    DataStore, typically at hf://datasets/{namespace}/{model_name}@revision.
+    """
+    # Parse model name to construct DataStore path (include revision for EntityHandler exports)
+    if "@" in output_model:
+        namespace_part, revision_part = output_model.split("@", 1)
+    else:
+        namespace_part = output_model
+        revision_part = None
+    
+    if "/" in namespace_part:
+        model_namespace, model_name_only = namespace_part.split("/", 1)
+        files_url = f"hf://datasets/{model_namespace}/{model_name_only}"
+    else:
+        files_url = f"hf://datasets/{NMS_NAMESPACE}/{namespace_part}"
+    if revision_part:
+        files_url = f"{files_url}@{revision_part}"
+    return files_url
+
+
 def get_model_info_from_customizer_job(job_id, customizer_url=None, allow_failed=False):
     """Get model information from Customizer job details."""
     if customizer_url is None:
         customizer_url = CUSTOMIZER_URL
     
     try:
-        response = requests.get(
-            f"{customizer_url}/v1/customization/jobs/{job_id}",
-            timeout=30
-        )
+        job_details = CustomizerClient(customizer_url).get_job(job_id)
         
-        if response.status_code == 200:
-            job_details = response.json()
+        if job_details is not None:
             output_model = job_details.get('output_model')
             status = job_details.get('status')
             
@@ -169,23 +204,7 @@ def get_model_info_from_customizer_job(job_id, customizer_url=None, allow_failed
             print(f"   Output Model: {output_model}")
             
             # Try to construct files_url from output_model
-            # Customizer stores models in DataStore, typically at hf://datasets/{namespace}/{model_name}@revision
-            files_url = None
-            if output_model:
-                # Parse model name to construct DataStore path (include revision for EntityHandler exports)
-                if "@" in output_model:
-                    namespace_part, revision_part = output_model.split("@", 1)
-                else:
-                    namespace_part = output_model
-                    revision_part = None
-                
-                if "/" in namespace_part:
-                    model_namespace, model_name_only = namespace_part.split("/", 1)
-                    files_url = f"hf://datasets/{model_namespace}/{model_name_only}"
-                else:
-                    files_url = f"hf://datasets/{NMS_NAMESPACE}/{namespace_part}"
-                if revision_part:
-                    files_url = f"{files_url}@{revision_part}"
+            files_url = job_files_url(output_model) if output_model else None
             
             return {
                 "success": True,
@@ -196,18 +215,18 @@ def get_model_info_from_customizer_job(job_id, customizer_url=None, allow_failed
                 "files_url": files_url,
                 "model_name": output_model
             }
-        elif response.status_code == 404:
-            return {
-                "success": False,
-                "error": "Job not found",
-                "job_id": job_id
-            }
         else:
             return {
                 "success": False,
-                "error": f"HTTP {response.status_code}",
+                "error": "Job not found",
                 "job_id": job_id
             }
+    except NemoHTTPError as e:
+        return {
+            "success": False,
+            "error": f"HTTP {e.status_code}",
+            "job_id": job_id
+        }
     except Exception as e:
         return {
             "success": False,
@@ -216,60 +235,310 @@ def get_model_info_from_customizer_job(job_id, customizer_url=None, allow_failed
         }
 
 
-def get_last_completed_job(customizer_url=None):
-    """Get the most recent completed customization job from Customizer."""
-    if customizer_url is None:
-        customizer_url = CUSTOMIZER_URL
+def job_created_at(job):
+    """Sort key for jobs: creation timestamp, falling back to the job id."""
+    created_at = created_timestamp(job)
+    if created_at is not None:
+        return created_at
+    # Fallback: use id (assuming newer jobs have higher IDs)
+    return job.get('id', '')
+
+
+def is_newest_first(jobs):
+    """True if jobs are ordered by creation time, newest first (all with a creation time)."""
+    keys = [created_timestamp(job) for job in jobs]
+    return None not in keys and all(a >= b for a, b in zip(keys, keys[1:]))
+
+
+class ListingCancelled(Exception):
+    """A job listing stopped early because its cancel event was set."""
+
+
+def check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise ListingCancelled("Customizer job listing cancelled")
+
+
+def fetch_jobs_page(customizer_url, page, limit=JOB_PAGE_SIZE, extra_params=None):
+    """Fetch one page of /v1/customization/jobs. Returns (jobs, pagination); raises on HTTP errors."""
+    return CustomizerClient(customizer_url).list_jobs(page, limit, **(extra_params or {}))
+
+
+def list_customization_jobs(customizer_url, workers=JOB_LIST_WORKERS, limit=JOB_PAGE_SIZE, cancel=None):
+    """
+    List every customization job. The first page gives total_pages; the
+    remaining pages are fetched concurrently by a pool of `workers` threads.
+    A page that fails is retried JOB_PAGE_RETRIES times; if it still fails
+    the listing raises, since a partial listing could hide the latest job.
+    `cancel` (threading.Event) is checked between pages; once it is set, no
+    further page is requested and ListingCancelled is raised.
+    Returns (jobs, pages fetched).
+    """
+    def fetch_page(page):
+        check_cancelled(cancel)
+        return fetch_jobs_page(customizer_url, page, limit)
     
+    jobs, pagination = fetch_page(1)
+    total_pages = int(pagination.get('total_pages') or 1)
+    pages = {1: jobs}
+    if total_pages > 1:
+        print(f"   Fetching {total_pages - 1} more page(s) with {max(1, min(workers, total_pages - 1))} worker(s)...")
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, total_pages - 1))) as executor:
+            futures = {
+                executor.submit(fetch_page, page): page
+                for page in range(2, total_pages + 1)
+            }
+            failed = []
+            for future in as_completed(futures):
+                if cancel is not None and cancel.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    check_cancelled(cancel)
+                try:
+                    pages[futures[future]] = future.result()[0]
+                except Exception as e:
+                    print(f"   ⚠️  Could not fetch page {futures[future]}: {e}")
+                    failed.append(futures[future])
+        for page in sorted(failed):
+            for attempt in range(1, JOB_PAGE_RETRIES + 1):
+                time.sleep(backoff_delay(attempt))
+                check_cancelled(cancel)
+                try:
+                    pages[page] = fetch_jobs_page(customizer_url, page, limit)[0]
+                    print(f"   ✅ Page {page} fetched on retry {attempt}")
+                    break
+                except Exception as e:
+                    if attempt == JOB_PAGE_RETRIES:
+                        raise RuntimeError(f"Could not list Customizer jobs: page {page} of {total_pages} "
+                                           f"failed {JOB_PAGE_RETRIES + 1} times ({e})") from e
+    
+    # Jobs created while paging shift entries across page boundaries; keep each job once
+    all_jobs = []
+    seen = set()
+    for page in sorted(pages):
+        for job in pages[page]:
+            key = job.get('id') or id(job)
+            if key not in seen:
+                seen.add(key)
+                all_jobs.append(job)
+    return all_jobs, len(pages)
+
+
+def find_latest_job_server_side(customizer_url, status="completed"):
+    """
+    Ask Customizer for jobs with the given status, newest first, and return
+    the first one. Returns None when there is no such job or the server
+    ignored the sort/filter parameters (then the caller lists all jobs).
+    """
     try:
-        print(f"🔍 Querying Customizer for all jobs...")
-        print(f"   Customizer URL: {customizer_url}")
-        
-        # Get all jobs - handle pagination
-        all_jobs = []
+        jobs, _ = fetch_jobs_page(
+            customizer_url, 1, JOB_PAGE_SIZE,
+            {"sort": "-created_at", "filter[status]": status}
+        )
+    except Exception as e:
+        print(f"   ⚠️  Server-side sort/filter not available: {e}")
+        return None
+    if not jobs:
+        return None
+    # Only trust the result if the server actually filtered and sorted
+    if any(job.get('status') != status for job in jobs):
+        return None
+    if not is_newest_first(jobs):
+        return None
+    return jobs[0]
+
+
+def sync_job_index(job_index, customizer_url, workers=JOB_LIST_WORKERS, cancel=None):
+    """
+    Bring the local job index up to date. Jobs are requested newest first
+    and paging stops once it reaches the index's sync horizon (the newest
+    indexed job, or the oldest one that was still unfinished). The first
+    page is a conditional request when its last ETag covered the horizon,
+    so an unchanged job list costs one 304 response. Falls back to listing
+    every job when the index is empty or the server does not sort.
+    A sync is all or nothing: if any page fails, nothing is upserted and
+    neither the sync nor the first page's ETag is recorded, so the next
+    run re-reads the same range. A set `cancel` event aborts the sync the
+    same way (ListingCancelled). Returns the number of jobs fetched.
+    """
+    started = time.monotonic()
+    try:
+        fetched, mode, first_page = fetch_jobs_since_horizon(job_index, customizer_url, workers, cancel)
+    except Exception as e:
+        print(f"   ⚠️  Job index sync aborted, nothing recorded: {e}")
+        raise
+    if fetched is None:
+        job_index.record_sync("not modified", 0)
+        print(f"   📇 Job index up to date (304 Not Modified, {time.monotonic() - started:.2f}s)")
+        return 0
+    job_index.upsert(fetched, job_files_url)
+    if first_page is not None:
+        job_index.set_first_page(*first_page)
+    job_index.record_sync(mode, len(fetched))
+    print(f"   📇 Job index synced ({mode}, {len(fetched)} job(s) fetched, "
+          f"{time.monotonic() - started:.2f}s): {job_index.path}")
+    return len(fetched)
+
+
+def fetch_jobs_since_horizon(job_index, customizer_url, workers=JOB_LIST_WORKERS, cancel=None):
+    """
+    The Customizer side of sync_job_index(); changes nothing in the index.
+    Returns (jobs, mode, first page (etag, oldest created_at) or None), or
+    (None, None, None) when the first page is unchanged (304). Raises if
+    any page fails.
+    """
+    horizon = job_index.sync_horizon()
+    fetched = None
+    first_page = None
+    if horizon is not None:
+        # Ask for the first page conditionally when it covered everything down to the horizon
+        etag, oldest = job_index.first_page()
+        if oldest is None or oldest > horizon:
+            etag = None
+        jobs, pagination, etag = CustomizerClient(customizer_url).list_jobs_if_changed(
+            etag, 1, JOB_PAGE_SIZE, sort="-created_at"
+        )
+        if jobs is None:
+            return None, None, None
+        first_page = (etag, created_timestamp(jobs[-1]) if jobs and is_newest_first(jobs) else None)
+        fetched = []
         page = 1
-        limit = 100  # Request more jobs per page
-        
         while True:
-            jobs_response = requests.get(
-                f"{customizer_url}/v1/customization/jobs",
-                params={"page": page, "limit": limit},
-                timeout=30
-            )
-            
-            if jobs_response.status_code != 200:
-                if page == 1:
-                    # If first page fails, return error
-                    return {
-                        "success": False,
-                        "error": f"HTTP {jobs_response.status_code}: {jobs_response.text[:200]}"
-                    }
-                break
-            
-            jobs_data = jobs_response.json()
-            jobs = jobs_data.get('data', [])
-            
-            if not jobs:
+            if page > 1:
+                check_cancelled(cancel)
+                jobs, pagination = fetch_jobs_page(customizer_url, page, JOB_PAGE_SIZE, {"sort": "-created_at"})
+            if not is_newest_first(jobs) or (fetched and jobs and not is_newest_first([fetched[-1], jobs[0]])):
+                print(f"   ⚠️  Customizer ignored sort=-created_at; listing all jobs")
+                fetched = None
                 break
-            
-            all_jobs.extend(jobs)
-            
-            # Check pagination info
-            pagination = jobs_data.get('pagination', {})
-            total_pages = pagination.get('total_pages', 1)
-            current_page = pagination.get('page', page)
-            
-            # If we've fetched all pages, break
-            if current_page >= total_pages:
+            fetched.extend(jobs)
+            if not jobs or created_timestamp(jobs[-1]) < horizon or page >= int(pagination.get('total_pages') or 1):
                 break
-            
             page += 1
-            # Safety limit
-            if page > 20:
-                print(f"   ⚠️  Reached pagination limit (20 pages), stopping")
-                break
+        mode = f"incremental, {page} page(s)"
+    if fetched is None:
+        fetched, pages = list_customization_jobs(customizer_url, workers, cancel=cancel)
+        mode = f"full, {pages} page(s)"
+    return fetched, mode, first_page
+
+
+def model_repo_path(output_model):
+    """<namespace>/<name> of a job's output_model, as used by Entity Store and DataStore."""
+    model_namespace, model_name_only, _ = parse_model_name(output_model)
+    return f"{model_namespace}/{model_name_only}"
+
+
+def probe_model_exists(model_path, timings):
+    """
+    Check whether a model exists in Entity Store, then DataStore (models can
+    be in DataStore without an Entity Store entry). Each request's duration
+    is appended to timings[backend]. Returns the backend name or None.
+    """
+    for backend, exists in (
+        ("Entity Store", EntityStoreClient(ENTITY_STORE_URL).model_exists),
+        ("DataStore", DataStoreClient(DATASTORE_URL).model_exists),
+    ):
+        started = time.monotonic()
+        try:
+            # Many probes run at once: short timeout, no retries
+            found = exists(model_path, timeout=MODEL_PROBE_TIMEOUT, retry=False)
+        except requests.RequestException:
+            found = False
+        timings[backend].append(time.monotonic() - started)
+        if found:
+            return backend
+    return None
+
+
+async def probe_newest_job_with_model(jobs, concurrency, timings):
+    """
+    Probe the output models of jobs (newest first) with at most
+    `concurrency` probes in flight. Results are awaited in job order, so the
+    first hit is the newest job with a model; outstanding probes are then
+    cancelled. Returns (job, backend) or (None, None).
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    # Own executor: in-flight requests are abandoned, not waited for, once the answer is known
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    
+    async def probe(job):
+        async with semaphore:
+            return await loop.run_in_executor(
+                executor, probe_model_exists, model_repo_path(job['output_model']), timings
+            )
+    
+    tasks = [asyncio.create_task(probe(job)) for job in jobs]
+    try:
+        for job, task in zip(jobs, tasks):
+            backend = await task
+            if backend:
+                return job, backend
+        return None, None
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_last_completed_job(customizer_url=None, workers=JOB_LIST_WORKERS, probe_concurrency=MODEL_PROBE_CONCURRENCY,
+                           job_index=None):
+    """
+    Get the most recent completed customization job from Customizer.
+
+    With a job_index (JobIndex), the index is synced incrementally and
+    queried. Otherwise asks the server for completed jobs sorted by creation
+    time first and stops after that page; failing that, lists all jobs
+    (pages fetched concurrently by `workers` threads) and picks the newest
+    completed one.
+    If no job is marked completed, the newest job whose output model exists
+    in Entity Store or DataStore is used (see probe_newest_job_with_model).
+    """
+    if customizer_url is None:
+        customizer_url = CUSTOMIZER_URL
+    
+    try:
+        print(f"🔍 Querying Customizer for the latest completed job...")
+        print(f"   Customizer URL: {customizer_url}")
+        
+        if job_index is not None:
+            try:
+                sync_job_index(job_index, customizer_url, workers)
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": str(e)
+                }
+            latest_job = job_index.latest("completed")
+            source = "job index"
+        else:
+            latest_job = find_latest_job_server_side(customizer_url)
+            source = "server-side sort/filter, 1 page"
+        if latest_job is not None:
+            print(f"   ✅ Selected most recent completed job ({source}):")
+            print(f"      Job ID: {latest_job.get('id')}")
+            print(f"      Output Model: {latest_job.get('output_model')}")
+            print(f"      Status: {latest_job.get('status')}")
+            return {
+                "success": True,
+                "job_id": latest_job.get('id'),
+                "output_model": latest_job.get('output_model'),
+                "job_details": latest_job
+            }
         
-        jobs = all_jobs
+        if job_index is not None:
+            jobs = job_index.all_jobs()
+            fetched_from = "job index"
+        else:
+            print(f"   Listing all jobs...")
+            try:
+                jobs, page = list_customization_jobs(customizer_url, workers)
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": str(e)
+                }
+            fetched_from = f"fetched from {page} page(s)"
         
         if not jobs:
             return {
@@ -277,7 +546,7 @@ def get_last_completed_job(customizer_url=None):
                 "error": "No jobs found in Customizer"
             }
         
-        print(f"   Found {len(jobs)} total job(s) (fetched from {page} page(s))")
+        print(f"   Found {len(jobs)} total job(s) ({fetched_from})")
         
         # Filter for completed jobs (primary method)
         completed_jobs = [job for job in jobs if job.get('status') == 'completed']
@@ -288,63 +557,24 @@ def get_last_completed_job(customizer_url=None):
             print(f"   Available statuses: {set(job.get('status') for job in jobs)}")
             print(f"   🔍 Checking if any jobs have models in Entity Store (alternative success indicator)...")
             
-            # Check each job to see if its output_model exists in Entity Store
+            # Probe candidates concurrently, newest first; stop at the newest job whose model exists
+            candidates = sorted((job for job in jobs if job.get('output_model')), key=job_created_at, reverse=True)
+            print(f"      {len(candidates)} candidate(s), up to {probe_concurrency} probe(s) in flight")
+            timings = {"Entity Store": [], "DataStore": []}
+            started = time.monotonic()
+            newest_job, backend = asyncio.run(probe_newest_job_with_model(candidates, probe_concurrency, timings))
+            print(f"      Probing took {time.monotonic() - started:.1f}s")
+            for name, durations in timings.items():
+                if durations:
+                    print(f"      {name}: {len(durations)} probe(s), {sum(durations):.1f}s total, "
+                          f"slowest {max(durations):.2f}s")
             jobs_with_models = []
-            for job in jobs:
-                    output_model = job.get('output_model')
-                    if not output_model:
-                        continue
-                    
-                    # Parse model name for Entity Store lookup
-                    if "@" in output_model:
-                        namespace_part = output_model.split("@")[0]
-                    else:
-                        namespace_part = output_model
-                    
-                    if "/" in namespace_part:
-                        model_namespace, model_name_only = namespace_part.split("/", 1)
-                    else:
-                        model_namespace = NMS_NAMESPACE
-                        model_name_only = namespace_part
-                    
-                    model_path = f"{model_namespace}/{model_name_only}"
-                    
-                    # Check Entity Store first
-                    model_exists = False
-                    try:
-                        es_url = ENTITY_STORE_URL
-                        es_response = requests.get(
-                            f"{es_url}/v1/models/{model_path}",
-                            timeout=5
-                        )
-                        if es_response.status_code == 200:
-                            model_exists = True
-                            print(f"      ✅ Job {job.get('id')[:20]}... has model in Entity Store")
-                    except:
-                        pass
-                    
-                    # Also check DataStore (models might be there even if not in Entity Store)
-                    if not model_exists:
-                        try:
-                            # Try to check DataStore via HuggingFace API
-                            # Model path in DataStore would be: namespace/model_name
-                            ds_url = DATASTORE_URL
-                            # Use HuggingFace API to check if repo exists
-                            hf_response = requests.get(
-                                f"{ds_url}/v1/hf/models/{model_path}",
-                                timeout=5
-                            )
-                            if hf_response.status_code == 200:
-                                model_exists = True
-                                print(f"      ✅ Job {job.get('id')[:20]}... has model in DataStore")
-                        except:
-                            pass
-                    
-                    if model_exists:
-                        jobs_with_models.append(job)
+            if newest_job is not None:
+                print(f"      ✅ Job {newest_job.get('id')[:20]}... has model in {backend}")
+                jobs_with_models.append(newest_job)
             
             if jobs_with_models:
-                print(f"   ✅ Found {len(jobs_with_models)} job(s) with models in Entity Store")
+                print(f"   ✅ Using the newest job with a model in Entity Store or DataStore")
                 completed_jobs = jobs_with_models
             else:
                 print(f"   ❌ No jobs found with models in Entity Store either")
@@ -352,20 +582,7 @@ def get_last_completed_job(customizer_url=None):
                 print(f"      Note: If jobs succeeded but status wasn't updated, this will still work")
                 
                 # Fallback: Use most recent jobs (user said last 3-4 succeeded)
-                # Sort all jobs by creation time
-                def get_sort_key(job):
-                    created_at = job.get('created_at') or job.get('createdAt') or job.get('start_time')
-                    if created_at:
-                        try:
-                            from datetime import datetime
-                            if isinstance(created_at, str):
-                                return datetime.fromisoformat(created_at.replace('Z', '+00:00')).timestamp()
-                            return float(created_at)
-                        except:
-                            pass
-                    return job.get('id', '')
-                
-                sorted_all_jobs = sorted(jobs, key=get_sort_key, reverse=True)
+                sorted_all_jobs = sorted(jobs, key=job_created_at, reverse=True)
                 # Take last 4 most recent jobs
                 completed_jobs = sorted_all_jobs[:4]
                 print(f"   📋 Using last {len(completed_jobs)} most recent job(s) as fallback")
@@ -373,23 +590,7 @@ def get_last_completed_job(customizer_url=None):
         print(f"   Found {len(completed_jobs)} successful job(s) (status='completed' or model exists in Entity Store)")
         
         # Sort by creation time (most recent first) or by ID
-        # Try to sort by created_at if available, otherwise by id
-        def get_sort_key(job):
-            # Try created_at timestamp, or use id as fallback
-            created_at = job.get('created_at') or job.get('createdAt') or job.get('start_time')
-            if created_at:
-                try:
-                    # Try to parse as ISO timestamp
-                    from datetime import datetime
-                    if isinstance(created_at, str):
-                        return datetime.fromisoformat(created_at.replace('Z', '+00:00')).timestamp()
-                    return float(created_at)
-                except:
-                    pass
-            # Fallback: use id (assuming newer jobs have higher IDs)
-            return job.get('id', '')
-        
-        completed_jobs.sort(key=get_sort_key, reverse=True)
+        completed_jobs.sort(key=job_created_at, reverse=True)
         
         # Get the most recent completed job
         latest_job = completed_jobs[0]
@@ -415,14 +616,162 @@ def get_last_completed_job(customizer_url=None):
         }
 
 
-def get_model_info(model_name=None, job_id=None, entity_store_url=None, customizer_url=None, auto_mode=False):
-    """Get model information from Entity Store or Customizer job."""
+class ThreadOutput:
+    """
+    sys.stdout proxy that buffers what registered threads print, so lookups
+    running concurrently do not interleave their output. Other threads
+    write straight through.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffers = {}
+
+    def capture(self):
+        self.buffers[threading.get_ident()] = io.StringIO()
+
+    def release(self):
+        return self.buffers.pop(threading.get_ident()).getvalue()
+
+    def write(self, text):
+        return self.buffers.get(threading.get_ident(), self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def _run_captured(function, *args):
+    """
+    Run function(*args) with its printed output buffered (sys.stdout must be
+    a ThreadOutput). Returns (result, output, seconds).
+    """
+    output = sys.stdout
+    output.capture()
+    started = time.monotonic()
+    try:
+        result = function(*args)
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    finally:
+        text = output.release()
+    return result, text, time.monotonic() - started
+
+
+def lookup_model_in_customizer(model_name, job_id, customizer_url, allow_failed, list_workers, job_index, cancel):
+    """
+    Customizer side of get_model_info(): job details by job_id, or the
+    latest completed job whose output_model is model_name. The job search
+    stops between pages (ListingCancelled) once `cancel` (threading.Event)
+    is set.
+    """
+    if job_id:
+        print(f"🔍 Looking up job in Customizer...")
+        print(f"   Job ID: {job_id}")
+        print(f"   Customizer URL: {customizer_url or CUSTOMIZER_URL}")
+        result = get_model_info_from_customizer_job(job_id, customizer_url, allow_failed=allow_failed)
+        if not result.get("success"):
+            print(f"   ⚠️  Job not found or not completed: {result.get('error')}")
+        return result
+    
+    print(f"🔍 Searching for job by model name in Customizer...")
+    if job_index is not None:
+        sync_job_index(job_index, customizer_url or CUSTOMIZER_URL, list_workers, cancel)
+        job = job_index.job_for_model(model_name)
+        jobs = [job] if job else []
+    else:
+        jobs, _ = list_customization_jobs(customizer_url or CUSTOMIZER_URL, list_workers, cancel=cancel)
+    check_cancelled(cancel)
+    
+    # Find job with matching output_model
+    for job in jobs:
+        if job.get('output_model') == model_name and job.get('status') == 'completed':
+            print(f"   ✅ Found completed job: {job.get('id')}")
+            return get_model_info_from_customizer_job(job.get('id'), customizer_url)
+    print(f"   ⚠️  No completed job produced {model_name}")
+    return {"success": False, "error": "No completed job found for model", "model_name": model_name}
+
+
+def _start_daemon(function, *args):
+    """
+    Run _run_captured(function, *args) on a daemon thread and return a Future
+    for its (result, output, seconds). A daemon thread that is still running
+    is abandoned at exit instead of keeping the process alive.
+    """
+    future = Future()
+    threading.Thread(target=lambda: future.set_result(_run_captured(function, *args)), daemon=True).start()
+    return future
+
+
+def race_model_lookups(model_name, job_id, entity_store_url, customizer_url, auto_mode, list_workers, job_index,
+                       head_start=ENTITY_STORE_HEAD_START):
+    """
+    Query Entity Store and Customizer concurrently. Entity Store has priority:
+    its answer is used whenever it succeeds. A lookup by job_id (one GET)
+    starts at once; a search of the Customizer jobs by model name starts
+    after Entity Store has answered or `head_start` seconds have passed, so
+    a quick Entity Store hit never pages through the jobs. A Customizer
+    lookup still running is cancelled between pages and abandoned. The Customizer answer is used
+    once Entity Store has failed. Each lookup's output is printed as a block.
+    """
+    print(f"\n🔍 Looking up model in {'Entity Store and ' if model_name else ''}Customizer concurrently...")
+    if not isinstance(sys.stdout, ThreadOutput):
+        sys.stdout = ThreadOutput(sys.stdout)
+    cancel = threading.Event()
+    customizer_future = None
+    
+    def start_customizer():
+        # Allow failed jobs if we're in auto mode (user said jobs succeeded)
+        return _start_daemon(
+            lookup_model_in_customizer,
+            model_name, job_id, customizer_url, auto_mode, list_workers, job_index, cancel
+        )
+    
+    if job_id:
+        customizer_future = start_customizer()
+    if model_name:
+        entity_store_future = _start_daemon(get_model_info_from_entity_store, model_name, entity_store_url)
+        if customizer_future is None:
+            wait([entity_store_future], timeout=head_start)
+            if not entity_store_future.done():
+                customizer_future = start_customizer()
+        result, text, seconds = entity_store_future.result()
+        print(f"\n── Entity Store ({seconds:.2f}s)")
+        print(f"   Model: {model_name}")
+        print(f"   Entity Store URL: {entity_store_url or ENTITY_STORE_URL}")
+        print(text, end="")
+        if result.get("success"):
+            cancel.set()
+            if customizer_future is not None and not customizer_future.done():
+                print(f"   ⏹️  Customizer lookup cancelled (Entity Store answered first)")
+            if job_index is not None and job_id and result.get("files_url"):
+                job_index.set_files_url(job_id, result["files_url"])
+            return result
+        print(f"   ⚠️  Model not found in Entity Store: {result.get('error')}")
+    if customizer_future is None:
+        customizer_future = start_customizer()
+    result, text, seconds = customizer_future.result()
+    print(f"\n── Customizer ({seconds:.2f}s)")
+    print(text, end="")
+    return result
+
+
+def get_model_info(model_name=None, job_id=None, entity_store_url=None, customizer_url=None, auto_mode=False,
+                   list_workers=JOB_LIST_WORKERS, probe_concurrency=MODEL_PROBE_CONCURRENCY, job_index=None):
+    """
+    Get model information from Entity Store or Customizer job.
+
+    job_index: optional JobIndex used for auto mode and model-name job
+               lookups instead of listing Customizer jobs
+    """
     result = None
     
     # Auto mode: find last completed job if no arguments provided
     if auto_mode and not model_name and not job_id:
         print(f"\n🤖 AUTO MODE: Finding last completed customization job...")
-        auto_result = get_last_completed_job(customizer_url)
+        auto_result = get_last_completed_job(customizer_url, list_workers, probe_concurrency, job_index)
         
         if auto_result.get("success"):
             job_id = auto_result.get("job_id")
@@ -438,56 +787,14 @@ def get_model_info(model_name=None, job_id=None, entity_store_url=None, customiz
                 "suggestion": "Try providing --model-name or --job-id explicitly"
             }
     
-    # Try Entity Store first if we have model name
-    if model_name:
-        print(f"\n🔍 Step 1: Looking up model in Entity Store...")
-        print(f"   Model: {model_name}")
-        print(f"   Entity Store URL: {entity_store_url or ENTITY_STORE_URL}")
-        
-        result = get_model_info_from_entity_store(model_name, entity_store_url)
-        
-        if result.get("success"):
-            return result
-        else:
-            print(f"   ⚠️  Model not found in Entity Store: {result.get('error')}")
-    
-    # Fallback: Try Customizer job API if we have job_id
-    if job_id:
-        print(f"\n🔍 Step 2: Looking up job in Customizer...")
-        print(f"   Job ID: {job_id}")
-        print(f"   Customizer URL: {customizer_url or CUSTOMIZER_URL}")
-        
-        # Allow failed jobs if we're in auto mode (user said jobs succeeded)
-        allow_failed = auto_mode
-        result = get_model_info_from_customizer_job(job_id, customizer_url, allow_failed=allow_failed)
-        
+    # Entity Store (by model name) and Customizer (by job id, or by searching jobs for the model)
+    # are queried concurrently; Entity Store wins when both succeed
+    if model_name or job_id:
+        result = race_model_lookups(
+            model_name, job_id, entity_store_url, customizer_url, auto_mode, list_workers, job_index
+        )
         if result.get("success"):
             return result
-        else:
-            print(f"   ⚠️  Job not found or not completed: {result.get('error')}")
-    
-    # If we have model_name but no job_id, try to find job by listing and searching
-    if model_name and not job_id:
-        print(f"\n🔍 Step 2: Searching for job by model name in Customizer...")
-        try:
-            jobs_response = requests.get(
-                f"{customizer_url or CUSTOMIZER_URL}/v1/customization/jobs",
-                timeout=30
-            )
-            if jobs_response.status_code == 200:
-                jobs_data = jobs_response.json()
-                jobs = jobs_data.get('data', [])
-                
-                # Find job with matching output_model
-                for job in jobs:
-                    if job.get('output_model') == model_name and job.get('status') == 'completed':
-                        job_id = job.get('id')
-                        print(f"   ✅ Found completed job: {job_id}")
-                        result = get_model_info_from_customizer_job(job_id, customizer_url)
-                        if result.get("success"):
-                            return result
-        except Exception as e:
-            print(f"   ⚠️  Could not search jobs: {e}")
     
     # If all methods failed
     if not result:
@@ -548,6 +855,31 @@ Examples:
         default=CUSTOMIZER_URL,
         help=f"Customizer URL (default: {CUSTOMIZER_URL})"
     )
+    parser.add_argument(
+        "--list-workers",
+        type=int,
+        default=JOB_LIST_WORKERS,
+        help="Concurrent page requests when listing Customizer jobs "
+             "(default: CUSTOMIZER_LIST_WORKERS or 8)"
+    )
+    parser.add_argument(
+        "--job-index",
+        type=str,
+        default=DEFAULT_JOB_INDEX,
+        help=f"Local SQLite index of Customizer jobs, synced incrementally (default: {DEFAULT_JOB_INDEX})"
+    )
+    parser.add_argument(
+        "--no-job-index",
+        action="store_true",
+        help="List jobs from Customizer on every run instead of using the local job index"
+    )
+    parser.add_argument(
+        "--probe-concurrency",
+        type=int,
+        default=MODEL_PROBE_CONCURRENCY,
+        help="Concurrent Entity Store/DataStore model checks when no job is marked completed "
+             "(default: MODEL_PROBE_CONCURRENCY or 16)"
+    )
     
     args = parser.parse_args()
     
@@ -574,11 +906,11 @@ Examples:
     
     # Check Entity Store
     try:
-        health_response = requests.get(f"{args.entity_store_url}/health", timeout=5)
-        if health_response.status_code == 200:
+        health_status = EntityStoreClient(args.entity_store_url).health()
+        if health_status == 200:
             print("✅ Entity Store is accessible")
         else:
-            print(f"⚠️  Entity Store health check returned: {health_response.status_code}")
+            print(f"⚠️  Entity Store health check returned: {health_status}")
             services_ok = False
     except Exception as e:
         print(f"⚠️  Cannot reach Entity Store at {args.entity_store_url}")
@@ -587,11 +919,11 @@ Examples:
     
     # Check Customizer
     try:
-        health_response = requests.get(f"{args.customizer_url}/v1/health/ready", timeout=5)
-        if health_response.status_code == 200:
+        health_status = CustomizerClient(args.customizer_url).health()
+        if health_status == 200:
             print("✅ Customizer is accessible")
         else:
-            print(f"⚠️  Customizer health check returned: {health_response.status_code}")
+            print(f"⚠️  Customizer health check returned: {health_status}")
             services_ok = False
     except Exception as e:
         print(f"⚠️  Cannot reach Customizer at {args.customizer_url}")
@@ -604,12 +936,16 @@ Examples:
         print(f"   Or set ENTITY_STORE_URL and CUSTOMIZER_URL environment variables")
     
     print("")
+    job_index = None if args.no_job_index else JobIndex(args.customizer_url, args.job_index)
     result = get_model_info(
         model_name=args.model_name,
         job_id=args.job_id,
         entity_store_url=args.entity_store_url,
         customizer_url=args.customizer_url,
-        auto_mode=auto_mode
+        auto_mode=auto_mode,
+        list_workers=max(1, args.list_workers),
+        probe_concurrency=max(1, args.probe_concurrency),
+        job_index=job_index
     )
     
     if result["success"]:
@@ -0,0 +1,783 @@
+#!/usr/bin/env python3
+"""
+Pipelined Batch Export of Customized Models
+
+Runs the four export steps for many models at once:
+
+    resolve   export_model_from_entity_store.py   Entity Store / Customizer lookup
+    download  download_model_from_datastore.py    adapter files from DataStore
+    merge     merge_adapter_with_base.py          LoRA adapter + base model
+    upload    upload_model_to_minio.py            merged model to MinIO
+
+Each stage has its own bounded worker pool, and a model moves to the next
+stage as soon as it finishes the previous one. Downloads and uploads of
+some models therefore overlap with the (CPU and memory bound) merges of
+others, instead of running model after model. Each stage's output is
+printed as one block per model when it finishes.
+
+Usage:
+    python export_pipeline.py <namespace>/model-a@1.0 <namespace>/model-b@1.0 cust-AbC123
+
+    Models (or job IDs, one per line) from a file, streaming merge, bf16 output:
+    python export_pipeline.py --file models.txt --engine streaming --output-dtype bf16
+
+    Per-stage worker limits:
+    python export_pipeline.py --file models.txt --download-workers 4 --merge-workers 1 --upload-workers 2
+
+Arguments containing "/" are model names; anything else is a job ID. Work
+files go to <work-dir>/<model>/ (model_info.json, adapter/, merged/) and
+models are uploaded to <target-prefix>/<model>.
+
+Progress is checkpointed in <work-dir>/<model>/export_state.json (see
+export_state.py). Running the same command again resumes every model at
+its first unfinished stage; --restart redoes everything.
+
+Watch mode keeps running and exports every job as soon as it completes:
+    python export_pipeline.py --watch --watch-interval 30
+
+Job status changes come from the incremental job index sync (see
+job_index.py). Each completed job is claimed in the index before it is
+exported, so it is exported once, also across restarts.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+from functools import partial
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from artifact_cache import DEFAULT_CACHE_DIR, DEFAULT_MERGE_CACHE_DIR, file_sha256
+from export_model_from_entity_store import (
+    CUSTOMIZER_URL,
+    DATASTORE_URL,
+    ENTITY_STORE_URL,
+    JOB_LIST_WORKERS,
+    ThreadOutput,
+    _run_captured,
+    get_model_info,
+    parse_model_name,
+    sync_job_index,
+)
+from download_model_from_datastore import DEFAULT_DOWNLOAD_WORKERS, DOWNLOAD_PROFILES, download_model
+from export_state import STATE_NAME, ExportState
+from job_index import DEFAULT_EXPORT_LEASE, DEFAULT_JOB_INDEX, JobIndex
+from merge_adapter_with_base import (
+    DEFAULT_MAX_SHARD_SIZE,
+    OUTPUT_DTYPES,
+    merge_adapter_with_base,
+    parse_size,
+)
+from model_manifest import build_manifest
+from nemo_client import backoff_delay
+from upload_model_to_minio import (
+    DEFAULT_PART_SIZE_MB,
+    DEFAULT_WORKERS,
+    create_s3_client,
+    get_minio_config,
+    load_remote_manifest,
+    upload_to_minio,
+)
+
+STAGES = ("resolve", "download", "merge", "upload")
+
+# Default models in flight per stage: lookups and transfers are network bound,
+# a merge holds a full base model in memory (transformers engine)
+DEFAULT_STAGE_WORKERS = {"resolve": 4, "download": 2, "merge": 1, "upload": 2}
+
+
+class ModelNames:
+    """Work directory names of the models in a batch, unique across the batch."""
+
+    def __init__(self, taken=()):
+        self.taken = set(taken)
+        self.lock = threading.Lock()
+
+    def claim(self, name):
+        with self.lock:
+            unique, n = name, 1
+            while unique in self.taken:
+                n += 1
+                unique = f"{name}-{n}"
+            self.taken.add(unique)
+            return unique
+
+
+def file_records(directory):
+    """{relative path: {"size", "sha256"}} of a model directory (digests from its model_manifest.json)."""
+    digests, _ = build_manifest(directory)
+    return {rel: {"size": (Path(directory) / rel).stat().st_size, "sha256": sha256}
+            for rel, sha256 in digests.items()}
+
+
+def resolve_stage(model, names, work_dir, entity_store_url, customizer_url, job_index):
+    """Look up the model (by name or job ID) and save its model_info.json."""
+    target = model["target"]
+    is_model_name = "/" in target
+    result = get_model_info(
+        model_name=target if is_model_name else None,
+        job_id=None if is_model_name else target,
+        entity_store_url=entity_store_url,
+        customizer_url=customizer_url,
+        job_index=job_index
+    )
+    if not result.get("success"):
+        return result
+    if not result.get("files_url"):
+        return {"success": False, "error": "No files_url for model"}
+
+    if "work_dir" not in model:
+        _, model_name_only, _ = parse_model_name(result.get("model_name") or target)
+        model["name"] = names.claim(model_name_only)
+        model["work_dir"] = Path(work_dir) / model["name"]
+    model["files_url"] = result["files_url"]
+    model["work_dir"].mkdir(parents=True, exist_ok=True)
+    info_path = model["work_dir"] / "model_info.json"
+    with open(info_path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"   Saved: {info_path}")
+    if model.get("state") is None:
+        model["state"] = ExportState(model["work_dir"] / STATE_NAME, target)
+    return {"success": True, "record": {
+        "name": model["name"], "files_url": model["files_url"], "dir": str(model["work_dir"]),
+        "files": {"model_info.json": {"size": info_path.stat().st_size, "sha256": file_sha256(info_path)}}
+    }}
+
+
+def download_stage(model, datastore_url, workers, cache_dir, profile):
+    """Download the model's files from DataStore into <work dir>/adapter."""
+    model["adapter_dir"] = model["work_dir"] / "adapter"
+    downloaded = download_model(
+        model["files_url"], str(model["adapter_dir"]), datastore_url, model_name=model["target"],
+        workers=workers, cache_dir=cache_dir, profile=profile
+    )
+    if not downloaded:
+        return {"success": False, "error": "Download failed or incomplete"}
+    return {"success": True, "record": {"dir": str(model["adapter_dir"]), "files": file_records(model["adapter_dir"])}}
+
+
+def merge_options(base_model, engine, output_dtype, max_shard_size):
+    """Merge settings recorded with the merge stage; a completed merge is redone when they change."""
+    return {"base_model": base_model, "engine": engine, "output_dtype": output_dtype, "max_shard_size": max_shard_size}
+
+
+def merge_stage(model, base_model, hf_token, engine, workers, cache_dir, merge_cache_dir, output_dtype,
+                max_shard_size):
+    """Merge the adapter with the base model into <work dir>/merged (full models are passed through)."""
+    if not (model["adapter_dir"] / "adapter_config.json").exists():
+        print(f"ℹ️  {model['adapter_dir']} is not a LoRA adapter; uploading the downloaded files as they are")
+        model["upload_dir"] = model["adapter_dir"]
+    else:
+        model["upload_dir"] = model["work_dir"] / "merged"
+        merged = merge_adapter_with_base(
+            str(model["adapter_dir"]), base_model, str(model["upload_dir"]), hf_token, cache_dir=cache_dir,
+            engine=engine, workers=workers, merge_cache_dir=merge_cache_dir, output_dtype=output_dtype,
+            max_shard_size=max_shard_size
+        )
+        if not merged:
+            return {"success": False, "error": "Merge failed"}
+    return {"success": True, "record": {
+        "dir": str(model["upload_dir"]), "files": file_records(model["upload_dir"]),
+        "options": merge_options(base_model, engine, output_dtype, max_shard_size)
+    }}
+
+
+def uploaded_keys(minio_config, target_path):
+    """Keys under target_path recorded in its upload manifest, with their sha256 and ETag."""
+    s3_client = create_s3_client(minio_config)
+    if s3_client is None:
+        return {}
+    files = load_remote_manifest(s3_client, minio_config["bucket"], target_path)
+    return {f"{target_path}/{rel}": entry for rel, entry in sorted(files.items())}
+
+
+def upload_stage(model, minio_config, target_prefix, workers, part_size_mb):
+    """Upload the merged model to <target prefix>/<model> (only changed files)."""
+    model["target_path"] = f"{target_prefix.rstrip('/')}/{model['name']}"
+    uploaded = upload_to_minio(
+        str(model["upload_dir"]), model["target_path"], minio_config, workers=workers,
+        part_size_mb=part_size_mb, sync=True
+    )
+    # Keys already uploaded are recorded on failure too; the next run's sync skips them
+    record = {"target_path": model["target_path"], "bucket": minio_config["bucket"],
+              "keys": uploaded_keys(minio_config, model["target_path"]),
+              "options": {"target_prefix": target_prefix, "bucket": minio_config["bucket"]}}
+    if not uploaded:
+        return {"success": False, "error": "Upload failed or incomplete", "record": record}
+    return {"success": True, "record": record}
+
+
+def checkpointed(name, function):
+    """Wrap a stage so its start and outcome (with the stage's record) are saved to the model's export state."""
+    def run(model):
+        if model.get("state") is not None:
+            model["state"].start(name)
+        try:
+            result = function(model)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        state = model.get("state")
+        if state is not None:
+            if result.get("success"):
+                state.complete(name, result.get("record"))
+            else:
+                state.fail(name, result.get("error") or f"{name} failed", result.get("record"))
+        return result
+    return run
+
+
+def restore_model(target, state, stage_names, options):
+    """
+    Model entry for a target with a saved export state, starting at the
+    first stage still to do (options: {stage: settings} that must match).
+    """
+    model = {"target": target, "state": state, "work_dir": state.work_dir,
+             "name": state.stage("resolve").get("name", state.work_dir.name),
+             "files_url": state.stage("resolve").get("files_url")}
+    if state.stage("download").get("dir"):
+        model["adapter_dir"] = Path(state.stage("download")["dir"])
+    if state.stage("merge").get("dir"):
+        model["upload_dir"] = Path(state.stage("merge")["dir"])
+    if state.stage("upload").get("target_path"):
+        model["target_path"] = state.stage("upload")["target_path"]
+    model["resume"] = state.resume_point(stage_names, options)
+    state.save()
+    return model
+
+
+def run_pipeline(models, stages, on_finished=None):
+    """
+    Run models through stages [(name, function(model) -> {"success", "error"}, workers)].
+
+    Every stage has its own thread pool of `workers` threads; a model is
+    submitted to the next stage as soon as its current stage succeeds.
+    A model starts at stage model["resume"] (default 0). Stage output is
+    buffered per thread and printed from the calling thread when the stage
+    finishes. Each model gets "status" ("done" or "<stage> failed"),
+    "error" and "timings" (seconds per stage); on_finished(model) is called
+    as soon as a model has its status.
+    """
+    if not isinstance(sys.stdout, ThreadOutput):
+        sys.stdout = ThreadOutput(sys.stdout)
+    executors = [ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name) for name, _, workers in stages]
+    finished = queue.Queue()
+
+    def submit(stage, model):
+        future = executors[stage].submit(_run_captured, stages[stage][1], model)
+        future.add_done_callback(lambda f: finished.put((stage, model, f.result())))
+
+    try:
+        remaining = 0
+        for model in models:
+            model["timings"] = {}
+            resume = model.get("resume", 0)
+            if resume >= len(stages):
+                model["status"] = "done"
+                print(f"\n⏭️  {model['name']}: all stages completed in an earlier run")
+                if on_finished:
+                    on_finished(model)
+                continue
+            if resume:
+                print(f"\n⏭️  {model['name']}: resuming at {stages[resume][0]} "
+                      f"({', '.join(name for name, _, _ in stages[:resume])} completed in an earlier run)")
+            submit(resume, model)
+            remaining += 1
+        while remaining:
+            stage, model, (result, text, seconds) = finished.get()
+            name = stages[stage][0]
+            model["timings"][name] = seconds
+            ok = bool(result and result.get("success"))
+            print(f"\n── {model.get('name', model['target'])}: {name} "
+                  f"{'✅' if ok else '❌'} ({seconds:.1f}s)")
+            print(text, end="")
+            if ok and stage + 1 < len(stages):
+                submit(stage + 1, model)
+                continue
+            if ok:
+                model["status"] = "done"
+            else:
+                model["status"] = f"{name} failed"
+                model["error"] = (result or {}).get("error")
+            remaining -= 1
+            if on_finished:
+                on_finished(model)
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+    return models
+
+
+def export_batch(targets, stages, work_dir, options, restart=False, on_finished=None):
+    """
+    Export targets through the pipeline, each resuming from its checkpoint
+    in work_dir (restart: ignore checkpoints). on_finished is passed to
+    run_pipeline(). Returns the model entries.
+    """
+    states = ExportState.scan(work_dir)
+    stage_names = [name for name, _, _ in stages]
+    models = []
+    for target in targets:
+        state = states.get(target)
+        if state is None:
+            models.append({"target": target})
+            continue
+        if restart:
+            state.data["stages"] = {}
+        models.append(restore_model(target, state, stage_names, options))
+    started = time.monotonic()
+    models = run_pipeline(models, stages, on_finished)
+    print_summary(models, stage_names, time.monotonic() - started)
+    return models
+
+
+def record_exports(job_index, outcome, owner=None):
+    """Store the outcome of claimed exports ({job_id: model entry}) in the job index (only owner's claims)."""
+    for job_id, model in outcome.items():
+        if model.get("status") == "done":
+            recorded = job_index.finish_export(job_id, "exported", owner=owner)
+        else:
+            recorded = job_index.finish_export(
+                job_id, "failed", f"{model.get('status')}: {model.get('error') or ''}".strip(": "), owner=owner
+            )
+        if not recorded:
+            print(f"   ⚠️  {job_id}: claim was taken over by another watcher; outcome not recorded")
+
+
+def start_heartbeat(job_index, owner, lease):
+    """Daemon thread that renews owner's export leases every lease / 3 seconds."""
+    def run():
+        while True:
+            time.sleep(lease / 3)
+            try:
+                job_index.renew_export_leases(owner, lease)
+            except Exception as e:
+                print(f"   ⚠️  Could not renew export leases: {e}")
+
+    threading.Thread(target=run, name="export-heartbeat", daemon=True).start()
+
+
+def start_exporter(job_index, export, owner=None):
+    """
+    Background thread that exports the batches of claimed job IDs put on the
+    returned queue, one export after another (batches queued meanwhile are
+    exported together): export(job_ids, on_finished) with on_finished(model)
+    recording each job's outcome as soon as it has one. Jobs an export
+    never reported (it raised) are recorded as failed.
+    """
+    batches = queue.Queue()
+
+    def run():
+        while True:
+            job_ids = list(batches.get())
+            while not batches.empty():
+                job_ids += batches.get_nowait()
+            recorded = set()
+
+            def on_finished(model):
+                record_exports(job_index, {model["target"]: model}, owner)
+                recorded.add(model["target"])
+            try:
+                export(job_ids, on_finished)
+            except Exception as e:
+                print(f"   ❌ Export of {', '.join(job_ids)} failed: {e}")
+            for job_id in job_ids:
+                if job_id not in recorded:
+                    record_exports(job_index, {job_id: {"status": "export failed", "error": "not reported"}}, owner)
+
+    threading.Thread(target=run, name="exporter", daemon=True).start()
+    return batches
+
+
+def watch_jobs(job_index, customizer_url, list_workers, interval, max_attempts, backfill, export,
+               lease=DEFAULT_EXPORT_LEASE):
+    """
+    Poll Customizer every `interval` seconds and export each job that
+    reaches `completed`, once: export(job_ids, on_finished) calls
+    on_finished(model entry) for each job as it finishes.
+
+    Job status changes are picked up by the incremental (and conditional)
+    job index sync. Jobs are claimed in the job index before they are
+    exported, under this watcher's owner ID (host:pid) and a lease that a
+    heartbeat renews, so restarts and concurrent watchers never export a
+    job twice. Claims whose lease expired (their watcher stopped) are
+    taken over at startup and on every poll and resumed (their pipeline
+    checkpoints skip the work already done). Exports run on a
+    background thread, so polling and claiming go on while a batch is
+    being exported, and each job's outcome is recorded as soon as it is
+    known. Failed exports are retried on later polls until max_attempts.
+    Without backfill, jobs that were already completed when the first
+    watch started are skipped.
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    batches = start_exporter(job_index, export, owner)
+    start_heartbeat(job_index, owner, lease)
+    baseline = not backfill and not job_index.exports()
+
+    print(f"\n👀 Watching {customizer_url} for completed jobs (every {interval}s, Ctrl-C to stop)")
+    print(f"   Watcher: {owner}, export lease {lease:.0f}s")
+    failures = 0
+    while True:
+        abandoned = job_index.take_over_exports(owner, lease)
+        if abandoned:
+            print(f"\n🔁 Resuming {len(abandoned)} export(s) whose watcher stopped: {', '.join(abandoned)}")
+            batches.put(abandoned)
+
+        try:
+            sync_job_index(job_index, customizer_url, list_workers)
+            failures = 0
+        except Exception as e:
+            failures += 1
+            delay = backoff_delay(failures, base=interval / 2, cap=max(interval, 300))
+            print(f"   ⚠️  Could not sync jobs ({str(e)[:80]}); retrying in {delay:.0f}s")
+            time.sleep(delay)
+            continue
+
+        if baseline:
+            skipped = job_index.unexported("completed", max_attempts)
+            for job in skipped:
+                job_index.finish_export(job["id"], "skipped")
+            print(f"   ⏭️  {len(skipped)} job(s) were already completed; not exporting them "
+                  f"(use --backfill to export them)")
+            baseline = False
+
+        claimed = [job["id"] for job in job_index.unexported("completed", max_attempts)
+                   if job_index.claim_export(job["id"], max_attempts, owner, lease)]
+        if claimed:
+            print(f"\n🚀 {len(claimed)} job(s) completed: {', '.join(claimed)}")
+            batches.put(claimed)
+        time.sleep(interval)
+
+
+def print_summary(models, stage_names, elapsed):
+    done = [m for m in models if m.get("status") == "done"]
+    serial = sum(sum(m["timings"].values()) for m in models)
+    print()
+    print("=" * 70)
+    print(f"{'✅' if len(done) == len(models) else '⚠️ '} Pipeline: {len(done)}/{len(models)} model(s) exported "
+          f"in {elapsed:.1f}s (stages one model at a time: {serial:.1f}s)")
+    print("=" * 70)
+    for model in models:
+        timings = ", ".join(f"{stage} {model['timings'][stage]:.1f}s"
+                            for stage in stage_names if stage in model["timings"])
+        destination = model.get("target_path") or model.get("upload_dir") or ""
+        if model.get("status") == "done":
+            print(f"   ✅ {model['target']} -> {destination}")
+        else:
+            print(f"   ❌ {model['target']}: {model.get('status')}"
+                  f"{': ' + str(model['error']) if model.get('error') else ''}")
+        print(f"      {timings or 'completed in an earlier run'}")
+
+
+def read_targets(args):
+    """Model names and job IDs from the command line and --file (blank lines and # comments skipped)."""
+    targets = list(args.models)
+    if args.file:
+        with open(args.file) as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    targets.append(line)
+    # Keep the first occurrence of each target
+    return list(dict.fromkeys(targets))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export several customized models through a resolve → download → merge → upload pipeline"
+    )
+    parser.add_argument(
+        "models",
+        nargs="*",
+        help="Model names (<namespace>/<model>@<version>) or Customizer job IDs"
+    )
+    parser.add_argument(
+        "--file",
+        type=str,
+        help="File with one model name or job ID per line (# comments allowed)"
+    )
+    parser.add_argument(
+        "--work-dir",
+        type=str,
+        default="./export_pipeline",
+        help="Directory for per-model model_info.json, adapter/ and merged/ (default: ./export_pipeline)"
+    )
+    parser.add_argument(
+        "--target-prefix",
+        type=str,
+        default="models",
+        help="MinIO prefix; each model is uploaded to <prefix>/<model name> (default: models)"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and export every Customizer job as soon as it completes (each job once)"
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=float(os.getenv("EXPORT_WATCH_INTERVAL", "30")),
+        help="Seconds between job status polls in watch mode (default: EXPORT_WATCH_INTERVAL or 30)"
+    )
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="With --watch, also export jobs that had completed before the first watch started"
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="With --watch, export attempts per job before it is left as failed (default: 3)"
+    )
+    parser.add_argument(
+        "--list-workers",
+        type=int,
+        default=JOB_LIST_WORKERS,
+        help="Concurrent page requests when Customizer jobs are listed in full (default: CUSTOMIZER_LIST_WORKERS or 8)"
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help=f"Ignore the {STATE_NAME} checkpoints of earlier runs and redo every stage"
+    )
+    parser.add_argument(
+        "--no-upload",
+        action="store_true",
+        help="Stop after the merge stage (no MinIO configuration needed)"
+    )
+    parser.add_argument(
+        "--base-model",
+        type=str,
+        default="meta-llama/Llama-3.2-1B-Instruct",
+        help="Base model identifier (HuggingFace model ID or local path). Default: meta-llama/Llama-3.2-1B-Instruct"
+    )
+    parser.add_argument(
+        "--hf-token",
+        type=str,
+        help="HuggingFace token (for gated models). Can also set HF_TOKEN environment variable"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["transformers", "streaming"],
+        default="transformers",
+        help="Merge engine (see merge_adapter_with_base.py). Default: transformers"
+    )
+    parser.add_argument(
+        "--output-dtype",
+        choices=sorted(OUTPUT_DTYPES),
+        default="auto",
+        help="Dtype of the merged weights: bf16, fp16, fp32 or auto (same as the base model). Default: auto"
+    )
+    parser.add_argument(
+        "--max-shard-size",
+        type=str,
+        default=DEFAULT_MAX_SHARD_SIZE,
+        help="Maximum safetensors shard size of merged models; 0 keeps the base layout "
+             "(default: MERGE_MAX_SHARD_SIZE or 2GB)"
+    )
+    for stage in STAGES:
+        parser.add_argument(
+            f"--{stage}-workers",
+            type=int,
+            default=DEFAULT_STAGE_WORKERS[stage],
+            help=f"Models in the {stage} stage at the same time (default: {DEFAULT_STAGE_WORKERS[stage]})"
+        )
+    parser.add_argument(
+        "--download-threads",
+        type=int,
+        default=DEFAULT_DOWNLOAD_WORKERS,
+        help=f"Parallel range requests per download (default: {DEFAULT_DOWNLOAD_WORKERS})"
+    )
+    parser.add_argument(
+        "--merge-threads",
+        type=int,
+        default=int(os.getenv("MERGE_WORKERS", str(min(8, os.cpu_count() or 1)))),
+        help="Worker processes per merge with --engine streaming (default: MERGE_WORKERS or min(8, CPU count))"
+    )
+    parser.add_argument(
+        "--upload-threads",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Files (and parts per file) uploaded in parallel per model (default: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--part-size-mb",
+        type=int,
+        default=DEFAULT_PART_SIZE_MB,
+        help=f"Multipart part size in MB (default: {DEFAULT_PART_SIZE_MB})"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["auto"] + list(DOWNLOAD_PROFILES),
+        default="auto",
+        help="Files to download (see download_model_from_datastore.py). Default: auto"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Content-addressed artifact cache shared across exports (default: {DEFAULT_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the artifact cache or the merge result cache"
+    )
+    parser.add_argument(
+        "--entity-store-url",
+        type=str,
+        default=ENTITY_STORE_URL,
+        help=f"Entity Store URL (default: {ENTITY_STORE_URL})"
+    )
+    parser.add_argument(
+        "--customizer-url",
+        type=str,
+        default=CUSTOMIZER_URL,
+        help=f"Customizer URL (default: {CUSTOMIZER_URL})"
+    )
+    parser.add_argument(
+        "--datastore-url",
+        type=str,
+        default=DATASTORE_URL,
+        help=f"DataStore URL (default: {DATASTORE_URL})"
+    )
+    parser.add_argument(
+        "--job-index",
+        type=str,
+        default=DEFAULT_JOB_INDEX,
+        help=f"Local SQLite index of Customizer jobs (default: {DEFAULT_JOB_INDEX})"
+    )
+    parser.add_argument(
+        "--no-job-index",
+        action="store_true",
+        help="List jobs from Customizer instead of using the local job index"
+    )
+    parser.add_argument(
+        "--minio-endpoint",
+        type=str,
+        help="MinIO endpoint URL (overrides secret; MINIO_ENDPOINT env also works)"
+    )
+    parser.add_argument(
+        "--minio-bucket",
+        type=str,
+        help="MinIO bucket name (overrides secret)"
+    )
+    parser.add_argument(
+        "--minio-access-key",
+        type=str,
+        help="MinIO access key (overrides secret)"
+    )
+    parser.add_argument(
+        "--minio-secret-key",
+        type=str,
+        help="MinIO secret key (overrides secret)"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        targets = read_targets(args)
+    except OSError as e:
+        print(f"❌ Error reading {args.file}: {e}")
+        return 1
+    if args.watch and targets:
+        print("❌ Error: --watch finds jobs itself; do not pass model names or --file")
+        return 1
+    if args.watch and args.no_job_index:
+        print("❌ Error: --watch needs the job index (drop --no-job-index)")
+        return 1
+    if not targets and not args.watch:
+        print("❌ Error: No models given (pass model names / job IDs or --file, or use --watch)")
+        return 1
+    if args.watch_interval <= 0 or args.max_attempts < 1:
+        print("❌ Error: --watch-interval must be positive and --max-attempts at least 1")
+        return 1
+    try:
+        max_shard_size = parse_size(args.max_shard_size)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return 1
+    stage_workers = {stage: getattr(args, f"{stage}_workers") for stage in STAGES}
+    if min(stage_workers.values()) < 1 or min(args.download_threads, args.merge_threads, args.upload_threads) < 1:
+        print("❌ Error: worker and thread counts must be at least 1")
+        return 1
+    if args.part_size_mb < 5:
+        print("❌ Error: --part-size-mb must be at least 5 (S3 minimum part size)")
+        return 1
+
+    minio_config = None
+    if not args.no_upload:
+        if args.minio_endpoint and args.minio_bucket and args.minio_access_key and args.minio_secret_key:
+            minio_config = {
+                "endpoint": args.minio_endpoint,
+                "bucket": args.minio_bucket,
+                "access_key": args.minio_access_key,
+                "secret_key": args.minio_secret_key
+            }
+        else:
+            minio_config = get_minio_config()
+            if not minio_config:
+                print("❌ Error: Could not get MinIO configuration")
+                print("   Use --minio-endpoint, --minio-bucket, --minio-access-key, --minio-secret-key, "
+                      "or --no-upload")
+                return 1
+            override = args.minio_endpoint or os.getenv("MINIO_ENDPOINT")
+            if override:
+                minio_config = {**minio_config, "endpoint": override}
+
+    hf_token = args.hf_token or os.getenv("HF_TOKEN")
+    cache_dir = None if args.no_cache else args.cache_dir
+    job_index = None if args.no_job_index else JobIndex(args.customizer_url, args.job_index)
+    taken = [state.work_dir.name for state in ExportState.scan(args.work_dir).values()]
+    stages = [
+        ("resolve", partial(resolve_stage, names=ModelNames(taken),
+                            work_dir=args.work_dir,
+                            entity_store_url=args.entity_store_url, customizer_url=args.customizer_url,
+                            job_index=job_index)),
+        ("download", partial(download_stage, datastore_url=args.datastore_url, workers=args.download_threads,
+                             cache_dir=cache_dir, profile=args.profile)),
+        ("merge", partial(merge_stage, base_model=args.base_model, hf_token=hf_token, engine=args.engine,
+                          workers=args.merge_threads, cache_dir=cache_dir,
+                          merge_cache_dir=None if args.no_cache else DEFAULT_MERGE_CACHE_DIR,
+                          output_dtype=OUTPUT_DTYPES[args.output_dtype], max_shard_size=max_shard_size)),
+    ]
+    if not args.no_upload:
+        stages.append(("upload", partial(upload_stage, minio_config=minio_config, target_prefix=args.target_prefix,
+                                         workers=args.upload_threads, part_size_mb=args.part_size_mb)))
+    stages = [(name, checkpointed(name, function), stage_workers[name]) for name, function in stages]
+    stage_names = [name for name, _, _ in stages]
+    options = {
+        "merge": merge_options(args.base_model, args.engine, OUTPUT_DTYPES[args.output_dtype], max_shard_size),
+        "upload": {"target_prefix": args.target_prefix, "bucket": minio_config and minio_config["bucket"]}
+    }
+
+    print("=" * 70)
+    print("Pipelined Batch Export")
+    print("=" * 70)
+    print(f"Models: {'completed jobs (watch mode)' if args.watch else len(targets)}")
+    print(f"Stages: {' → '.join(f'{name} ({workers})' for name, _, workers in stages)}")
+    print(f"Work directory: {args.work_dir}")
+    if minio_config:
+        print(f"MinIO: {minio_config['endpoint']} / {minio_config['bucket']}/{args.target_prefix.rstrip('/')}/")
+
+    if args.watch:
+        def export(job_ids, on_finished):
+            export_batch(job_ids, stages, args.work_dir, options, on_finished=on_finished)
+        try:
+            watch_jobs(job_index, args.customizer_url, args.list_workers, args.watch_interval,
+                       args.max_attempts, args.backfill, export)
+        except KeyboardInterrupt:
+            print("\n👋 Watch stopped; exports in progress resume on the next start")
+        return 0
+
+    models = export_batch(targets, stages, args.work_dir, options, args.restart)
+    return 0 if all(model.get("status") == "done" for model in models) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Checkpointed Export State
+
+export_pipeline.py keeps one export_state.json per model next to the
+model's model_info.json. It records which stages (resolve, download,
+merge, upload) have completed, the files each stage produced (size and
+sha256), the MinIO keys written by the upload, and the last error.
+
+A re-run of the pipeline with the same --work-dir skips every completed
+stage whose files are still on disk with the recorded sizes, and restarts
+the first stage that is incomplete. Work inside a stage resumes through
+the scripts' own mechanisms: range-request chunks for downloads, the
+merge result cache for merges and the upload manifest (--sync) for
+uploads.
+
+Usage:
+    python export_state.py ./export_pipeline     # show the state of every model in a work directory
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+STATE_NAME = "export_state.json"
+
+
+def utc_now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def missing_files(directory, files):
+    """Files of a stage record ({relative path: {"size", ...}}) that are gone or have another size."""
+    missing = []
+    for rel, entry in files.items():
+        try:
+            if (Path(directory) / rel).stat().st_size != entry.get("size"):
+                missing.append(rel)
+        except OSError:
+            missing.append(rel)
+    return missing
+
+
+class ExportState:
+    """
+    Progress of one model's export, saved to <work dir>/export_state.json
+    after every change (atomic replace, so an interrupted run never leaves
+    a truncated file).
+    """
+
+    def __init__(self, path, target=None):
+        self.path = Path(path)
+        try:
+            self.data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.data = {"version": 1, "target": target, "created_at": utc_now(), "stages": {}}
+
+    @classmethod
+    def scan(cls, work_dir):
+        """Existing states under work_dir, by target (model name or job ID)."""
+        states = {}
+        for path in sorted(Path(work_dir).glob(f"*/{STATE_NAME}")):
+            state = cls(path)
+            if state.target:
+                states[state.target] = state
+        return states
+
+    @property
+    def target(self):
+        return self.data.get("target")
+
+    @property
+    def work_dir(self):
+        return self.path.parent
+
+    def stage(self, name):
+        return self.data["stages"].get(name, {})
+
+    def completed(self, name):
+        return self.stage(name).get("status") == "completed"
+
+    def save(self):
+        self.data["updated_at"] = utc_now()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.data, indent=2))
+        os.replace(tmp, self.path)
+
+    def start(self, name):
+        record = self.stage(name)
+        self.data["stages"][name] = {
+            **{k: v for k, v in record.items() if k not in ("error", "completed_at")},
+            "status": "running",
+            "attempts": record.get("attempts", 0) + 1,
+            "started_at": utc_now()
+        }
+        self.save()
+
+    def complete(self, name, record=None):
+        self.data["stages"][name] = {
+            **self.stage(name), **(record or {}), "status": "completed", "completed_at": utc_now()
+        }
+        self.data["stages"][name].pop("error", None)
+        self.save()
+
+    def fail(self, name, error, record=None):
+        self.data["stages"][name] = {**self.stage(name), **(record or {}), "status": "failed", "error": error}
+        self.save()
+
+    def resume_point(self, stage_names, options=None):
+        """
+        Index of the first stage that has to run: the first one not
+        completed, whose recorded files are no longer intact, or whose
+        recorded "options" differ from options[stage]. Later stages are
+        marked stale, since they were built from its output.
+        """
+        options = options or {}
+        for index, name in enumerate(stage_names):
+            record = self.stage(name)
+            if record.get("status") == "completed":
+                directory = record.get("dir")
+                if name in options and record.get("options") != options[name]:
+                    print(f"   ⚠️  {self.target}: {name} settings changed; redoing it")
+                elif not directory or not missing_files(directory, record.get("files", {})):
+                    continue
+                else:
+                    print(f"   ⚠️  {self.target}: {name} output changed on disk; redoing it")
+            for later in stage_names[index + 1:]:
+                if later in self.data["stages"]:
+                    self.data["stages"][later]["status"] = "stale"
+            return index
+        return len(stage_names)
+
+    def summary(self, stage_names):
+        """One line per stage: name, status, attempts and error."""
+        lines = []
+        for name in stage_names:
+            record = self.stage(name)
+            status = record.get("status", "pending")
+            detail = f", {record['attempts']} attempt(s)" if record.get("attempts") else ""
+            if record.get("files"):
+                detail += f", {len(record['files'])} file(s)"
+            if record.get("keys"):
+                detail += f", {len(record['keys'])} key(s) under {record.get('target_path')}"
+            if record.get("error"):
+                detail += f": {record['error']}"
+            lines.append(f"{name}: {status}{detail}")
+        return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show checkpointed export state of a pipeline work directory")
+    parser.add_argument(
+        "work_dir",
+        nargs="?",
+        default="./export_pipeline",
+        help="Pipeline work directory (default: ./export_pipeline)"
+    )
+    args = parser.parse_args()
+
+    states = ExportState.scan(args.work_dir)
+    if not states:
+        print(f"❌ No {STATE_NAME} found under {args.work_dir}")
+        return 1
+    for target, state in states.items():
+        done = all(state.completed(name) for name in state.data["stages"]) and state.data["stages"]
+        print(f"{'✅' if done else '⏸️ '} {target} ({state.work_dir})")
+        for line in state.summary(list(state.data["stages"])):
+            print(f"   {line}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Local SQLite Index of Customizer Jobs
+
+export_model_from_entity_store.py keeps one row per customization job (id,
+status, output_model, created_at, resolved files_url and the raw job JSON)
+so "latest completed job", "job for model X" and "jobs by status" are
+answered with indexed queries instead of re-listing the whole job history.
+
+Each run syncs incrementally: jobs are requested newest first and paging
+stops at the newest job already indexed, or at the oldest job that was
+still unfinished at the last sync, whichever is older (so status changes
+of running jobs are picked up too). Servers that ignore the sort parameter
+are listed in full. Rows are kept per Customizer URL. When Customizer
+sends an ETag for the first page, the next sync asks for it conditionally
+and stops at "304 Not Modified" if everything since the horizon is on that
+page.
+
+The exports table records which completed jobs the watch mode of
+export_pipeline.py has handed to the export pipeline. A job is claimed
+with one atomic statement that also records the claiming watcher (owner)
+and a lease; the owner renews the lease while it is alive. Another
+watcher only takes over a claim whose lease has expired, so each job is
+exported once, also across restarts and concurrent watchers.
+
+Usage:
+    python job_index.py stats
+    python job_index.py latest                      # latest completed job
+    python job_index.py model "<namespace>/<model>@<version>"
+    python job_index.py status running
+    python job_index.py exports                     # jobs handed to the export pipeline
+    python job_index.py clear                       # forget all jobs (next run re-lists)
+
+Environment:
+    NEMO_JOB_INDEX          index file (default: ~/.cache/nemo-customizer-test/jobs.sqlite3)
+    EXPORT_LEASE_SECONDS    how long an export claim stays valid without renewal (default: 300)
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_JOB_INDEX = os.getenv(
+    "NEMO_JOB_INDEX",
+    str(Path.home() / ".cache" / "nemo-customizer-test" / "jobs.sqlite3")
+)
+
+# Jobs in these states no longer change
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# Seconds an export claim is valid unless its owner renews it
+DEFAULT_EXPORT_LEASE = float(os.getenv("EXPORT_LEASE_SECONDS", "300"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    source TEXT NOT NULL,
+    id TEXT NOT NULL,
+    status TEXT,
+    output_model TEXT,
+    created_at REAL,
+    files_url TEXT,
+    details TEXT NOT NULL,
+    PRIMARY KEY (source, id)
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (source, status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_by_model ON jobs (source, output_model, created_at);
+CREATE INDEX IF NOT EXISTS jobs_by_created ON jobs (source, created_at);
+CREATE TABLE IF NOT EXISTS syncs (
+    source TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    mode TEXT NOT NULL,
+    fetched INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS first_page (
+    source TEXT PRIMARY KEY,
+    etag TEXT NOT NULL,
+    oldest_created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS exports (
+    source TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    claimed_at REAL NOT NULL,
+    finished_at REAL,
+    error TEXT,
+    owner TEXT,
+    lease_until REAL,
+    PRIMARY KEY (source, job_id)
+);
+"""
+
+# Columns added to existing tables since the first schema
+MIGRATIONS = [
+    ("exports", "owner", "TEXT"),
+    ("exports", "lease_until", "REAL"),
+]
+
+
+def created_timestamp(job):
+    """A job's creation time as a Unix timestamp, or None."""
+    created_at = job.get('created_at') or job.get('createdAt') or job.get('start_time')
+    if created_at:
+        try:
+            if isinstance(created_at, str):
+                return datetime.fromisoformat(created_at.replace('Z', '+00:00')).timestamp()
+            return float(created_at)
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+class JobIndex:
+    """
+    Customizer jobs of one Customizer instance (source URL) in a local SQLite
+    database. The connection is shared by threads; a lock serializes access.
+    """
+
+    def __init__(self, source, path=DEFAULT_JOB_INDEX):
+        self.source = source.rstrip("/")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        for table, column, kind in MIGRATIONS:
+            if column not in {row["name"] for row in self.db.execute(f"PRAGMA table_info({table})")}:
+                self.db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+        self.lock = threading.RLock()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def upsert(self, jobs, files_url_for=None):
+        """Insert or update jobs (Customizer job dicts). files_url_for(output_model) gives the files_url."""
+        rows = []
+        for job in jobs:
+            if not job.get('id'):
+                continue
+            output_model = job.get('output_model')
+            files_url = files_url_for(output_model) if files_url_for and output_model else None
+            rows.append((self.source, job['id'], job.get('status'), output_model, created_timestamp(job),
+                         files_url, json.dumps(job)))
+        with self.lock, self.db:
+            # A files_url resolved from Entity Store (set_files_url) is kept when the job is refreshed
+            self.db.executemany(
+                "INSERT INTO jobs (source, id, status, output_model, created_at, files_url, details) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source, id) DO UPDATE SET status = excluded.status, "
+                "output_model = excluded.output_model, created_at = excluded.created_at, "
+                "files_url = COALESCE(jobs.files_url, excluded.files_url), details = excluded.details",
+                rows
+            )
+        return len(rows)
+
+    def set_files_url(self, job_id, files_url):
+        """Record the files_url a job's model actually resolved to."""
+        with self.lock, self.db:
+            self.db.execute("UPDATE jobs SET files_url = ? WHERE source = ? AND id = ?",
+                            (files_url, self.source, job_id))
+
+    def sync_horizon(self):
+        """
+        Creation time down to which an incremental sync must re-read jobs:
+        the oldest unfinished job, else the newest job. None if the index is
+        empty or has jobs without a creation time (then a full listing is needed).
+        """
+        with self.lock:
+            return self._sync_horizon()
+
+    def _sync_horizon(self):
+        row = self.db.execute(
+            "SELECT COUNT(*) AS jobs, COUNT(created_at) AS dated, MAX(created_at) AS newest FROM jobs "
+            "WHERE source = ?", (self.source,)
+        ).fetchone()
+        if not row["jobs"] or row["dated"] < row["jobs"]:
+            return None
+        placeholders = ", ".join("?" * len(TERMINAL_STATUSES))
+        unfinished = self.db.execute(
+            f"SELECT MIN(created_at) FROM jobs WHERE source = ? AND "
+            f"(status IS NULL OR status NOT IN ({placeholders}))",
+            (self.source, *TERMINAL_STATUSES)
+        ).fetchone()[0]
+        return min(row["newest"], unfinished) if unfinished is not None else row["newest"]
+
+    def record_sync(self, mode, fetched):
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO syncs (source, synced_at, mode, fetched) VALUES (?, ?, ?, ?)",
+                (self.source, time.time(), mode, fetched)
+            )
+
+    def first_page(self):
+        """(ETag, oldest creation time) of the newest-first first page at the last sync, or (None, None)."""
+        with self.lock:
+            row = self.db.execute("SELECT etag, oldest_created_at FROM first_page WHERE source = ?",
+                                  (self.source,)).fetchone()
+        return (row["etag"], row["oldest_created_at"]) if row else (None, None)
+
+    def set_first_page(self, etag, oldest_created_at):
+        with self.lock, self.db:
+            if etag and oldest_created_at is not None:
+                self.db.execute("INSERT OR REPLACE INTO first_page (source, etag, oldest_created_at) "
+                                "VALUES (?, ?, ?)", (self.source, etag, oldest_created_at))
+            else:
+                self.db.execute("DELETE FROM first_page WHERE source = ?", (self.source,))
+
+    def claim_export(self, job_id, max_attempts=1, owner=None, lease=DEFAULT_EXPORT_LEASE):
+        """
+        Claim a job for export on behalf of owner, valid for lease seconds.
+        True for exactly one caller: the job was never claimed, or its last
+        export failed after fewer than max_attempts attempts.
+        """
+        now = time.time()
+        with self.lock, self.db:
+            cursor = self.db.execute(
+                "INSERT INTO exports (source, job_id, status, attempts, claimed_at, owner, lease_until) "
+                "VALUES (?, ?, 'claimed', 1, ?, ?, ?) "
+                "ON CONFLICT (source, job_id) DO UPDATE SET status = 'claimed', attempts = exports.attempts + 1, "
+                "claimed_at = excluded.claimed_at, finished_at = NULL, error = NULL, "
+                "owner = excluded.owner, lease_until = excluded.lease_until "
+                "WHERE exports.status = 'failed' AND exports.attempts < ?",
+                (self.source, job_id, now, owner, now + lease, max_attempts)
+            )
+            return cursor.rowcount == 1
+
+    def renew_export_leases(self, owner, lease=DEFAULT_EXPORT_LEASE):
+        """Extend the leases of owner's claimed exports. Returns how many were renewed."""
+        with self.lock, self.db:
+            cursor = self.db.execute(
+                "UPDATE exports SET lease_until = ? WHERE source = ? AND owner = ? AND status = 'claimed'",
+                (time.time() + lease, self.source, owner)
+            )
+            return cursor.rowcount
+
+    def take_over_exports(self, owner, lease=DEFAULT_EXPORT_LEASE):
+        """
+        Claim the exports whose owner stopped renewing them (lease expired,
+        or claimed before leases were recorded). Returns their job IDs.
+        """
+        now = time.time()
+        taken = []
+        with self.lock, self.db:
+            rows = self.db.execute(
+                "SELECT job_id, owner FROM exports WHERE source = ? AND status = 'claimed' "
+                "AND (lease_until IS NULL OR lease_until < ?)", (self.source, now)
+            ).fetchall()
+            for row in rows:
+                # Conditional on the owner seen above, so only one watcher takes each claim over
+                cursor = self.db.execute(
+                    "UPDATE exports SET owner = ?, lease_until = ? WHERE source = ? AND job_id = ? "
+                    "AND status = 'claimed' AND owner IS ? AND (lease_until IS NULL OR lease_until < ?)",
+                    (owner, now + lease, self.source, row["job_id"], row["owner"], now)
+                )
+                if cursor.rowcount == 1:
+                    taken.append(row["job_id"])
+        return taken
+
+    def finish_export(self, job_id, status, error=None, owner=None):
+        """
+        Record the outcome of a claimed export ("exported", "failed" or
+        "skipped"). With owner, a claim another watcher has taken over is
+        left alone; returns False in that case.
+        """
+        with self.lock, self.db:
+            cursor = self.db.execute(
+                "INSERT INTO exports (source, job_id, status, attempts, claimed_at, finished_at, error) "
+                "VALUES (?, ?, ?, 0, ?, ?, ?) ON CONFLICT (source, job_id) DO UPDATE SET "
+                "status = excluded.status, finished_at = excluded.finished_at, error = excluded.error, "
+                "lease_until = NULL WHERE ? IS NULL OR exports.owner IS ?",
+                (self.source, job_id, status, time.time(), time.time(), error, owner, owner)
+            )
+            return cursor.rowcount == 1
+
+    def unexported(self, status="completed", max_attempts=1):
+        """Jobs with the given status that were never claimed, or failed with attempts left, oldest first."""
+        return list(reversed(self._jobs(
+            "AND status = ? AND NOT EXISTS (SELECT 1 FROM exports e WHERE e.source = jobs.source "
+            "AND e.job_id = jobs.id AND NOT (e.status = 'failed' AND e.attempts < ?))",
+            (status, max_attempts)
+        )))
+
+    def exports(self, status=None):
+        """Export records (dicts), most recently claimed first."""
+        query = "SELECT * FROM exports WHERE source = ?"
+        params = [self.source]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        with self.lock:
+            rows = self.db.execute(query + " ORDER BY claimed_at DESC", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def _jobs(self, where, params, limit=None):
+        query = f"SELECT details, files_url FROM jobs WHERE source = ? {where} ORDER BY created_at DESC, id DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        jobs = []
+        with self.lock:
+            rows = self.db.execute(query, (self.source, *params)).fetchall()
+        for row in rows:
+            job = json.loads(row["details"])
+            job["files_url"] = job.get("files_url") or row["files_url"]
+            jobs.append(job)
+        return jobs
+
+    def latest(self, status="completed"):
+        """Most recently created job with the given status, or None."""
+        jobs = self._jobs("AND status = ?", (status,), limit=1)
+        return jobs[0] if jobs else None
+
+    def job_for_model(self, output_model, status="completed"):
+        """Most recent job with the given output_model (and status, unless None), or None."""
+        if status is None:
+            jobs = self._jobs("AND output_model = ?", (output_model,), limit=1)
+        else:
+            jobs = self._jobs("AND output_model = ? AND status = ?", (output_model, status), limit=1)
+        return jobs[0] if jobs else None
+
+    def by_status(self, status, limit=None):
+        """Jobs with the given status, newest first."""
+        return self._jobs("AND status = ?", (status,), limit)
+
+    def all_jobs(self):
+        """Every indexed job, newest first."""
+        return self._jobs("", ())
+
+    def stats(self):
+        with self.lock:
+            return self._stats()
+
+    def _stats(self):
+        counts = {
+            row["status"]: row["n"] for row in self.db.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs WHERE source = ? GROUP BY status", (self.source,)
+            )
+        }
+        sync = self.db.execute("SELECT * FROM syncs WHERE source = ?", (self.source,)).fetchone()
+        return {"jobs": sum(counts.values()), "by_status": counts, "last_sync": dict(sync) if sync else None}
+
+    def clear(self):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM jobs WHERE source = ?", (self.source,))
+            self.db.execute("DELETE FROM syncs WHERE source = ?", (self.source,))
+            self.db.execute("DELETE FROM first_page WHERE source = ?", (self.source,))
+
+
+def print_job(job):
+    print(f"   {job.get('id')}  {job.get('status')}  {job.get('created_at')}  {job.get('output_model')}")
+    if job.get("files_url"):
+        print(f"      files_url: {job['files_url']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the local Customizer job index")
+    parser.add_argument(
+        "--index",
+        default=DEFAULT_JOB_INDEX,
+        help=f"Index file (default: {DEFAULT_JOB_INDEX})"
+    )
+    parser.add_argument(
+        "--customizer-url",
+        default=os.getenv("CUSTOMIZER_URL") or os.getenv("CUSTOMIZER_URL_LOCAL", "http://localhost:8003"),
+        help="Customizer instance whose jobs to query (default: CUSTOMIZER_URL or http://localhost:8003)"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show job counts and the last sync")
+    subparsers.add_parser("latest", help="Show the latest completed job")
+    model_parser = subparsers.add_parser("model", help="Show the latest completed job for an output model")
+    model_parser.add_argument("output_model", help="Output model name, e.g. <namespace>/<model>@<version>")
+    status_parser = subparsers.add_parser("status", help="List jobs with a status, newest first")
+    status_parser.add_argument("status", help="Job status, e.g. running, completed, failed")
+    status_parser.add_argument("--limit", type=int, default=20, help="Maximum jobs to list (default: 20)")
+    exports_parser = subparsers.add_parser("exports", help="List jobs handed to the export pipeline by watch mode")
+    exports_parser.add_argument("--status", help="Only exports with this status (claimed, exported, failed, skipped)")
+    subparsers.add_parser("clear", help="Forget all jobs of this Customizer instance (export records are kept)")
+
+    args = parser.parse_args()
+    index = JobIndex(args.customizer_url, args.index)
+    started = time.perf_counter()
+
+    if args.command == "stats":
+        stats = index.stats()
+        print(f"📇 {index.path} ({index.source})")
+        print(f"   Jobs: {stats['jobs']}")
+        for status, count in sorted(stats["by_status"].items(), key=lambda item: str(item[0])):
+            print(f"      {status}: {count}")
+        if stats["last_sync"]:
+            synced = datetime.fromtimestamp(stats["last_sync"]["synced_at"]).isoformat(timespec="seconds")
+            print(f"   Last sync: {synced} ({stats['last_sync']['mode']}, "
+                  f"{stats['last_sync']['fetched']} job(s) fetched)")
+        return 0
+    if args.command == "clear":
+        index.clear()
+        print(f"✅ Cleared jobs of {index.source} from {index.path}")
+        return 0
+
+    if args.command == "exports":
+        exports = index.exports(args.status)
+        print(f"📦 {len(exports)} export record(s) for {index.source}")
+        for export in exports:
+            claimed = datetime.fromtimestamp(export["claimed_at"]).isoformat(timespec="seconds")
+            print(f"   {export['job_id']}  {export['status']}  attempts: {export['attempts']}  claimed: {claimed}"
+                  f"{'  by: ' + export['owner'] if export['owner'] and export['status'] == 'claimed' else ''}"
+                  f"{'  error: ' + export['error'] if export['error'] else ''}")
+        return 0
+
+    if args.command == "latest":
+        jobs = [job for job in [index.latest()] if job]
+    elif args.command == "model":
+        jobs = [job for job in [index.job_for_model(args.output_model)] if job]
+    else:
+        jobs = index.by_status(args.status, args.limit)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if not jobs:
+        print(f"❌ No matching job in the index ({elapsed_ms:.1f} ms)")
+        print("   Run export_model_from_entity_store.py to sync the index")
+        return 1
+    print(f"✅ {len(jobs)} job(s) ({elapsed_ms:.1f} ms)")
+    for job in jobs:
+        print_job(job)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Adaptive Job and Readiness Waiter
+
+Waits for any number of long-running jobs (Customizer, Evaluator,
+LlamaStack post-training) and readiness conditions (NIM has loaded a
+model, a DataStore repo revision is visible) concurrently on one asyncio
+loop, instead of one blocking fixed-interval sleep loop per helper.
+
+- Poll intervals adapt to the age of the wait: the first checks are
+  quick (initial_interval, default 2s), so short jobs and freshly
+  created repos are seen almost at once; after that the interval grows
+  to a fraction of the elapsed time (default 10%) up to max_interval,
+  so a two-hour training job is polled about once a minute. Every sleep
+  is jittered so concurrent waits do not poll in lockstep.
+- All waits on one Waiter share a request budget: a maximum poll rate
+  (requests per second) and optionally a maximum number of polls.
+- A failing poll (connection error, 5xx) is retried with exponential
+  backoff instead of ending the wait; 4xx responses other than 429 end
+  it at once.
+- Progress is reported as event dicts to callbacks. The default callback
+  prints one line per poll.
+
+Usage:
+    from job_waiter import wait_for_job, wait_until, http_poll
+    status = wait_for_job(http_poll(CUSTOMIZER_URL, f"/v1/customization/jobs/{job_id}/status"),
+                          name=job_id, timeout=3600)
+
+    waiter = Waiter(rate=2)
+    for job_id in job_ids:
+        waiter.add(job_id, http_poll(EVALUATOR_URL, f"/v1/evaluation/jobs/{job_id}"), timeout=6000)
+    results = waiter.run()          # or: results = await waiter.wait_all() in a notebook cell
+
+    python job_waiter.py <job-id> [<job-id> ...]                   # wait for Customizer jobs
+    python job_waiter.py --evaluator-url http://localhost:8004 <eval-job-id>
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from nemo_client import NemoClient, NemoHTTPError, backoff_delay
+
+PENDING_STATUSES = {"created", "pending", "running", "scheduled", "in_progress"}
+
+DEFAULT_RATE = float(os.getenv("WAIT_MAX_RATE", "5"))
+DEFAULT_INITIAL_INTERVAL = 2
+DEFAULT_MAX_INTERVAL = 60
+DEFAULT_FRACTION = 0.1
+DEFAULT_MAX_ERRORS = 10
+
+
+class WaitTimeout(RuntimeError):
+    """A wait did not finish within its timeout. .value is the last polled value."""
+
+    def __init__(self, message, value=None):
+        super().__init__(message)
+        self.value = value
+
+
+class BudgetExhausted(RuntimeError):
+    """The Waiter's total request budget was used up before the wait finished."""
+
+
+def status_of(value):
+    """The "status" of a polled job: dict key, attribute, or enum value."""
+    status = value.get("status") if isinstance(value, dict) else getattr(value, "status", None)
+    return getattr(status, "value", status)
+
+
+def progress_of(value):
+    """Progress percentage reported by a job, if any."""
+    if not isinstance(value, dict):
+        return None
+    details = value.get("status_details") or {}
+    for progress in (details.get("progress"), value.get("percentage_done"), value.get("progress")):
+        if progress is not None:
+            return progress
+    return None
+
+
+def job_finished(value):
+    """True once a job has left the created/pending/running states (completed, failed, cancelled, ...)."""
+    status = status_of(value)
+    return status is not None and status not in PENDING_STATUSES
+
+
+def next_interval(elapsed, initial=DEFAULT_INITIAL_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                  fraction=DEFAULT_FRACTION):
+    """Seconds until the next poll of a wait that started `elapsed` seconds ago (jittered by ±20%)."""
+    return min(max_interval, max(initial, elapsed * fraction)) * (0.8 + random.random() * 0.4)
+
+
+def print_progress(event):
+    """Default progress callback: one line per event."""
+    name, elapsed = event["name"], event["elapsed"]
+    if event["event"] == "poll":
+        progress = f" ({event['progress']}%)" if event.get("progress") is not None else ""
+        print(f"⏳ {name}: {event['status']}{progress} after {elapsed:.0f}s; next check in {event['next_in']:.0f}s")
+    elif event["event"] == "done":
+        icon = "✅" if event["status"] in ("completed", "ready") else "❌"
+        print(f"{icon} {name}: {event['status']} after {elapsed:.0f}s ({event['polls']} poll(s))")
+    elif event["event"] == "retry":
+        print(f"⚠️  {name}: poll failed ({str(event['error'])[:120]}), retrying in {event['next_in']:.1f}s")
+    elif event["event"] in ("timeout", "error"):
+        print(f"❌ {name}: {event['error']} after {elapsed:.0f}s")
+
+
+class RequestBudget:
+    """Poll rate (requests per second) and optional total poll count shared by all waits of a Waiter."""
+
+    def __init__(self, rate=DEFAULT_RATE, total=None):
+        self.interval = 1 / rate if rate else 0
+        self.total = total
+        self.used = 0
+        self._next = 0.0
+        self._lock = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.total is not None and self.used >= self.total:
+                raise BudgetExhausted(f"request budget of {self.total} polls used up")
+            now = asyncio.get_running_loop().time()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+            self.used += 1
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def run_sync(coro):
+    """
+    Run a coroutine to completion from synchronous code. Inside a running
+    event loop (a Jupyter cell) it runs on a fresh loop in a worker thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+class Waiter:
+    """
+    Concurrent waits sharing one request budget and one set of progress callbacks.
+
+    rate:         maximum polls per second across all waits (0 = unlimited)
+    max_requests: maximum polls in total (None = unlimited)
+    on_progress:  callable or list of callables receiving event dicts
+                  (default: print_progress; [] for silence)
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, max_requests=None, on_progress=None):
+        self.budget = RequestBudget(rate, max_requests)
+        if on_progress is None:
+            on_progress = [print_progress]
+        self.callbacks = list(on_progress) if isinstance(on_progress, (list, tuple)) else [on_progress]
+        self.waits = {}
+
+    def add(self, name, poll, done=job_finished, timeout=600, initial_interval=DEFAULT_INITIAL_INTERVAL,
+            max_interval=DEFAULT_MAX_INTERVAL, fraction=DEFAULT_FRACTION, max_errors=DEFAULT_MAX_ERRORS):
+        """
+        Register a wait.
+
+        poll: callable (plain or async) returning the current value, e.g. job JSON
+        done: predicate on that value; the wait ends when it is true
+              (default: job_finished, for anything with a "status")
+        max_errors: consecutive failed polls before the wait gives up
+        """
+        self.waits[name] = {
+            "poll": poll,
+            "done": done,
+            "timeout": timeout,
+            "initial_interval": initial_interval,
+            "max_interval": max_interval,
+            "fraction": fraction,
+            "max_errors": max_errors
+        }
+        return self
+
+    def emit(self, event):
+        for callback in self.callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"⚠️  Progress callback failed: {e}")
+
+    async def _poll(self, poll):
+        await self.budget.acquire()
+        if asyncio.iscoroutinefunction(poll):
+            return await poll()
+        return await asyncio.to_thread(poll)
+
+    async def wait_one(self, name, spec):
+        """Poll one registered wait until done, timeout, budget exhaustion or too many errors."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + spec["timeout"]
+        polls = errors = 0
+        value = None
+        while True:
+            event = {"name": name, "polls": polls + 1}
+            try:
+                value = await self._poll(spec["poll"])
+                errors = 0
+            except BudgetExhausted as e:
+                self.emit({**event, "event": "error", "elapsed": loop.time() - start, "error": str(e)})
+                raise
+            except Exception as e:
+                if isinstance(e, NemoHTTPError) and 400 <= e.status_code < 500 and e.status_code != 429:
+                    self.emit({**event, "event": "error", "elapsed": loop.time() - start, "error": str(e)})
+                    raise
+                errors += 1
+                if errors >= spec["max_errors"]:
+                    self.emit({**event, "event": "error", "elapsed": loop.time() - start, "error": str(e)})
+                    raise
+                delay = min(backoff_delay(errors, base=spec["initial_interval"] / 2, cap=spec["max_interval"]),
+                            max(0, deadline - loop.time()))
+                self.emit({**event, "event": "retry", "elapsed": loop.time() - start, "error": str(e),
+                           "next_in": delay})
+            else:
+                polls += 1
+                elapsed = loop.time() - start
+                finished = spec["done"](value)
+                event.update(elapsed=elapsed, value=value, progress=progress_of(value),
+                             status=status_of(value) or ("ready" if finished else "not ready"))
+                if finished:
+                    self.emit({**event, "event": "done"})
+                    return value
+                delay = min(next_interval(elapsed, spec["initial_interval"], spec["max_interval"],
+                                          spec["fraction"]),
+                            max(0, deadline - loop.time()))
+                if loop.time() < deadline:
+                    self.emit({**event, "event": "poll", "next_in": delay})
+            if loop.time() >= deadline:
+                message = f"not finished after {spec['timeout']}s (last status: {status_of(value) or value or 'not ready'})"
+                self.emit({"name": name, "event": "timeout", "polls": polls, "elapsed": loop.time() - start,
+                           "value": value, "error": message})
+                raise WaitTimeout(f"{name} {message}", value)
+            await asyncio.sleep(delay)
+
+    async def wait_all(self, return_exceptions=False):
+        """
+        Run all registered waits concurrently. Returns {name: final value}.
+        Every wait runs to its own end; afterwards the first failure is
+        raised, unless return_exceptions=True puts exceptions in the result.
+        """
+        names = list(self.waits)
+        results = await asyncio.gather(*(self.wait_one(name, self.waits[name]) for name in names),
+                                       return_exceptions=True)
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        return dict(zip(names, results))
+
+    def run(self, return_exceptions=False):
+        """Synchronous wait_all (also usable from a notebook cell)."""
+        return run_sync(self.wait_all(return_exceptions))
+
+
+def wait_for_job(poll, name="job", timeout=3600, on_progress=None, **options):
+    """Wait for one job; returns its last polled value. Options are those of Waiter.add."""
+    return Waiter(on_progress=on_progress).add(name, poll, timeout=timeout, **options).run()[name]
+
+
+def wait_for_jobs(polls, timeout=3600, rate=DEFAULT_RATE, max_requests=None, on_progress=None, **options):
+    """Wait for several jobs ({name: poll}) concurrently; returns {name: last polled value}."""
+    waiter = Waiter(rate=rate, max_requests=max_requests, on_progress=on_progress)
+    for name, poll in polls.items():
+        waiter.add(name, poll, timeout=timeout, **options)
+    return waiter.run()
+
+
+def wait_until(check, name="check", timeout=300, on_progress=None, **options):
+    """Wait until check() returns a truthy value, and return it."""
+    return Waiter(on_progress=on_progress).add(name, check, done=bool, timeout=timeout, **options).run()[name]
+
+
+def http_poll(base_url, path, client=None):
+    """Poll function returning the JSON at base_url + path (through the shared pooled session)."""
+    client = client or NemoClient(base_url, retries=0)
+    return lambda: client.get_json(path)
+
+
+def http_ready(base_url, path, ok=(200,), not_ready=(404, 500, 503), client=None):
+    """
+    Readiness check for wait_until: True when GET base_url + path returns
+    one of `ok`, False for `not_ready` (e.g. a repo whose first commit is
+    still being written); any other status is an error.
+    """
+    client = client or NemoClient(base_url, retries=0)
+
+    def check():
+        response = client.request("GET", path)
+        if response.status_code in ok:
+            return True
+        if response.status_code in not_ready:
+            return False
+        raise NemoHTTPError(response)
+    return check
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wait for NeMo Customizer or Evaluator jobs to finish")
+    parser.add_argument(
+        "job_ids",
+        nargs="+",
+        help="Job IDs to wait for (concurrently)"
+    )
+    parser.add_argument(
+        "--customizer-url",
+        default=os.getenv("CUSTOMIZER_URL") or os.getenv("CUSTOMIZER_URL_LOCAL", "http://localhost:8003"),
+        help="Customizer URL (default: CUSTOMIZER_URL or http://localhost:8003)"
+    )
+    parser.add_argument(
+        "--evaluator-url",
+        default=None,
+        help="Wait for Evaluator jobs at this URL instead of Customizer jobs"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=3600,
+        help="Seconds to wait for each job (default: 3600)"
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=DEFAULT_MAX_INTERVAL,
+        help=f"Longest time between two polls of a job in seconds (default: {DEFAULT_MAX_INTERVAL})"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help=f"Maximum polls per second across all jobs (default: WAIT_MAX_RATE or {DEFAULT_RATE:g})"
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=None,
+        help="Give up after this many polls in total (default: unlimited)"
+    )
+    args = parser.parse_args()
+
+    if args.evaluator_url:
+        polls = {job_id: http_poll(args.evaluator_url, f"/v1/evaluation/jobs/{job_id}") for job_id in args.job_ids}
+    else:
+        polls = {job_id: http_poll(args.customizer_url, f"/v1/customization/jobs/{job_id}/status")
+                 for job_id in args.job_ids}
+
+    start = time.time()
+    waiter = Waiter(rate=args.rate, max_requests=args.max_requests)
+    for job_id, poll in polls.items():
+        waiter.add(job_id, poll, timeout=args.timeout, max_interval=args.max_interval)
+    results = waiter.run(return_exceptions=True)
+
+    print(f"\n📊 {len(results)} job(s) in {time.time() - start:.0f}s, {waiter.budget.used} poll(s)")
+    failed = 0
+    for job_id, result in results.items():
+        if isinstance(result, BaseException):
+            failed += 1
+            print(f"   ❌ {job_id}: {result}")
+        else:
+            status = status_of(result)
+            failed += status != "completed"
+            print(f"   {'✅' if status == 'completed' else '⚠️ '} {job_id}: {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,13 +17,63 @@ Or with HuggingFace token:
         --adapter-dir ./downloaded_model \
         --base-model meta-llama/Llama-3.2-1B-Instruct \
         --output-dir ./merged_model
+
+Memory-bounded merge on CPU-only nodes (base must be safetensors):
+    python merge_adapter_with_base.py \
+        --adapter-dir ./downloaded_model \
+        --base-model meta-llama/Llama-3.2-1B-Instruct \
+        --output-dir ./merged_model \
+        --engine streaming
+
+Output dtype and shard size (LoRA deltas are accumulated in fp32 either way):
+    python merge_adapter_with_base.py \
+        --adapter-dir ./downloaded_model \
+        --output-dir ./merged_model \
+        --output-dtype bf16 \
+        --max-shard-size 1GB
+
+Re-running with the same base revision, adapter and options returns the cached
+merge from the merge result cache (see artifact_cache.py) instead of merging again.
 """
 
 import os
+import re
 import sys
+import glob
+import json
+import shutil
+import hashlib
 import argparse
+import tempfile
 from pathlib import Path
 
+from model_manifest import MANIFEST_NAME, build_manifest, write_manifest, validate_safetensors
+from artifact_cache import (
+    ArtifactCache, MergeCache, DEFAULT_CACHE_DIR, DEFAULT_MERGE_CACHE_DIR, link_or_copy, memoized_sha256,
+    unlink_if_shared
+)
+
+# Files written by tokenizer.save_pretrained()
+TOKENIZER_FILES = [
+    "tokenizer.json", "tokenizer_config.json", "special_tokens_map.json", "tokenizer.model",
+    "added_tokens.json", "vocab.json", "merges.txt", "chat_template.jinja"
+]
+
+# --output-dtype values -> torch dtype names ("auto" keeps the base model's dtype)
+OUTPUT_DTYPES = {
+    "auto": "auto",
+    "bf16": "bfloat16", "bfloat16": "bfloat16",
+    "fp16": "float16", "float16": "float16", "half": "float16",
+    "fp32": "float32", "float32": "float32",
+}
+
+# Default output shard size: several evenly sized shards load in parallel in the serving runtime.
+# "0" or "none" keeps the base model's layout (streaming) / the transformers default.
+DEFAULT_MAX_SHARD_SIZE = os.getenv("MERGE_MAX_SHARD_SIZE", "2GB")
+
+SIZE_UNITS = {"": 1, "B": 1, "KB": 10 ** 3, "MB": 10 ** 6, "GB": 10 ** 9, "TB": 10 ** 12,
+              "KIB": 2 ** 10, "MIB": 2 ** 20, "GIB": 2 ** 30, "TIB": 2 ** 40}
+
 # Load environment variables from env.donotcommit if it exists
 try:
     from dotenv import load_dotenv
@@ -34,59 +84,99 @@ except ImportError:
     pass
 
 
-def merge_adapter_with_base(adapter_dir, base_model, output_dir, hf_token=None):
+def parse_size(value):
+    """Parse a size such as "2GB", "500MB" or "1.5GiB" into bytes. "0"/"none" return None."""
+    if value is None or str(value).strip().lower() in ("", "0", "none"):
+        return None
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([A-Za-z]*)\s*", str(value))
+    if not match or match.group(2).upper() not in SIZE_UNITS:
+        raise ValueError(f"Invalid size: {value} (use e.g. 2GB, 500MB, 1.5GiB)")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def dedupe_output_files(output_path, cache_dir, digests=None):
     """
-    Merge LoRA adapter with base model.
-    
-    Args:
-        adapter_dir: Directory containing adapter files (adapter_model.safetensors, adapter_config.json)
-        base_model: Base model identifier (HuggingFace model ID or local path)
-        output_dir: Output directory for merged model
-        hf_token: HuggingFace token (optional, for gated models)
+    Store output files in the artifact cache and link them back, so files that
+    are identical across exports (tokenizer, config, ...) exist on disk once.
+    digests ({relative path: sha256}, e.g. from the manifest) avoids rehashing.
+    Returns (number of files, number already cached by an earlier export).
+    """
+    cache = ArtifactCache(cache_dir)
+    digests = digests or {}
+    files = [f for f in output_path.rglob("*") if f.is_file() and f.name != MANIFEST_NAME]
+    shared = sum(
+        1 for f in files
+        if cache.adopt(f, digests.get(str(f.relative_to(output_path)).replace("\\", "/")))[1]
+    )
+    cache.gc()
+    return len(files), shared
+
+
+def base_model_revision(base_model, hf_token=None, memo_path=None):
+    """
+    Identify the exact base model weights: the commit sha for a Hub model ID or
+    HF cache snapshot, otherwise a content hash of a local model directory.
+    Returns None when the revision cannot be determined (e.g. offline).
+    """
+    base_path = Path(base_model)
+    if base_path.is_dir():
+        snapshot = re.search(r"snapshots/([0-9a-f]{40})", str(base_path.resolve()))
+        if snapshot:
+            return f"hf:{snapshot.group(1)}"
+        digest = hashlib.sha256()
+        files = sorted(base_path.glob("*.safetensors")) + sorted(base_path.glob("*.bin"))
+        files += sorted(base_path.glob("*.json"))
+        for f in files:
+            digest.update(f"{f.name}:{memoized_sha256(f, memo_path)}\n".encode())
+        return f"local:{digest.hexdigest()}"
+    try:
+        from huggingface_hub import HfApi
+        return f"hf:{HfApi().model_info(base_model, token=hf_token).sha}"
+    except Exception as e:
+        print(f"   ⚠️  Could not resolve base model revision: {e}")
+        return None
+
+
+def merge_fingerprint(adapter_path, base_model, engine, hf_token=None, merge_cache=None, output_dtype="auto",
+                      max_shard_size=None):
+    """
+    Fingerprint of a merge: base revision, adapter weights and config, output
+    dtype, shard size and engine. Returns (fingerprint, components) or (None, None).
+    """
+    memo_path = merge_cache.root / "hash-memo.json" if merge_cache else None
+    base_revision = base_model_revision(base_model, hf_token, memo_path)
+    if base_revision is None:
+        return None, None
+    components = {
+        "base_model": str(base_model),
+        "base_revision": base_revision,
+        "adapter_weights": memoized_sha256(adapter_path / "adapter_model.safetensors", memo_path),
+        "adapter_config": hashlib.sha256((adapter_path / "adapter_config.json").read_bytes()).hexdigest(),
+        "output_dtype": output_dtype,
+        "max_shard_size": max_shard_size,
+        "engine": engine,
+    }
+    identity = {k: v for k, v in components.items() if k != "base_model"}
+    fingerprint = hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+    return fingerprint, components
+
+
+def load_base_with_transformers(base_model, hf_token=None, output_dtype="auto"):
+    """
+    Load the base model and tokenizer with transformers.
+
+    Weights are loaded in output_dtype ("auto" keeps the base model's own
+    dtype), so the saved model needs no extra cast copy; merge_loaded_base()
+    accumulates the LoRA deltas in fp32 one module at a time. Returns
+    (model, tokenizer) or None.
     """
     try:
+        import torch
         from transformers import AutoModelForCausalLM, AutoTokenizer
-        from peft import PeftModel
     except ImportError:
         print("❌ Error: Required packages not installed")
         print("   Install with: pip install transformers peft accelerate safetensors")
-        return False
-    
-    print("=" * 70)
-    print("Merge LoRA Adapter with Base Model")
-    print("=" * 70)
-    print(f"Adapter Directory: {adapter_dir}")
-    print(f"Base Model: {base_model}")
-    print(f"Output Directory: {output_dir}")
-    print()
-    
-    # Check adapter directory
-    adapter_path = Path(adapter_dir)
-    if not adapter_path.exists():
-        print(f"❌ Error: Adapter directory does not exist: {adapter_dir}")
-        return False
-    
-    adapter_config = adapter_path / "adapter_config.json"
-    adapter_model = adapter_path / "adapter_model.safetensors"
-    
-    if not adapter_config.exists():
-        print(f"❌ Error: adapter_config.json not found in {adapter_dir}")
-        return False
-    
-    if not adapter_model.exists():
-        print(f"❌ Error: adapter_model.safetensors not found in {adapter_dir}")
-        return False
-    
-    print("✅ Adapter files found")
-    print(f"   - {adapter_config}")
-    print(f"   - {adapter_model}")
-    print()
-    
-    # Create output directory
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
-    print(f"✅ Output directory created: {output_dir}")
-    print()
+        return None
     
     # Load base model
     print("📥 Loading base model...")
@@ -101,13 +191,14 @@ def merge_adapter_with_base(adapter_dir, base_model, output_dir, hf_token=None):
             print("   ✅ Authenticated with HuggingFace")
         
         # Load base model and tokenizer
-        print("   Loading model weights...")
+        print(f"   Loading model weights ({output_dtype})...")
         base_model_obj = AutoModelForCausalLM.from_pretrained(
             base_model,
-            torch_dtype="auto",
+            torch_dtype="auto" if output_dtype == "auto" else getattr(torch, output_dtype),
             device_map="auto",
             trust_remote_code=True
         )
+        print(f"   Loaded as {str(base_model_obj.dtype).replace('torch.', '')}")
         
         print("   Loading tokenizer...")
         tokenizer = AutoTokenizer.from_pretrained(
@@ -126,67 +217,306 @@ def merge_adapter_with_base(adapter_dir, base_model, output_dir, hf_token=None):
         print("   2. For gated models, set HF_TOKEN environment variable")
         print("   3. Ensure you have internet access to download model")
         print("   4. Check HuggingFace model page for access requirements")
-        return False
-    
-    # Load adapter
-    print("📥 Loading LoRA adapter...")
-    print(f"   Adapter: {adapter_dir}")
+        return None
     
+    return base_model_obj, tokenizer
+
+
+def merge_loaded_base(base_model_obj, tokenizer, adapter_dir, output_path, output_dir, restore_base=False,
+                      tokenizer_from=None, max_shard_size=None):
+    """
+    Apply an adapter to an already loaded base model with PEFT merge_and_unload() and save it.
+
+    restore_base: put the original base weights back afterwards (also when loading,
+                  merging or saving fails), so the same loaded model can be
+                  merged with the next adapter; raises if that is not possible
+    tokenizer_from: output directory whose tokenizer files are linked instead of saving them again
+    max_shard_size: maximum safetensors shard size in bytes (None uses the transformers default)
+    """
     try:
-        # Load adapter using PEFT
-        model = PeftModel.from_pretrained(
-            base_model_obj,
-            adapter_dir,
-            device_map="auto"
-        )
-        print("✅ Adapter loaded")
-        print()
-        
-    except Exception as e:
-        print(f"❌ Error loading adapter: {e}")
-        print()
-        print("💡 Troubleshooting:")
-        print("   1. Check if adapter files are complete")
-        print("   2. Verify adapter_config.json is valid")
-        print("   3. Ensure adapter matches base model architecture")
+        from peft import PeftModel
+    except ImportError:
+        print("❌ Error: Required packages not installed")
+        print("   Install with: pip install transformers peft accelerate safetensors")
         return False
     
-    # Merge adapter with base model
-    print("🔀 Merging adapter with base model...")
-    print("   This may take a few minutes...")
-    
+    saved_weights, saved_modules = [], []
     try:
-        merged_model = model.merge_and_unload()
-        print("✅ Merge complete")
-        print()
+        # Load adapter
+        print("📥 Loading LoRA adapter...")
+        print(f"   Adapter: {adapter_dir}")
         
-    except Exception as e:
-        print(f"❌ Error merging adapter: {e}")
-        import traceback
-        traceback.print_exc()
+        try:
+            # Load adapter using PEFT
+            model = PeftModel.from_pretrained(
+                base_model_obj,
+                adapter_dir,
+                device_map="auto"
+            )
+            print("✅ Adapter loaded")
+            print()
+            
+        except Exception as e:
+            print(f"❌ Error loading adapter: {e}")
+            print()
+            print("💡 Troubleshooting:")
+            print("   1. Check if adapter files are complete")
+            print("   2. Verify adapter_config.json is valid")
+            print("   3. Ensure adapter matches base model architecture")
+            return False
+        
+        if restore_base:
+            saved_weights, saved_modules = snapshot_adapted_weights(model)
+        
+        # Merge adapter with base model
+        print("🔀 Merging adapter with base model...")
+        print("   This may take a few minutes...")
+        
+        try:
+            merge_lora_layers_fp32(model)
+            merged_model = model.merge_and_unload()
+            print("✅ Merge complete")
+            print()
+            
+        except Exception as e:
+            print(f"❌ Error merging adapter: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+        
+        # Save merged model
+        print("💾 Saving merged model...")
+        print(f"   Output: {output_dir}")
+        
+        try:
+            save_options = {}
+            if max_shard_size:
+                save_options["max_shard_size"] = max_shard_size
+            merged_model.save_pretrained(
+                str(output_path),
+                safe_serialization=True,  # Use safetensors format
+                **save_options
+            )
+            if tokenizer_from:
+                for name in TOKENIZER_FILES:
+                    if (tokenizer_from / name).exists():
+                        link_or_copy(tokenizer_from / name, output_path / name)
+            else:
+                tokenizer.save_pretrained(str(output_path))
+            print("✅ Merged model saved")
+            print()
+            
+        except Exception as e:
+            print(f"❌ Error saving merged model: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+        
+        return True
+    finally:
+        # Also after a failed load or a partial merge: the adapter's layers were injected into base_model_obj
+        if restore_base:
+            restore_adapted_weights(base_model_obj, saved_weights, saved_modules)
+
+
+def merge_lora_layers_fp32(peft_model):
+    """
+    Merge every LoRA layer of a PeftModel in place, one module at a time:
+    the module is upcast to fp32, the delta added, and the base weight cast
+    back to its loaded dtype. Only one module is ever held in fp32, and
+    merge_and_unload() then skips the already merged layers.
+    """
+    import torch
+    from peft.tuners.lora import LoraLayer
+    from peft.tuners.tuners_utils import onload_layer
+    
+    with torch.no_grad():
+        for module in peft_model.base_model.model.modules():
+            if not isinstance(module, LoraLayer) or module.merged:
+                continue
+            with onload_layer(module):
+                dtype = module.get_base_layer().weight.dtype
+                if dtype in (torch.float16, torch.bfloat16):
+                    module.to(torch.float32)
+                    module.merge()
+                    module.to(dtype)
+                else:
+                    module.merge()
+
+
+class BaseNotRestored(RuntimeError):
+    """A loaded base model still holds adapter layers after restore_adapted_weights()."""
+
+
+def snapshot_adapted_weights(peft_model):
+    """
+    Copy the base weights an adapter is about to merge into, so they can be
+    restored afterwards. Only LoRA target weights and modules_to_save are kept.
+    """
+    import torch
+    from peft.tuners.lora import LoraLayer
+    from peft.utils import ModulesToSaveWrapper
+    
+    saved_weights = []
+    saved_modules = []
+    with torch.no_grad():
+        for name, module in peft_model.base_model.model.named_modules():
+            if isinstance(module, LoraLayer):
+                weight = module.get_base_layer().weight
+                saved_weights.append((weight, weight.detach().clone()))
+            elif isinstance(module, ModulesToSaveWrapper):
+                parent, _, attr = name.rpartition(".")
+                saved_modules.append((parent, attr, module.original_module))
+    return saved_weights, saved_modules
+
+
+def restore_adapted_weights(model, saved_weights, saved_modules):
+    """
+    Undo PeftModel.from_pretrained() and (possibly partial) merging on a
+    base model using snapshot_adapted_weights() output: the original
+    weights are copied back and any injected adapter layers are replaced by
+    the modules they wrap. Raises BaseNotRestored if adapter layers remain.
+    """
+    import torch
+    from peft.tuners.tuners_utils import BaseTunerLayer
+    from peft.utils import ModulesToSaveWrapper
+    
+    with torch.no_grad():
+        for weight, original in saved_weights:
+            weight.copy_(original)
+    for parent, attr, module in saved_modules:
+        setattr(model.get_submodule(parent), attr, module)
+    # Layers still wrapped after a failed load or merge (parents come before their children)
+    for name, module in list(model.named_modules()):
+        if not name or not isinstance(module, (BaseTunerLayer, ModulesToSaveWrapper)):
+            continue
+        parent_name, _, attr = name.rpartition(".")
+        try:
+            parent = model.get_submodule(parent_name)
+        except AttributeError:
+            continue
+        if getattr(parent, attr, None) is module:
+            wrapped = module.original_module if isinstance(module, ModulesToSaveWrapper) else module.get_base_layer()
+            setattr(parent, attr, wrapped)
+    # Let the next PeftModel.from_pretrained() treat this as an unmodified model
+    if hasattr(model, "peft_config"):
+        del model.peft_config
+    remaining = [name for name, module in model.named_modules()
+                 if isinstance(module, (BaseTunerLayer, ModulesToSaveWrapper))]
+    if remaining:
+        raise BaseNotRestored(f"{len(remaining)} adapter layer(s) left in the base model, e.g. {remaining[0]}")
+
+
+def merge_with_transformers(adapter_dir, base_model, output_path, output_dir, hf_token=None, output_dtype="auto",
+                            max_shard_size=None):
+    """Load the full base model, apply the adapter with PEFT merge_and_unload(), and save it."""
+    loaded = load_base_with_transformers(base_model, hf_token, output_dtype)
+    if loaded is None:
+        return False
+    base_model_obj, tokenizer = loaded
+    return merge_loaded_base(base_model_obj, tokenizer, adapter_dir, output_path, output_dir,
+                             max_shard_size=max_shard_size)
+
+
+def merge_many_with_transformers(adapter_dirs, base_model, output_paths, hf_token=None, output_dtype="auto",
+                                 max_shard_size=None):
+    """
+    Load the base model once and merge each adapter into its own output
+    directory, restoring the base weights between adapters. The tokenizer is
+    saved once and linked into the other outputs. Returns a list of booleans.
+    """
+    results = [False] * len(adapter_dirs)
+    loaded = load_base_with_transformers(base_model, hf_token, output_dtype)
+    if loaded is None:
+        return results
+    base_model_obj, tokenizer = loaded
+    tokenizer_from = None
+    for index, (adapter_dir, output_path) in enumerate(zip(adapter_dirs, output_paths)):
+        print(f"── [{index + 1}/{len(adapter_dirs)}] {adapter_dir}")
+        try:
+            results[index] = merge_loaded_base(
+                base_model_obj, tokenizer, adapter_dir, output_path, str(output_path),
+                restore_base=index < len(adapter_dirs) - 1, tokenizer_from=tokenizer_from,
+                max_shard_size=max_shard_size
+            )
+        except Exception as e:
+            # The shared base model may still hold this adapter: merging the rest would be wrong
+            print(f"❌ Could not restore the base model after {adapter_dir}: {e}")
+            print(f"   The remaining {len(adapter_dirs) - index - 1} adapter(s) are not merged; re-run them")
+            break
+        if results[index] and tokenizer_from is None:
+            tokenizer_from = output_path
+    return results
+
+
+def check_adapter_dir(adapter_dir):
+    """Check that adapter_dir holds adapter_config.json and adapter_model.safetensors."""
+    adapter_path = Path(adapter_dir)
+    if not adapter_path.exists():
+        print(f"❌ Error: Adapter directory does not exist: {adapter_dir}")
         return False
     
-    # Save merged model
-    print("💾 Saving merged model...")
-    print(f"   Output: {output_dir}")
+    adapter_config = adapter_path / "adapter_config.json"
+    adapter_model = adapter_path / "adapter_model.safetensors"
     
-    try:
-        merged_model.save_pretrained(
-            str(output_path),
-            safe_serialization=True  # Use safetensors format
-        )
-        tokenizer.save_pretrained(str(output_path))
-        print("✅ Merged model saved")
-        print()
-        
-    except Exception as e:
-        print(f"❌ Error saving merged model: {e}")
-        import traceback
-        traceback.print_exc()
+    if not adapter_config.exists():
+        print(f"❌ Error: adapter_config.json not found in {adapter_dir}")
         return False
     
-    # Verify output
+    if not adapter_model.exists():
+        print(f"❌ Error: adapter_model.safetensors not found in {adapter_dir}")
+        return False
+    
+    print("✅ Adapter files found")
+    print(f"   - {adapter_config}")
+    print(f"   - {adapter_model}")
+    return True
+
+
+def prepare_output_dir(output_path):
+    """Create the output directory and detach files left by an earlier run from the caches."""
+    output_path.mkdir(parents=True, exist_ok=True)
+    # Files from an earlier run may be hardlinked into the artifact cache;
+    # unlink them so the merge cannot overwrite cached objects in place
+    for existing in output_path.rglob("*"):
+        unlink_if_shared(existing)
+
+
+def lookup_merge_cache(merge_cache, adapter_path, base_model, engine, hf_token, output_path, output_dtype="auto",
+                       max_shard_size=None):
+    """Fingerprint a merge and link a cached result into output_path. Returns (fingerprint, components, hit)."""
+    if not merge_cache:
+        return None, None, False
+    print("🔑 Fingerprinting base model and adapter...")
+    fingerprint, components = merge_fingerprint(adapter_path, base_model, engine, hf_token, merge_cache,
+                                                output_dtype, max_shard_size)
+    hit = False
+    if fingerprint:
+        print(f"   Fingerprint: {fingerprint[:16]}")
+        count = merge_cache.materialize(fingerprint, output_path)
+        if count is not None:
+            print(f"✅ Merge cache hit: linked {count} file(s) from {merge_cache.root / fingerprint}")
+            hit = True
+        else:
+            print("   Not in merge cache, merging")
+    return fingerprint, components, hit
+
+
+def is_object_store_url(output_dir):
+    return str(output_dir).startswith("s3://")
+
+
+def verify_merged_output(output_path, remote_files=None):
+    """
+    Check the merged model files. Returns True if config, weights and tokenizer are present.
+    
+    remote_files: {name: size} listing of an s3:// output, checked instead of output_path
+    """
     print("🔍 Verifying merged model files...")
+    if remote_files is None:
+        files = {f.name: f.stat().st_size for f in output_path.iterdir() if f.is_file()}
+    else:
+        files = remote_files
     required_files = [
         "config.json",
         "model.safetensors",  # or model-*.safetensors for sharded models
@@ -196,37 +526,207 @@ def merge_adapter_with_base(adapter_dir, base_model, output_dir, hf_token=None):
     
     found_files = []
     for file in required_files:
-        if (output_path / file).exists():
+        if file in files:
             found_files.append(file)
-            file_size = (output_path / file).stat().st_size / (1024 * 1024)  # MB
+            file_size = files[file] / (1024 * 1024)  # MB
             print(f"   ✅ {file} ({file_size:.1f} MB)")
         else:
             # Check for sharded models
-            sharded = list(output_path.glob(f"model-*.safetensors"))
+            sharded = [name for name in files if re.fullmatch(r"model-.*\.safetensors", name)]
             if sharded and file == "model.safetensors":
-                total_size = sum(f.stat().st_size for f in sharded) / (1024 * 1024)
+                total_size = sum(files[name] for name in sharded) / (1024 * 1024)
                 print(f"   ✅ model-*.safetensors ({len(sharded)} shards, {total_size:.1f} MB total)")
                 found_files.append("model-*.safetensors")
             else:
                 print(f"   ⚠️  {file} not found")
     
-    if len(found_files) >= 3:  # At least config, model, and tokenizer
+    if len(found_files) < 3:  # At least config, model, and tokenizer
+        return False
+    if remote_files is not None:
+        return True
+    
+    # Header-only check of every shard against the index (no weights are read)
+    errors, counts = validate_safetensors(output_path)
+    for error in errors[:10]:
+        print(f"   ❌ {error}")
+    if errors:
+        return False
+    print(f"   ✅ safetensors headers: {counts['shards']} shard(s), {counts['tensors']} tensors consistent with the index")
+    return True
+
+
+def write_output_manifest(output_path):
+    """Create model_manifest.json, reusing digests computed while the merge wrote the files."""
+    digests, hashed = build_manifest(output_path)
+    print(f"🧾 {MANIFEST_NAME}: {len(digests)} file(s), "
+          f"{len(digests) - hashed} checksum(s) from the merge, {hashed} hashed after saving")
+    return digests
+
+
+def list_object_store_output(output_dir, object_store):
+    """{name: size} of the objects under an s3:// output."""
+    from upload_model_to_minio import create_s3_client, list_remote_objects, parse_s3_url
+    bucket, prefix = parse_s3_url(output_dir)
+    s3_client = create_s3_client(object_store["minio_config"])
+    return {name: obj["size"] for name, obj in list_remote_objects(s3_client, bucket, prefix).items()}
+
+
+def publish_staged_output(staging_path, output_dir, object_store):
+    """Upload a locally staged merge to its s3:// destination."""
+    from upload_model_to_minio import upload_to_minio, parse_s3_url
+    bucket, prefix = parse_s3_url(output_dir)
+    print(f"☁️  Uploading merged model to {output_dir}...")
+    return upload_to_minio(
+        str(staging_path), prefix, {**object_store["minio_config"], "bucket": bucket},
+        part_size_mb=object_store["part_size_mb"]
+    )
+
+
+def cache_merged_output(output_path, merge_cache, fingerprint, components, cache_dir, digests=None):
+    """Store a fresh merge in the merge cache and link its files through the artifact cache."""
+    if fingerprint:
+        merge_cache.store(fingerprint, output_path, components)
+        evicted = merge_cache.gc()["evicted"]
+        print(f"🔀 Stored in merge cache: {merge_cache.root / fingerprint}")
+        if evicted:
+            print(f"   Evicted {evicted} least recently used merge(s)")
         print()
+    if cache_dir:
+        total, shared = dedupe_output_files(output_path, cache_dir, digests)
+        if digests:
+            write_manifest(output_path, digests)  # files may now be links to cached objects
+        print(f"📦 Output files linked through the artifact cache: {total} file(s), "
+              f"{shared} shared with earlier exports")
+        print()
+
+
+def print_next_steps(output_dir, target_path="models/llama-3.2-1b-instruct-custom"):
+    print("📋 Next steps:")
+    if is_object_store_url(output_dir):
+        target_path = output_dir.split("/", 3)[3] if output_dir.count("/") >= 3 else target_path
+        print(f"   1. Merged model is already in object storage: {output_dir}")
+    else:
+        print(f"   1. Upload merged model to MinIO:")
+        print(f"      python upload_model_to_minio.py --model-dir {output_dir} --target-path {target_path}")
+    print()
+    print(f"   2. Update InferenceService path:")
+    print(f"      oc patch inferenceservice anemo-rhoai-model-ssr -n anemo-rhoai \\")
+    print(f"        --type='json' -p='[{{\"op\": \"replace\", \"path\": \"/spec/predictor/model/storage/path\", \"value\": \"{target_path}\"}}]'")
+    print()
+    print(f"   3. Restart InferenceService pod:")
+    print(f"      oc delete pod -n anemo-rhoai -l serving.kserve.io/inferenceservice=anemo-rhoai-model-ssr")
+
+
+def merge_adapter_with_base(adapter_dir, base_model, output_dir, hf_token=None, cache_dir=DEFAULT_CACHE_DIR,
+                            engine="transformers", workers=1, merge_cache_dir=DEFAULT_MERGE_CACHE_DIR,
+                            object_store=None, output_dtype="auto", max_shard_size=None):
+    """
+    Merge LoRA adapter with base model.
+    
+    Args:
+        adapter_dir: Directory containing adapter files (adapter_model.safetensors, adapter_config.json)
+        base_model: Base model identifier (HuggingFace model ID or local path)
+        output_dir: Output directory for merged model, or s3://bucket/prefix
+        hf_token: HuggingFace token (optional, for gated models)
+        cache_dir: Artifact cache used to share identical output files across exports (None disables it)
+        engine: "transformers" (load the full model, PEFT merge_and_unload) or "streaming"
+                (memory-mapped, tensor-by-tensor merge; peak memory ~ largest tensor)
+        workers: Worker processes for the streaming engine (one output shard per task)
+        merge_cache_dir: Merge result cache keyed by base/adapter fingerprint (None disables it)
+        object_store: {"minio_config", "part_size_mb", "parts_in_flight"} for s3:// output.
+                      The streaming engine uploads shards while merging; the transformers
+                      engine and merge cache hits are staged locally and then uploaded.
+        output_dtype: "auto" (base model dtype), "bfloat16", "float16" or "float32";
+                      deltas are accumulated in fp32 and cast once
+        max_shard_size: Maximum output shard size in bytes (None: base layout for the
+                        streaming engine, transformers default otherwise)
+    """
+    print("=" * 70)
+    print("Merge LoRA Adapter with Base Model")
+    print("=" * 70)
+    print(f"Adapter Directory: {adapter_dir}")
+    print(f"Base Model: {base_model}")
+    print(f"Output Directory: {output_dir}")
+    print(f"Engine: {engine}")
+    print(f"Output dtype: {output_dtype}, max shard size: {max_shard_size or 'default'}")
+    print()
+    
+    # Check adapter directory
+    adapter_path = Path(adapter_dir)
+    if not check_adapter_dir(adapter_dir):
+        return False
+    print()
+    
+    remote = is_object_store_url(output_dir)
+    if remote and object_store is None:
+        print(f"❌ Error: No MinIO configuration for {output_dir}")
+        return False
+    
+    # Create output directory (a local staging directory for s3:// output)
+    output_path = Path(tempfile.mkdtemp(prefix="merged-model-")) if remote else Path(output_dir)
+    try:
+        prepare_output_dir(output_path)
+        print(f"✅ {'Staging' if remote else 'Output'} directory created: {output_path}")
+        print()
+        return _merge_adapter_into(adapter_path, base_model, output_dir, output_path, hf_token, cache_dir,
+                                   engine, workers, merge_cache_dir, object_store, output_dtype, max_shard_size)
+    finally:
+        if remote:
+            shutil.rmtree(output_path, ignore_errors=True)
+
+
+def _merge_adapter_into(adapter_path, base_model, output_dir, output_path, hf_token, cache_dir, engine, workers,
+                        merge_cache_dir, object_store, output_dtype, max_shard_size):
+    remote = is_object_store_url(output_dir)
+    merge_cache = MergeCache(merge_cache_dir) if merge_cache_dir else None
+    fingerprint, components, cache_hit = lookup_merge_cache(
+        merge_cache, adapter_path, base_model, engine, hf_token, output_path, output_dtype, max_shard_size
+    )
+    if merge_cache:
+        print()
+    
+    # The streaming engine uploads s3:// output directly; everything else is staged in output_path
+    direct = remote and engine == "streaming" and not cache_hit
+    if cache_hit:
+        merged = True
+    elif engine == "streaming":
+        try:
+            from streaming_merge import merge_adapter_streaming
+        except ImportError:
+            print("❌ Error: Required packages not installed")
+            print("   Install with: pip install torch safetensors huggingface_hub")
+            return False
+        merged = merge_adapter_streaming(
+            str(adapter_path), base_model, output_dir if direct else output_path, hf_token,
+            workers=workers, object_store=object_store, output_dtype=output_dtype, max_shard_size=max_shard_size
+        )
+    else:
+        merged = merge_with_transformers(str(adapter_path), base_model, output_path, output_dir, hf_token,
+                                         output_dtype, max_shard_size)
+    if not merged:
+        return False
+    
+    # Verify output
+    if direct:
+        verified = verify_merged_output(output_path, list_object_store_output(output_dir, object_store))
+    else:
+        verified = verify_merged_output(output_path)
+    if verified:
+        print()
+        if not direct:
+            digests = write_output_manifest(output_path)
+            print()
+        if not cache_hit and not direct:
+            cache_merged_output(output_path, merge_cache, fingerprint, components, None if remote else cache_dir,
+                                digests)
+        if remote and not direct and not publish_staged_output(output_path, output_dir, object_store):
+            return False
         print("=" * 70)
         print("✅ Merge Complete!")
         print("=" * 70)
         print(f"Merged model saved to: {output_dir}")
         print()
-        print("📋 Next steps:")
-        print(f"   1. Upload merged model to MinIO:")
-        print(f"      python upload_model_to_minio.py --model-dir {output_dir} --target-path models/llama-3.2-1b-instruct-custom")
-        print()
-        print(f"   2. Update InferenceService path:")
-        print(f"      oc patch inferenceservice anemo-rhoai-model-ssr -n anemo-rhoai \\")
-        print(f"        --type='json' -p='[{{\"op\": \"replace\", \"path\": \"/spec/predictor/model/storage/path\", \"value\": \"models/llama-3.2-1b-instruct-custom\"}}]'")
-        print()
-        print(f"   3. Restart InferenceService pod:")
-        print(f"      oc delete pod -n anemo-rhoai -l serving.kserve.io/inferenceservice=anemo-rhoai-model-ssr")
+        print_next_steps(output_dir)
         return True
     else:
         print()
@@ -235,6 +735,173 @@ def merge_adapter_with_base(adapter_dir, base_model, output_dir, hf_token=None):
         return False
 
 
+def expand_adapter_dirs(patterns):
+    """Expand adapter directory arguments that contain glob wildcards, keeping order."""
+    adapter_dirs = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            if match not in adapter_dirs:
+                adapter_dirs.append(match)
+    return adapter_dirs
+
+
+def batch_output_names(adapter_dirs):
+    """
+    Output directory names for a batch: the adapter directory name, prefixed
+    with its parent directories when names would otherwise collide.
+    """
+    parts = [Path(d).resolve().parts for d in adapter_dirs]
+    names = [p[-1] for p in parts]
+    depth = 1
+    while len(set(names)) < len(names) and depth < max(len(p) for p in parts):
+        depth += 1
+        names = ["-".join(p[-depth:]) for p in parts]
+    return names
+
+
+def merge_adapters_with_base(adapter_dirs, base_model, output_dir, hf_token=None, cache_dir=DEFAULT_CACHE_DIR,
+                             engine="transformers", workers=1, merge_cache_dir=DEFAULT_MERGE_CACHE_DIR,
+                             object_store=None, output_dtype="auto", max_shard_size=None):
+    """
+    Merge several LoRA adapters trained on the same base model, loading (or
+    memory-mapping) the base once.
+    
+    Each adapter is written to <output_dir>/<adapter directory name>
+    (output_dir may be s3://bucket/prefix, see merge_adapter_with_base).
+    Adapters already in the merge cache are linked instead of merged.
+    output_dtype and max_shard_size are as in merge_adapter_with_base().
+    Returns a dict mapping each adapter directory to its output, or None
+    where the merge failed.
+    """
+    print("=" * 70)
+    print("Batch Merge LoRA Adapters with Base Model")
+    print("=" * 70)
+    print(f"Adapters: {len(adapter_dirs)}")
+    print(f"Base Model: {base_model}")
+    print(f"Output Directory: {output_dir}")
+    print(f"Engine: {engine}")
+    print(f"Output dtype: {output_dtype}, max shard size: {max_shard_size or 'default'}")
+    print()
+    
+    remote = is_object_store_url(output_dir)
+    if remote and object_store is None:
+        print(f"❌ Error: No MinIO configuration for {output_dir}")
+        return {adapter_dir: None for adapter_dir in adapter_dirs}
+    staging_root = Path(tempfile.mkdtemp(prefix="merged-models-")) if remote else None
+    try:
+        return _merge_adapters_into(adapter_dirs, base_model, output_dir, staging_root, hf_token, cache_dir,
+                                    engine, workers, merge_cache_dir, object_store, output_dtype, max_shard_size)
+    finally:
+        if staging_root:
+            shutil.rmtree(staging_root, ignore_errors=True)
+
+
+def _merge_adapters_into(adapter_dirs, base_model, output_dir, staging_root, hf_token, cache_dir, engine, workers,
+                         merge_cache_dir, object_store, output_dtype, max_shard_size):
+    remote = staging_root is not None
+    merge_cache = MergeCache(merge_cache_dir) if merge_cache_dir else None
+    results = {}
+    pending = []
+    for adapter_dir, name in zip(adapter_dirs, batch_output_names(adapter_dirs)):
+        print(f"── {adapter_dir}")
+        results[adapter_dir] = None
+        if not check_adapter_dir(adapter_dir):
+            print()
+            continue
+        destination = f"{output_dir.rstrip('/')}/{name}" if remote else Path(output_dir) / name
+        output_path = staging_root / name if remote else destination
+        prepare_output_dir(output_path)
+        print(f"   Output: {destination}")
+        fingerprint, components, cache_hit = lookup_merge_cache(
+            merge_cache, Path(adapter_dir), base_model, engine, hf_token, output_path, output_dtype, max_shard_size
+        )
+        print()
+        if cache_hit and not remote:
+            results[adapter_dir] = output_path
+        elif cache_hit:
+            if publish_staged_output(output_path, destination, object_store):
+                results[adapter_dir] = destination
+            print()
+        else:
+            pending.append((adapter_dir, destination, output_path, fingerprint, components))
+    
+    if pending:
+        pending_dirs = [p[0] for p in pending]
+        if engine == "streaming":
+            try:
+                from streaming_merge import merge_adapters_streaming
+            except ImportError:
+                print("❌ Error: Required packages not installed")
+                print("   Install with: pip install torch safetensors huggingface_hub")
+                return results
+            # s3:// outputs are uploaded directly while merging
+            merged = merge_adapters_streaming(
+                pending_dirs, base_model, [p[1] for p in pending], hf_token,
+                workers=workers, object_store=object_store, output_dtype=output_dtype, max_shard_size=max_shard_size
+            )
+        else:
+            merged = merge_many_with_transformers(pending_dirs, base_model, [p[2] for p in pending], hf_token,
+                                                  output_dtype, max_shard_size)
+        
+        for (adapter_dir, destination, output_path, fingerprint, components), ok in zip(pending, merged):
+            if not ok:
+                continue
+            print(f"── {adapter_dir}")
+            direct = remote and engine == "streaming"
+            if direct:
+                verified = verify_merged_output(output_path, list_object_store_output(destination, object_store))
+            else:
+                verified = verify_merged_output(output_path)
+            if not verified:
+                print("   ⚠️  Some required files are missing; the merged model may not be complete")
+                print()
+                continue
+            print()
+            if not direct:
+                digests = write_output_manifest(output_path)
+                print()
+                cache_merged_output(output_path, merge_cache, fingerprint, components, None if remote else cache_dir,
+                                    digests)
+            if remote and not direct and not publish_staged_output(output_path, destination, object_store):
+                continue
+            results[adapter_dir] = destination
+    
+    succeeded = [p for p in results.values() if p]
+    print("=" * 70)
+    print(f"{'✅' if len(succeeded) == len(results) else '⚠️ '} Batch merge: "
+          f"{len(succeeded)}/{len(results)} adapter(s) merged")
+    print("=" * 70)
+    for adapter_dir, destination in results.items():
+        print(f"   {'✅' if destination else '❌'} {adapter_dir} -> {destination or 'failed'}")
+    print()
+    if succeeded:
+        first = str(succeeded[0])
+        print_next_steps(first, f"models/{first.rstrip('/').rsplit('/', 1)[-1]}")
+    return results
+
+
+def resolve_object_store(args):
+    """MinIO settings for s3:// output: CLI overrides, else the cluster secret (bucket comes from the URL)."""
+    from upload_model_to_minio import get_minio_config
+    if args.minio_endpoint and args.minio_access_key and args.minio_secret_key:
+        minio_config = {
+            "endpoint": args.minio_endpoint,
+            "access_key": args.minio_access_key,
+            "secret_key": args.minio_secret_key
+        }
+    else:
+        minio_config = get_minio_config()
+        if not minio_config:
+            print("❌ Error: Could not get MinIO configuration")
+            print("   Use --minio-endpoint, --minio-access-key, --minio-secret-key")
+            return None
+        override = args.minio_endpoint or os.getenv("MINIO_ENDPOINT")
+        if override:
+            minio_config = {**minio_config, "endpoint": override}
+    return {"minio_config": minio_config, "part_size_mb": args.part_size_mb, "parts_in_flight": args.parts_in_flight}
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Merge LoRA adapter with base model for RHOAI SSR"
@@ -242,8 +909,11 @@ def main():
     parser.add_argument(
         "--adapter-dir",
         type=str,
+        nargs="+",
         required=True,
-        help="Directory containing LoRA adapter files (adapter_model.safetensors, adapter_config.json)"
+        help="Directory containing LoRA adapter files (adapter_model.safetensors, adapter_config.json). "
+             "Pass several directories or a quoted glob (e.g. './adapters/*') to merge them in one batch "
+             "against a single loaded base model; each goes to <output-dir>/<adapter name>"
     )
     parser.add_argument(
         "--base-model",
@@ -255,25 +925,133 @@ def main():
         "--output-dir",
         type=str,
         default="./merged_model",
-        help="Output directory for merged model (default: ./merged_model)"
+        help="Output directory for merged model, or s3://bucket/prefix to write straight to MinIO "
+             "(default: ./merged_model)"
     )
     parser.add_argument(
         "--hf-token",
         type=str,
         help="HuggingFace token (for gated models). Can also set HF_TOKEN environment variable"
     )
+    parser.add_argument(
+        "--engine",
+        choices=["transformers", "streaming"],
+        default="transformers",
+        help="Merge engine: 'transformers' loads the full model and uses PEFT merge_and_unload; "
+             "'streaming' memory-maps base safetensors shards and merges tensor by tensor "
+             "(peak memory ~ largest tensor, for CPU-only nodes). Default: transformers"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("MERGE_WORKERS", str(min(8, os.cpu_count() or 1)))),
+        help="Worker processes for --engine streaming; output shards are merged in parallel "
+             "(default: MERGE_WORKERS or min(8, CPU count))"
+    )
+    parser.add_argument(
+        "--output-dtype",
+        choices=sorted(OUTPUT_DTYPES),
+        default="auto",
+        help="Dtype of the merged weights: bf16, fp16, fp32 or auto (same as the base model). "
+             "LoRA deltas are accumulated in fp32 and cast once. Default: auto"
+    )
+    parser.add_argument(
+        "--max-shard-size",
+        type=str,
+        default=DEFAULT_MAX_SHARD_SIZE,
+        help="Maximum safetensors shard size, e.g. 2GB, 500MB, 1.5GiB; the streaming engine splits the "
+             "weights into evenly sized shards. 0 keeps the base model's shard layout "
+             "(default: MERGE_MAX_SHARD_SIZE or 2GB)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Content-addressed artifact cache shared across exports (default: {DEFAULT_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not link output files through the artifact cache"
+    )
+    parser.add_argument(
+        "--merge-cache-dir",
+        type=str,
+        default=DEFAULT_MERGE_CACHE_DIR,
+        help=f"Merge result cache keyed by base revision and adapter fingerprint (default: {DEFAULT_MERGE_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--no-merge-cache",
+        action="store_true",
+        help="Always merge, and do not store the result in the merge cache"
+    )
+    parser.add_argument(
+        "--minio-endpoint",
+        type=str,
+        help="MinIO endpoint URL for s3:// output (overrides secret; MINIO_ENDPOINT env also works)"
+    )
+    parser.add_argument(
+        "--minio-access-key",
+        type=str,
+        help="MinIO access key for s3:// output (overrides secret)"
+    )
+    parser.add_argument(
+        "--minio-secret-key",
+        type=str,
+        help="MinIO secret key for s3:// output (overrides secret)"
+    )
+    parser.add_argument(
+        "--part-size-mb",
+        type=int,
+        default=int(os.getenv("MINIO_PART_SIZE_MB", "64")),
+        help="Multipart part size in MB for s3:// output (default: MINIO_PART_SIZE_MB or 64, minimum 5)"
+    )
+    parser.add_argument(
+        "--parts-in-flight",
+        type=int,
+        default=2,
+        help="Parts of each output shard uploading while the merge continues (default: 2)"
+    )
     
     args = parser.parse_args()
     
     # Get HF token from args, env var, or env.donotcommit
     hf_token = args.hf_token or os.getenv("HF_TOKEN")
     
-    success = merge_adapter_with_base(
-        args.adapter_dir,
-        args.base_model,
-        args.output_dir,
-        hf_token
+    adapter_dirs = expand_adapter_dirs(args.adapter_dir)
+    if not adapter_dirs:
+        print(f"❌ Error: No adapter directories match {' '.join(args.adapter_dir)}")
+        return 1
+    
+    try:
+        max_shard_size = parse_size(args.max_shard_size)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return 1
+    
+    object_store = None
+    if is_object_store_url(args.output_dir):
+        if args.part_size_mb < 5 or args.parts_in_flight < 1:
+            print("❌ Error: --part-size-mb must be at least 5 and --parts-in-flight at least 1")
+            return 1
+        object_store = resolve_object_store(args)
+        if object_store is None:
+            return 1
+    
+    options = dict(
+        cache_dir=None if args.no_cache else args.cache_dir,
+        engine=args.engine,
+        workers=args.workers,
+        merge_cache_dir=None if args.no_merge_cache else args.merge_cache_dir,
+        object_store=object_store,
+        output_dtype=OUTPUT_DTYPES[args.output_dtype],
+        max_shard_size=max_shard_size
     )
+    if len(adapter_dirs) > 1 or any(glob.has_magic(p) for p in args.adapter_dir):
+        results = merge_adapters_with_base(adapter_dirs, args.base_model, args.output_dir, hf_token, **options)
+        success = all(results.values())
+    else:
+        success = merge_adapter_with_base(adapter_dirs[0], args.base_model, args.output_dir, hf_token, **options)
     
     return 0 if success else 1
 
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Checksum Manifest and Header Validation for Model Directories
+
+model_manifest.json records the size, sha256 and mtime of every file in a
+merged model directory. The streaming merge computes the digests while the
+shards are being written, so no second read pass is needed. The uploader and
+the artifact cache reuse a digest as long as the file's size and mtime still
+match, instead of rehashing multi-GB shards.
+
+Safetensors shards are validated from their headers alone (8-byte length +
+JSON, no weights are read). The checks cover dtype, shape vs. data offsets,
+file size, and tensor names and count against model.safetensors.index.json.
+
+Usage:
+    python model_manifest.py verify ./merged_model            # headers + manifest sizes
+    python model_manifest.py verify ./merged_model --rehash   # also recompute every sha256
+    python model_manifest.py write ./merged_model             # (re)create the manifest
+"""
+
+import os
+import sys
+import json
+import math
+import struct
+import hashlib
+import argparse
+from pathlib import Path
+
+from artifact_cache import file_sha256
+
+MANIFEST_NAME = "model_manifest.json"
+INDEX_NAME = "model.safetensors.index.json"
+
+# Bytes per element of each safetensors dtype
+SAFETENSORS_DTYPE_SIZES = {
+    "F64": 8, "F32": 4, "F16": 2, "BF16": 2, "F8_E4M3": 1, "F8_E5M2": 1,
+    "I64": 8, "I32": 4, "I16": 2, "I8": 1, "U64": 8, "U32": 4, "U16": 2, "U8": 1, "BOOL": 1,
+}
+
+
+class HashingWriter:
+    """Binary sink wrapper that computes sha256 and size of everything written through it."""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.size = 0
+        self._digest = hashlib.sha256()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.sink.close()
+        return False
+
+    def write(self, data):
+        self._digest.update(data)
+        self.size += memoryview(data).nbytes
+        return self.sink.write(data)
+
+    def close(self):
+        """Close the underlying sink. Returns {"size", "sha256"}."""
+        self.sink.close()
+        return {"size": self.size, "sha256": self._digest.hexdigest()}
+
+    def abort(self):
+        self.sink.close()
+
+
+def read_safetensors_header(path):
+    """Return (tensor entries, metadata) from a safetensors file without reading any weights."""
+    with open(path, "rb") as f:
+        header_len = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_len))
+    metadata = header.pop("__metadata__", None) or {}
+    return header, metadata
+
+
+def write_manifest(model_dir, digests):
+    """
+    Write model_manifest.json for model_dir from {relative path: sha256}.
+    Sizes and mtimes are taken from the files as they are now.
+    """
+    model_path = Path(model_dir)
+    files = {}
+    for rel, sha256 in sorted(digests.items()):
+        stat = (model_path / rel).stat()
+        files[rel] = {"size": stat.st_size, "sha256": sha256, "mtime_ns": stat.st_mtime_ns}
+    tmp = model_path / f".{MANIFEST_NAME}.tmp"
+    tmp.write_text(json.dumps({"version": 1, "files": files}, indent=2))
+    os.replace(tmp, model_path / MANIFEST_NAME)
+    return files
+
+
+def load_manifest(model_dir):
+    """
+    Manifest entries that can still be trusted: the file exists with the
+    recorded size and mtime. Returns {relative path: {"size", "sha256", ...}}.
+    """
+    model_path = Path(model_dir)
+    try:
+        files = json.loads((model_path / MANIFEST_NAME).read_text()).get("files", {})
+    except (OSError, ValueError):
+        return {}
+    trusted = {}
+    for rel, entry in files.items():
+        try:
+            stat = (model_path / rel).stat()
+        except OSError:
+            continue
+        if stat.st_size == entry.get("size") and stat.st_mtime_ns == entry.get("mtime_ns"):
+            trusted[rel] = entry
+    return trusted
+
+
+def model_files(model_dir):
+    """Relative paths of the files a manifest covers (everything except the manifest and temp files)."""
+    model_path = Path(model_dir)
+    files = []
+    for f in model_path.rglob("*"):
+        rel = f.relative_to(model_path)
+        if f.is_file() and f.name != MANIFEST_NAME and not any(part.startswith(".") for part in rel.parts):
+            files.append(str(rel).replace("\\", "/"))
+    return sorted(files)
+
+
+def build_manifest(model_dir):
+    """
+    Bring model_manifest.json up to date, hashing only files without a
+    trusted entry. Returns ({relative path: sha256}, number of files hashed).
+    """
+    known = load_manifest(model_dir)
+    digests = {}
+    hashed = 0
+    for rel in model_files(model_dir):
+        if rel in known:
+            digests[rel] = known[rel]["sha256"]
+        else:
+            digests[rel] = file_sha256(Path(model_dir) / rel)
+            hashed += 1
+    write_manifest(model_dir, digests)
+    return digests, hashed
+
+
+def validate_safetensors(model_dir, expected=None):
+    """
+    Check every safetensors shard in model_dir from its header only.
+
+    Verifies dtypes, that each tensor's byte range matches its shape and
+    the ranges tile the data section, that the file size matches, and that
+    the index (if any) lists exactly the tensors found in each shard.
+    expected: optional {tensor name: (dtype, shape)} the output must match.
+    Returns (errors, {"shards": n, "tensors": n}).
+    """
+    model_path = Path(model_dir)
+    errors = []
+    found = {}
+    shards = sorted(p for p in model_path.glob("*.safetensors") if not p.name.startswith("adapter"))
+    for shard in shards:
+        try:
+            with open(shard, "rb") as f:
+                header_len = struct.unpack("<Q", f.read(8))[0]
+            header, _ = read_safetensors_header(shard)
+        except (OSError, ValueError, struct.error) as e:
+            errors.append(f"{shard.name}: unreadable header ({e})")
+            continue
+        end = 0
+        for name, entry in sorted(header.items(), key=lambda item: item[1]["data_offsets"][0]):
+            dtype, shape, (start, stop) = entry["dtype"], entry["shape"], entry["data_offsets"]
+            if dtype not in SAFETENSORS_DTYPE_SIZES:
+                errors.append(f"{shard.name}: {name} has unknown dtype {dtype}")
+            elif stop - start != math.prod(shape) * SAFETENSORS_DTYPE_SIZES[dtype]:
+                errors.append(f"{shard.name}: {name} byte range does not match {dtype}{shape}")
+            if start != end:
+                errors.append(f"{shard.name}: {name} does not start where the previous tensor ends")
+            end = stop
+            if name in found:
+                errors.append(f"{name} appears in both {found[name]} and {shard.name}")
+            found[name] = shard.name
+            if expected is not None and name in expected:
+                want_dtype, want_shape = expected[name]
+                if dtype != want_dtype or list(shape) != list(want_shape):
+                    errors.append(f"{shard.name}: {name} is {dtype}{shape}, expected {want_dtype}{list(want_shape)}")
+        if shard.stat().st_size != 8 + header_len + end:
+            errors.append(f"{shard.name}: file size {shard.stat().st_size} does not match header ({8 + header_len + end})")
+
+    index_path = model_path / INDEX_NAME
+    if index_path.exists():
+        weight_map = json.loads(index_path.read_text()).get("weight_map", {})
+        missing = sorted(set(weight_map) - set(found))
+        unlisted = sorted(set(found) - set(weight_map))
+        misplaced = sorted(n for n in set(weight_map) & set(found) if weight_map[n] != found[n])
+        if missing:
+            errors.append(f"{len(missing)} tensor(s) in the index are missing from the shards, e.g. {missing[0]}")
+        if unlisted:
+            errors.append(f"{len(unlisted)} tensor(s) are not listed in the index, e.g. {unlisted[0]}")
+        if misplaced:
+            errors.append(f"{len(misplaced)} tensor(s) are in a different shard than the index says, e.g. {misplaced[0]}")
+    elif len(shards) > 1:
+        errors.append(f"{len(shards)} shards but no {INDEX_NAME}")
+    if expected is not None:
+        missing = sorted(set(expected) - set(found))
+        if missing:
+            errors.append(f"{len(missing)} expected tensor(s) are missing, e.g. {missing[0]}")
+    return errors, {"shards": len(shards), "tensors": len(found)}
+
+
+def verify_checksums(model_dir, rehash=False):
+    """
+    Compare files against model_manifest.json: size always, sha256 when
+    rehash is set. Returns a list of problems.
+    """
+    model_path = Path(model_dir)
+    try:
+        files = json.loads((model_path / MANIFEST_NAME).read_text()).get("files", {})
+    except (OSError, ValueError):
+        return [f"No readable {MANIFEST_NAME}"]
+    problems = []
+    for rel, entry in files.items():
+        path = model_path / rel
+        if not path.is_file():
+            problems.append(f"{rel}: missing")
+        elif path.stat().st_size != entry["size"]:
+            problems.append(f"{rel}: size {path.stat().st_size}, manifest says {entry['size']}")
+        elif rehash and file_sha256(path) != entry["sha256"]:
+            problems.append(f"{rel}: sha256 mismatch")
+    for rel in sorted(set(model_files(model_dir)) - set(files)):
+        problems.append(f"{rel}: not in manifest")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checksum manifest and header validation for model directories")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    verify_parser = subparsers.add_parser("verify", help="Validate safetensors headers and the manifest")
+    verify_parser.add_argument("model_dir", help="Model directory")
+    verify_parser.add_argument(
+        "--rehash",
+        action="store_true",
+        help="Also recompute every file's sha256 (reads all weights)"
+    )
+    write_parser = subparsers.add_parser("write", help="Create or refresh model_manifest.json")
+    write_parser.add_argument("model_dir", help="Model directory")
+
+    args = parser.parse_args()
+    if not Path(args.model_dir).is_dir():
+        print(f"❌ Error: Model directory does not exist: {args.model_dir}")
+        return 1
+
+    if args.command == "write":
+        digests, hashed = build_manifest(args.model_dir)
+        print(f"✅ {MANIFEST_NAME}: {len(digests)} file(s), {hashed} hashed, {len(digests) - hashed} reused")
+        return 0
+
+    errors, counts = validate_safetensors(args.model_dir)
+    problems = verify_checksums(args.model_dir, rehash=args.rehash)
+    for message in errors + problems:
+        print(f"   ❌ {message}")
+    if errors or problems:
+        print(f"❌ {args.model_dir} failed validation")
+        return 1
+    print(f"✅ {counts['shards']} shard(s), {counts['tensors']} tensors consistent with the index; "
+          f"manifest {'sizes and sha256' if args.rehash else 'sizes'} match")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Client for NeMo Microservices Control-Plane Calls
+
+Customizer, Entity Store and DataStore API calls from these scripts go
+through one pooled requests.Session per process, so connections (often
+through `oc port-forward`, where connection setup is expensive) are kept
+alive and reused instead of opened per request. The client sets
+consistent timeouts, asks for gzip responses, and retries idempotent
+requests (GET/HEAD/PUT/DELETE) on connection errors, timeouts and
+429/502/503/504 with jittered exponential backoff (honouring Retry-After).
+POSTs are only retried when the caller says they are safe to repeat.
+
+Typed helpers cover the endpoints the scripts use:
+    CustomizerClient   jobs listing, job details, health
+    EntityStoreClient  models, namespaces, health
+    DataStoreClient    HF-API models/datasets and revisions, namespaces, health
+
+Usage:
+    from nemo_client import CustomizerClient
+    jobs, pagination = CustomizerClient("http://localhost:8003").list_jobs(page=1, limit=100)
+
+    python nemo_client.py health     # check all three services once (URLs from env)
+
+Environment:
+    NEMO_HTTP_TIMEOUT    read timeout in seconds (default: 30; connect timeout is 5)
+    NEMO_HTTP_RETRIES    retries for idempotent requests (default: 3)
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = (5, float(os.getenv("NEMO_HTTP_TIMEOUT", "30")))
+DEFAULT_RETRIES = int(os.getenv("NEMO_HTTP_RETRIES", "3"))
+DEFAULT_POOL_SIZE = 16
+
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class NemoHTTPError(Exception):
+    """Non-2xx response from a NeMo microservice."""
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.text = response.text[:200]
+        super().__init__(f"HTTP {self.status_code}: {self.text}")
+
+
+def backoff_delay(attempt, base=0.5, cap=30):
+    """Sleep time before retry number `attempt` (1-based): exponential, capped, with jitter."""
+    return min(cap, base * 2 ** attempt) * (0.5 + random.random() / 2)
+
+
+def make_session(pool_size=DEFAULT_POOL_SIZE, token=None, compress=True):
+    """
+    A requests.Session with a keep-alive pool of pool_size connections per
+    host. compress=False asks for uncompressed bodies (for range requests
+    and large binary transfers).
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate" if compress else "identity"
+    if token:
+        session.headers["Authorization"] = f"Bearer {token}"
+    return session
+
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def shared_session():
+    """The process-wide pooled session used by all clients."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = make_session()
+        return _SESSION
+
+
+class NemoClient:
+    """Base client: pooled session, timeouts and retries for one service base URL."""
+
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, session=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.session = session or shared_session()
+
+    def request(self, method, path, retry=None, retries=None, timeout=None, **kwargs):
+        """
+        Send a request and return the requests.Response (any status).
+
+        retry: force (True) or forbid (False) retries; by default only
+               idempotent methods are retried
+        Raises requests.RequestException once retries are exhausted.
+        """
+        method = method.upper()
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        attempts = 1 + ((self.retries if retries is None else retries) if retry else 0)
+        url = f"{self.base_url}{path}"
+        for attempt in range(1, attempts + 1):
+            try:
+                response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == attempts:
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"   ⚠️  {method} {path} failed ({type(e).__name__}), retrying in {delay:.1f}s "
+                      f"({attempt}/{attempts - 1})")
+                time.sleep(delay)
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt == attempts:
+                return response
+            delay = backoff_delay(attempt)
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = min(60, int(retry_after))
+            print(f"   ⚠️  {method} {path} returned HTTP {response.status_code}, retrying in {delay:.1f}s "
+                  f"({attempt}/{attempts - 1})")
+            response.close()
+            time.sleep(delay)
+
+    def get_json(self, path, missing_ok=False, **kwargs):
+        """GET and decode JSON. missing_ok: return None on 404. Raises NemoHTTPError on other errors."""
+        response = self.request("GET", path, **kwargs)
+        if missing_ok and response.status_code == 404:
+            return None
+        if not response.ok:
+            raise NemoHTTPError(response)
+        return response.json()
+
+    def get_json_if_changed(self, path, etag=None, **kwargs):
+        """
+        Conditional GET (If-None-Match: etag). Returns (data, etag), or
+        (None, etag) when the server answers 304 Not Modified. Servers
+        without ETag support always return the data (and etag None).
+        """
+        headers = dict(kwargs.pop("headers", None) or {})
+        if etag:
+            headers["If-None-Match"] = etag
+        response = self.request("GET", path, headers=headers, **kwargs)
+        if response.status_code == 304:
+            return None, etag
+        if not response.ok:
+            raise NemoHTTPError(response)
+        return response.json(), response.headers.get("ETag")
+
+    def exists(self, path, **kwargs):
+        """True if GET path returns 200."""
+        return self.request("GET", path, **kwargs).status_code == 200
+
+    def health(self, path, **kwargs):
+        """HTTP status of a health endpoint (raises requests.RequestException if unreachable)."""
+        kwargs.setdefault("timeout", 5)
+        kwargs.setdefault("retries", 1)
+        return self.request("GET", path, **kwargs).status_code
+
+
+class CustomizerClient(NemoClient):
+    """NeMo Customizer: /v1/customization/jobs."""
+
+    def list_jobs(self, page=1, limit=100, **params):
+        """One page of jobs. Extra params (e.g. sort, filter[status]) are passed through. Returns (jobs, pagination)."""
+        data = self.get_json("/v1/customization/jobs", params={"page": page, "limit": limit, **params})
+        return data.get("data", []), data.get("pagination", {})
+
+    def list_jobs_if_changed(self, etag=None, page=1, limit=100, **params):
+        """Like list_jobs, as a conditional request. Returns (jobs, pagination, etag); jobs is None if unchanged."""
+        data, etag = self.get_json_if_changed("/v1/customization/jobs", etag,
+                                              params={"page": page, "limit": limit, **params})
+        if data is None:
+            return None, None, etag
+        return data.get("data", []), data.get("pagination", {}), etag
+
+    def get_job(self, job_id, **kwargs):
+        """Job details, or None if the job does not exist."""
+        return self.get_json(f"/v1/customization/jobs/{quote(job_id)}", missing_ok=True, **kwargs)
+
+    def health(self, path="/v1/health/ready", **kwargs):
+        return super().health(path, **kwargs)
+
+
+class EntityStoreClient(NemoClient):
+    """NeMo Entity Store: /v1/models and /v1/namespaces."""
+
+    def get_model(self, model_path, **kwargs):
+        """Model entity for "<namespace>/<name>", or None if it is not registered."""
+        return self.get_json(f"/v1/models/{model_path}", missing_ok=True, **kwargs)
+
+    def model_exists(self, model_path, **kwargs):
+        return self.exists(f"/v1/models/{model_path}", **kwargs)
+
+    def get_namespace(self, namespace, **kwargs):
+        """Namespace entity, or None if it does not exist."""
+        return self.get_json(f"/v1/namespaces/{quote(namespace)}", missing_ok=True, **kwargs)
+
+    def create_namespace(self, namespace, **kwargs):
+        """Create a namespace (an existing one is not an error). Returns the HTTP status."""
+        response = self.request("POST", "/v1/namespaces", json={"id": namespace}, retry=True, **kwargs)
+        if response.status_code not in (200, 201, 409, 422):
+            raise NemoHTTPError(response)
+        return response.status_code
+
+    def health(self, path="/health", **kwargs):
+        return super().health(path, **kwargs)
+
+
+class DataStoreClient(NemoClient):
+    """NeMo DataStore: HuggingFace-compatible API under /v1/hf and /v1/datastore namespaces."""
+
+    def model_exists(self, repo_path, **kwargs):
+        """True if a model repo "<namespace>/<name>" exists."""
+        return self.exists(f"/v1/hf/models/{repo_path}", **kwargs)
+
+    def dataset_exists(self, repo_id, **kwargs):
+        """True if a dataset repo "<namespace>/<name>" exists."""
+        return self.exists(f"/v1/hf/api/datasets/{repo_id}", **kwargs)
+
+    def get_dataset_revision(self, repo_id, revision="main", **kwargs):
+        """Dataset repo info at a revision (e.g. "main"), or None if the repo or revision is missing."""
+        return self.get_json(f"/v1/hf/api/datasets/{repo_id}/revision/{quote(revision, safe='')}",
+                             missing_ok=True, **kwargs)
+
+    def get_namespace(self, namespace, **kwargs):
+        """Namespace, or None if it does not exist."""
+        return self.get_json(f"/v1/datastore/namespaces/{quote(namespace)}", missing_ok=True, **kwargs)
+
+    def create_namespace(self, namespace, **kwargs):
+        """Create a namespace (an existing one is not an error). Returns the HTTP status."""
+        response = self.request("POST", "/v1/datastore/namespaces", data={"namespace": namespace}, retry=True,
+                                **kwargs)
+        if response.status_code not in (200, 201, 409, 422):
+            raise NemoHTTPError(response)
+        return response.status_code
+
+    def health(self, path="/v1/health", **kwargs):
+        return super().health(path, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check NeMo microservice health through the shared client")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    health_parser = subparsers.add_parser("health", help="Check Customizer, Entity Store and DataStore")
+    health_parser.add_argument(
+        "--customizer-url",
+        default=os.getenv("CUSTOMIZER_URL") or os.getenv("CUSTOMIZER_URL_LOCAL", "http://localhost:8003"),
+        help="Customizer URL (default: CUSTOMIZER_URL or http://localhost:8003)"
+    )
+    health_parser.add_argument(
+        "--entity-store-url",
+        default=os.getenv("ENTITY_STORE_URL") or os.getenv("ENTITY_STORE_URL_LOCAL", "http://localhost:8002"),
+        help="Entity Store URL (default: ENTITY_STORE_URL or http://localhost:8002)"
+    )
+    health_parser.add_argument(
+        "--datastore-url",
+        default=os.getenv("DATASTORE_URL") or os.getenv("DATASTORE_URL_LOCAL", "http://localhost:8001"),
+        help="DataStore URL (default: DATASTORE_URL or http://localhost:8001)"
+    )
+    args = parser.parse_args()
+
+    healthy = True
+    for name, client in (
+        ("Customizer", CustomizerClient(args.customizer_url)),
+        ("Entity Store", EntityStoreClient(args.entity_store_url)),
+        ("DataStore", DataStoreClient(args.datastore_url)),
+    ):
+        started = time.monotonic()
+        try:
+            status = client.health()
+        except requests.RequestException as e:
+            print(f"❌ {name} unreachable at {client.base_url}: {e}")
+            healthy = False
+            continue
+        elapsed_ms = (time.monotonic() - started) * 1000
+        if status == 200:
+            print(f"✅ {name} is accessible ({elapsed_ms:.0f} ms)")
+        else:
+            print(f"⚠️  {name} health check returned: {status}")
+            healthy = False
+    return 0 if healthy else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Relay Model Files from DataStore to MinIO
+
+This script streams model files from the DataStore HuggingFace-compatible API
+straight into MinIO multipart uploads, without writing anything to local disk.
+Use it instead of download_model_from_datastore.py + upload_model_to_minio.py
+when the files in DataStore are already what the serving runtime needs
+(e.g. adapter-only exports).
+
+Memory is bounded: each file in flight holds at most a few parts of
+--part-size-mb in memory (see --parts-in-flight).
+
+Usage:
+    python relay_datastore_to_minio.py --model-info model_info.json --target-path models/llama-3.2-1b-instruct-cust-adapter
+
+    Or specify files_url directly:
+    python relay_datastore_to_minio.py --files-url "hf://<namespace>/model-name@1.0" --target-path models/model-name
+
+    From laptop (port-forwards for DataStore and MinIO):
+    MINIO_ENDPOINT=http://localhost:9000 python relay_datastore_to_minio.py --model-info model_info.json --target-path models/model-name
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from download_model_from_datastore import (
+    DATASTORE_URL,
+    NDS_TOKEN,
+    NMS_NAMESPACE,
+    parse_files_url,
+    DOWNLOAD_PROFILES,
+    resolve_repo_type,
+    list_remote_files,
+    select_files,
+)
+from upload_model_to_minio import (
+    DEFAULT_WORKERS,
+    DEFAULT_PART_SIZE_MB,
+    get_minio_config,
+    create_s3_client,
+    save_remote_manifest,
+)
+from nemo_client import make_session
+
+
+def read_exactly(stream, size):
+    """Read up to size bytes from a raw HTTP stream (short only at EOF)."""
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = stream.read(size - len(buf))
+        if not chunk:
+            break
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def relay_file(session, file_url, remote_file, s3_client, bucket, s3_key, part_size, parts_in_flight):
+    """
+    Stream one file from DataStore into S3.
+
+    Files smaller than part_size go up with a single PutObject; larger files
+    become a multipart upload where up to parts_in_flight parts are uploaded
+    while the next part is still being read. The sha256 is computed on the
+    fly and checked against the LFS oid when DataStore provides one.
+
+    Returns {"size", "sha256", "etag"} for the manifest.
+    """
+    digest = hashlib.sha256()
+    with session.get(file_url, stream=True, timeout=(10, 300)) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        stream = response.raw
+
+        first = read_exactly(stream, part_size)
+        digest.update(first)
+        if len(first) < part_size:
+            # Small file: single request
+            result = s3_client.put_object(Bucket=bucket, Key=s3_key, Body=first)
+            size = len(first)
+            etag = result['ETag'].strip('"')
+        else:
+            upload_id = s3_client.create_multipart_upload(Bucket=bucket, Key=s3_key)['UploadId']
+            slots = threading.BoundedSemaphore(parts_in_flight)
+
+            def upload_part(part_number, data):
+                try:
+                    result = s3_client.upload_part(
+                        Bucket=bucket, Key=s3_key, UploadId=upload_id,
+                        PartNumber=part_number, Body=data
+                    )
+                    return {"PartNumber": part_number, "ETag": result['ETag']}
+                finally:
+                    slots.release()
+
+            try:
+                futures = []
+                size = 0
+                with ThreadPoolExecutor(max_workers=parts_in_flight) as part_pool:
+                    data = first
+                    part_number = 1
+                    while data:
+                        size += len(data)
+                        slots.acquire()  # Blocks the reader while parts_in_flight parts are buffered
+                        futures.append(part_pool.submit(upload_part, part_number, data))
+                        data = read_exactly(stream, part_size)
+                        digest.update(data)
+                        part_number += 1
+                    parts = [f.result() for f in futures]
+                result = s3_client.complete_multipart_upload(
+                    Bucket=bucket, Key=s3_key, UploadId=upload_id,
+                    MultipartUpload={"Parts": parts}
+                )
+                etag = result['ETag'].strip('"')
+            except BaseException:
+                s3_client.abort_multipart_upload(Bucket=bucket, Key=s3_key, UploadId=upload_id)
+                raise
+
+    sha256 = digest.hexdigest()
+    expected = remote_file.get("sha256")
+    if expected and expected != sha256:
+        s3_client.delete_object(Bucket=bucket, Key=s3_key)
+        raise ValueError(f"sha256 mismatch (expected {expected[:12]}..., got {sha256[:12]}...)")
+    if size != remote_file["size"]:
+        s3_client.delete_object(Bucket=bucket, Key=s3_key)
+        raise ValueError(f"size mismatch (expected {remote_file['size']}, got {size})")
+
+    return {"size": size, "sha256": sha256, "etag": etag}
+
+
+def relay_model(files_url, target_path, minio_config, datastore_url=None,
+                workers=DEFAULT_WORKERS, part_size_mb=DEFAULT_PART_SIZE_MB, parts_in_flight=2,
+                profile="auto", include=None, exclude=None):
+    """Relay the files of a DataStore repo selected by profile into MinIO under target_path."""
+    if datastore_url is None:
+        datastore_url = DATASTORE_URL
+
+    try:
+        from huggingface_hub import HfApi, hf_hub_url
+    except ImportError:
+        print("❌ Error: huggingface_hub not installed")
+        print("   Install with: pip install huggingface_hub")
+        return False
+
+    part_size = part_size_mb * 1024 * 1024
+
+    print(f"\n🔁 Relaying model from DataStore to MinIO...")
+    print(f"   Files URL: {files_url}")
+    print(f"   DataStore URL: {datastore_url}")
+    print(f"   MinIO: {minio_config['endpoint']} (bucket: {minio_config['bucket']})")
+    print(f"   Target Path: {target_path}")
+    print(f"   Workers: {workers} file(s) in parallel, part size {part_size_mb} MB, "
+          f"{parts_in_flight} part(s) in flight per file")
+    print(f"   Max buffered: ~{workers * (parts_in_flight + 1) * part_size_mb} MB")
+
+    try:
+        repo_namespace, repo_name, repo_type, revision = parse_files_url(files_url)
+        repo_id = f"{repo_namespace}/{repo_name}"
+
+        hf_endpoint = f"{datastore_url}/v1/hf"
+        hf_token = NDS_TOKEN if NDS_TOKEN != "token" else None
+        api = HfApi(endpoint=hf_endpoint, token=hf_token)
+
+        actual_repo_type = resolve_repo_type(api, repo_id, repo_type)
+        if actual_repo_type is None:
+            print(f"   ❌ Repository not found as model or dataset: {repo_id}")
+            return False
+        print(f"   ✅ Repository found as {actual_repo_type}: {repo_id}")
+        if revision:
+            print(f"   📌 Using revision: {revision}")
+
+        all_remote_files = list_remote_files(api, repo_id, actual_repo_type, revision)
+        profile, remote_files = select_files(all_remote_files, profile, include, exclude)
+        print(f"   🎯 Profile: {profile} ({len(remote_files)} of {len(all_remote_files)} file(s))")
+        if not all_remote_files:
+            print(f"\n⚠️  WARNING: Repository appears to be empty!")
+            print(f"   Check EntityHandler logs to verify export completed, then retry.")
+            return False
+        if not remote_files:
+            print(f"\n❌ No files match profile '{profile}' (try --profile full or --include <glob>)")
+            return False
+
+        # Largest first so big shards start early
+        remote_files.sort(key=lambda f: f["size"], reverse=True)
+        total_bytes = sum(f["size"] for f in remote_files)
+        print(f"\n📋 Found {len(remote_files)} files to relay ({total_bytes / (1024 * 1024):.1f} MB)")
+
+        s3_client = create_s3_client(minio_config, max_pool_connections=max(10, workers * parts_in_flight))
+        if s3_client is None:
+            return False
+        bucket = minio_config['bucket']
+
+        session = make_session(pool_size=workers, token=hf_token, compress=False)
+
+        def relay_one(remote_file):
+            file_url = hf_hub_url(
+                repo_id, remote_file["path"],
+                repo_type=actual_repo_type, revision=revision, endpoint=hf_endpoint
+            )
+            s3_key = f"{target_path}/{remote_file['path']}"
+            return relay_file(session, file_url, remote_file, s3_client, bucket, s3_key, part_size, parts_in_flight)
+
+        manifest = {}
+        failed_count = 0
+        start_time = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(relay_one, f): f for f in remote_files}
+            for future in as_completed(futures):
+                remote_file = futures[future]
+                try:
+                    manifest[remote_file["path"]] = future.result()
+                    print(f"   ✅ {target_path}/{remote_file['path']} ({remote_file['size']:,} bytes)")
+                except Exception as e:
+                    failed_count += 1
+                    print(f"   ⚠️  Failed to relay {remote_file['path']}: {str(e)[:80]}")
+
+        # Same manifest format as upload_model_to_minio.py, so --sync works on top of it
+        save_remote_manifest(s3_client, bucket, target_path, manifest, complete=failed_count == 0)
+
+        elapsed = max(time.monotonic() - start_time, 1e-6)
+        print(f"\n✅ Relay complete!")
+        print(f"   Relayed: {len(manifest)} files in {elapsed:.1f}s ({total_bytes / (1024 * 1024) / elapsed:.1f} MB/s)")
+        if failed_count > 0:
+            print(f"   Failed: {failed_count} files")
+
+        return failed_count == 0
+
+    except Exception as e:
+        print(f"\n❌ Error relaying model: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream model files from DataStore straight into MinIO (no local staging)"
+    )
+    parser.add_argument(
+        "--model-info",
+        type=str,
+        help="JSON file with model information (from export_model_from_entity_store.py)"
+    )
+    parser.add_argument(
+        "--files-url",
+        type=str,
+        help="Files URL directly (e.g., hf://datasets/namespace/model-name)"
+    )
+    parser.add_argument(
+        "--target-path",
+        type=str,
+        required=True,
+        help="Target path in MinIO (e.g., models/llama-3.2-1b-instruct-custom)"
+    )
+    parser.add_argument(
+        "--datastore-url",
+        type=str,
+        default=DATASTORE_URL,
+        help=f"DataStore URL (default: {DATASTORE_URL})"
+    )
+    parser.add_argument("--minio-endpoint", type=str, help="MinIO endpoint URL (overrides secret)")
+    parser.add_argument("--minio-bucket", type=str, help="MinIO bucket name (overrides secret)")
+    parser.add_argument("--minio-access-key", type=str, help="MinIO access key (overrides secret)")
+    parser.add_argument("--minio-secret-key", type=str, help="MinIO secret key (overrides secret)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Files relayed in parallel (default: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--part-size-mb",
+        type=int,
+        default=DEFAULT_PART_SIZE_MB,
+        help=f"Multipart part size in MB (default: {DEFAULT_PART_SIZE_MB})"
+    )
+    parser.add_argument(
+        "--parts-in-flight",
+        type=int,
+        default=2,
+        help="Parts uploaded concurrently per file while the next part is read (default: 2)"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["auto"] + list(DOWNLOAD_PROFILES),
+        default="auto",
+        help="Files to relay (see download_model_from_datastore.py --help). Default: auto"
+    )
+    parser.add_argument("--include", action="append", default=[], help="Extra glob to relay (repeatable)")
+    parser.add_argument("--exclude", action="append", default=[], help="Glob to skip (repeatable)")
+
+    args = parser.parse_args()
+
+    if args.model_info:
+        try:
+            with open(args.model_info, 'r') as f:
+                files_url = json.load(f).get("files_url")
+            if not files_url:
+                print(f"❌ Error: files_url not found in {args.model_info}")
+                sys.exit(1)
+        except Exception as e:
+            print(f"❌ Error reading model info file: {e}")
+            sys.exit(1)
+    elif args.files_url:
+        files_url = args.files_url
+    else:
+        print("❌ Error: Either --model-info or --files-url must be provided")
+        parser.print_help()
+        sys.exit(1)
+
+    if args.workers < 1 or args.parts_in_flight < 1:
+        print("❌ Error: --workers and --parts-in-flight must be at least 1")
+        sys.exit(1)
+    if args.part_size_mb < 5:
+        print("❌ Error: --part-size-mb must be at least 5 (S3 minimum part size)")
+        sys.exit(1)
+
+    if args.minio_endpoint and args.minio_bucket and args.minio_access_key and args.minio_secret_key:
+        minio_config = {
+            "endpoint": args.minio_endpoint,
+            "bucket": args.minio_bucket,
+            "access_key": args.minio_access_key,
+            "secret_key": args.minio_secret_key
+        }
+    else:
+        minio_config = get_minio_config()
+        if not minio_config:
+            print("\n❌ Error: Could not get MinIO configuration")
+            print("   Use --minio-endpoint, --minio-bucket, --minio-access-key, --minio-secret-key")
+            sys.exit(1)
+        override = os.getenv("MINIO_ENDPOINT")
+        if override:
+            minio_config = {**minio_config, "endpoint": override}
+
+    print("=" * 70)
+    print("Relay Model from DataStore to MinIO")
+    print("=" * 70)
+    print(f"Namespace: {NMS_NAMESPACE}")
+
+    success = relay_model(
+        files_url,
+        args.target_path,
+        minio_config,
+        datastore_url=args.datastore_url,
+        workers=args.workers,
+        part_size_mb=args.part_size_mb,
+        parts_in_flight=args.parts_in_flight,
+        profile=args.profile,
+        include=args.include,
+        exclude=args.exclude
+    )
+
+    if success:
+        print(f"\n✅ Model relayed successfully to MinIO: {args.target_path}")
+        print(f"\n📋 Next steps:")
+        print(f"   1. Point the InferenceService at {args.target_path}")
+        print(f"   2. Re-run with upload_model_to_minio.py --sync later to push local changes only")
+        return 0
+    else:
+        print(f"\n❌ Failed to relay model")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
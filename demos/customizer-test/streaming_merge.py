@@ -0,0 +1,630 @@
+#!/usr/bin/env python3
+"""
+Streaming LoRA Merge
+
+Memory-bounded alternative to PeftModel.merge_and_unload(): the base model's
+safetensors shards are memory-mapped and processed one tensor at a time
+(W += scale * B @ A), and output shards are written incrementally. Peak
+memory is bounded by the largest single tensor (plus the adapter, which is
+small) instead of the whole model, so 8B-class models merge on CPU-only
+nodes.
+
+Output shards are merged in parallel by a process pool; each worker
+memory-maps the base shards its output shard draws from and writes that
+shard, and the parent assembles model.safetensors.index.json from what the
+workers report.
+
+The output dtype and shard size are configurable. Deltas are always
+accumulated in fp32 and each tensor is cast to the output dtype once. With
+a maximum shard size the tensors are re-split into evenly sized shards,
+which the serving runtime can load in parallel without one large shard
+dominating load time.
+
+Several adapters for the same base can be merged in one pass: each base
+tensor is read once and written to every adapter's output.
+
+Outputs can also be s3://bucket/prefix URLs: each output shard is then
+streamed into a multipart upload while it is being merged (no local copy),
+and the index, config/tokenizer files and upload manifest are written last.
+
+Used by merge_adapter_with_base.py --engine streaming.
+"""
+
+import os
+import re
+import json
+import math
+import hashlib
+import struct
+import multiprocessing
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import torch
+from safetensors import safe_open
+
+from artifact_cache import link_or_copy
+from merge_adapter_with_base import TOKENIZER_FILES
+from model_manifest import HashingWriter, read_safetensors_header, write_manifest
+
+# safetensors dtype names <-> torch dtypes
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+TORCH_TO_SAFETENSORS = {v: k for k, v in SAFETENSORS_DTYPES.items()}
+FLOAT_DTYPES = {"F64", "F32", "F16", "BF16"}
+
+# Output dtype options (torch names, as in config.json) <-> safetensors names
+TORCH_NAME_TO_SAFETENSORS = {"bfloat16": "BF16", "float16": "F16", "float32": "F32"}
+CONFIG_DTYPE_NAMES = {v: k for k, v in TORCH_NAME_TO_SAFETENSORS.items()}
+
+INDEX_NAME = "model.safetensors.index.json"
+
+# Non-weight files copied from the base model (config and tokenizer, including
+# the BPE vocab.json/merges.txt the transformers engine also ships)
+SUPPORT_FILE_GLOBS = [
+    "config.json", "generation_config.json",
+    *TOKENIZER_FILES, "tokenizer*", "*.tiktoken", "chat_template*",
+]
+
+# Adapter keys look like base_model.model.<module>.lora_A[.<adapter>].weight
+LORA_KEY = re.compile(
+    r"^(?:base_model\.model\.)?(?P<module>.+?)\."
+    r"(?P<kind>lora_A|lora_B|lora_embedding_A|lora_embedding_B)(?:\.[^.]+)?$"
+)
+
+
+def tensor_nbytes(dtype, shape):
+    return math.prod(shape) * SAFETENSORS_DTYPES[dtype].itemsize
+
+
+def tensor_bytes(tensor):
+    """Raw little-endian bytes of a tensor, as a buffer (no extra copy for contiguous tensors)."""
+    return tensor.detach().contiguous().reshape(-1).view(torch.uint8).numpy()
+
+
+class SafetensorsWriter:
+    """
+    Write a safetensors file tensor by tensor.
+
+    The full layout (name, dtype, shape) is known before any weight is
+    computed, so the header is written first and each tensor is appended as
+    soon as it is ready; nothing but the current tensor is held in memory.
+    sink is any binary file-like object with write().
+    """
+
+    def __init__(self, sink, layout, metadata=None):
+        self.sink = sink
+        self.layout = list(layout)
+        header = {"__metadata__": dict(metadata or {"format": "pt"})}
+        offset = 0
+        for name, dtype, shape in self.layout:
+            size = tensor_nbytes(dtype, shape)
+            header[name] = {"dtype": dtype, "shape": list(shape), "data_offsets": [offset, offset + size]}
+            offset += size
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        header_bytes += b" " * (-len(header_bytes) % 8)  # 8-byte alignment, like safetensors
+        self.sink.write(struct.pack("<Q", len(header_bytes)))
+        self.sink.write(header_bytes)
+        self.data_bytes = offset
+        self._next = 0
+
+    def write(self, name, tensor):
+        expected_name, dtype, shape = self.layout[self._next]
+        if name != expected_name:
+            raise ValueError(f"Tensor written out of order: expected {expected_name}, got {name}")
+        if TORCH_TO_SAFETENSORS[tensor.dtype] != dtype or list(tensor.shape) != list(shape):
+            raise ValueError(f"Tensor {name} does not match the planned layout")
+        self.sink.write(tensor_bytes(tensor))
+        self._next += 1
+
+    def close(self):
+        if self._next != len(self.layout):
+            raise ValueError(f"Only {self._next} of {len(self.layout)} tensors were written")
+
+
+def resolve_base_model_dir(base_model, hf_token=None):
+    """Local directory holding the base model's safetensors shards (downloaded if needed)."""
+    path = Path(base_model)
+    if path.is_dir():
+        return path
+    from huggingface_hub import snapshot_download
+    return Path(snapshot_download(
+        base_model,
+        token=hf_token,
+        allow_patterns=["*.safetensors", "*.json", "tokenizer*", "*.tiktoken", "*.model", "chat_template*",
+                        *TOKENIZER_FILES]
+    ))
+
+
+def base_weight_files(base_dir):
+    """Ordered list of the base model's safetensors shard file names."""
+    index_path = base_dir / INDEX_NAME
+    if index_path.exists():
+        weight_map = json.loads(index_path.read_text())["weight_map"]
+        return sorted(set(weight_map.values()))
+    if (base_dir / "model.safetensors").exists():
+        return ["model.safetensors"]
+    return sorted(p.name for p in base_dir.glob("*.safetensors") if not p.name.startswith("adapter"))
+
+
+def _pattern_value(patterns, module, default):
+    for pattern, value in (patterns or {}).items():
+        if re.fullmatch(rf"(.*\.)?{pattern}", module):
+            return value
+    return default
+
+
+def load_adapter(adapter_dir):
+    """
+    Load a PEFT LoRA adapter.
+
+    Returns (config, deltas, replacements): deltas maps a base tensor name to
+    its LoRA factors and scale; replacements maps base tensor names to full
+    tensors saved via modules_to_save. The adapter is small, so it is kept in
+    memory.
+    """
+    from safetensors.torch import load_file
+
+    adapter_dir = Path(adapter_dir)
+    config = json.loads((adapter_dir / "adapter_config.json").read_text())
+    if config.get("peft_type", "LORA") != "LORA":
+        raise ValueError(f"Unsupported adapter type: {config.get('peft_type')}")
+    if config.get("use_dora"):
+        raise ValueError("DoRA adapters are not supported by the streaming engine (use --engine transformers)")
+    if config.get("lora_bias"):
+        raise ValueError("Adapters with lora_bias are not supported by the streaming engine (use --engine transformers)")
+
+    factors = {}
+    replacements = {}
+    for key, tensor in load_file(str(adapter_dir / "adapter_model.safetensors")).items():
+        match = LORA_KEY.match(key[:-len(".weight")] if key.endswith(".weight") else key)
+        if match and key.endswith(".bias"):
+            raise ValueError(f"Adapters with LoRA bias ({key}) are not supported by the streaming engine "
+                             f"(use --engine transformers)")
+        if match:
+            factors.setdefault(match.group("module"), {})[match.group("kind")] = tensor
+        else:
+            name = key[len("base_model.model."):] if key.startswith("base_model.model.") else key
+            # PEFT names the wrapped layer's own tensors <module>.base_layer.<param>
+            replacements[name.replace(".base_layer.", ".")] = tensor
+
+    deltas = {}
+    for module, parts in factors.items():
+        embedding = "lora_embedding_A" in parts
+        a = parts.get("lora_embedding_A" if embedding else "lora_A")
+        b = parts.get("lora_embedding_B" if embedding else "lora_B")
+        if a is None or b is None:
+            raise ValueError(f"Incomplete LoRA factors for {module}")
+        rank = a.shape[0]
+        alpha = _pattern_value(config.get("alpha_pattern"), module, config.get("lora_alpha", rank))
+        scale = alpha / math.sqrt(rank) if config.get("use_rslora") else alpha / rank
+        deltas[f"{module}.weight"] = {"A": a, "B": b, "scale": scale, "embedding": embedding}
+    return config, deltas, replacements
+
+
+def apply_delta(weight, delta, fan_in_fan_out=False):
+    """Return weight + scale * (B @ A), accumulated in fp32."""
+    merged = weight.to(torch.float32, copy=True)
+    a = delta["A"].to(torch.float32)
+    b = delta["B"].to(torch.float32)
+    if delta["embedding"] or fan_in_fan_out:
+        # Weight is stored as [in, out]: add (B @ A)^T = A^T @ B^T
+        merged.addmm_(a.T, b.T, alpha=delta["scale"])
+    else:
+        merged.addmm_(b, a, alpha=delta["scale"])
+    return merged
+
+
+def is_remote(output):
+    return str(output).startswith("s3://")
+
+
+def output_join(output, name):
+    """Path of name inside an output directory or s3:// prefix."""
+    if is_remote(output):
+        return f"{str(output).rstrip('/')}/{name}"
+    return Path(output) / name
+
+
+# S3 client and upload settings for s3:// outputs, one per process (see set_object_store)
+_OBJECT_STORE = None
+
+
+def set_object_store(object_store):
+    """
+    Configure s3:// outputs for this process. object_store is
+    {"minio_config": ..., "part_size_mb": ..., "parts_in_flight": ...}.
+    """
+    global _OBJECT_STORE
+    if object_store is None:
+        _OBJECT_STORE = None
+        return
+    from upload_model_to_minio import create_s3_client
+    client = create_s3_client(object_store["minio_config"],
+                              max_pool_connections=max(10, 2 * object_store["parts_in_flight"]))
+    if client is None:
+        raise ImportError("boto3 is required for s3:// outputs")
+    _OBJECT_STORE = {**object_store, "client": client}
+
+
+def open_output(output_shard):
+    """
+    Binary sink for an output shard: a local file or a multipart upload.
+    Either way the sha256 is computed while the bytes are written.
+    """
+    if not is_remote(output_shard):
+        return HashingWriter(open(output_shard, "wb"))
+    from upload_model_to_minio import MultipartUploadWriter, parse_s3_url
+    if _OBJECT_STORE is None:
+        raise RuntimeError(f"No object store configured for {output_shard}")
+    bucket, key = parse_s3_url(output_shard)
+    return MultipartUploadWriter(
+        _OBJECT_STORE["client"], bucket, key,
+        _OBJECT_STORE["part_size_mb"] * 1024 * 1024, _OBJECT_STORE["parts_in_flight"]
+    )
+
+
+def plan_output_shards(base_dir, shards, output_dtype=None, max_shard_bytes=None):
+    """
+    Lay out the merged model's tensors in output shards.
+
+    Tensors keep the base model's order. With output_dtype (a safetensors
+    dtype name), floating-point tensors are stored in that dtype. Without
+    max_shard_bytes the base model's shard layout is mirrored; otherwise the
+    tensors are split into the fewest shards that fit the limit, with the
+    boundaries placed so the shards come out evenly sized (a single tensor
+    larger than the limit gets a shard of its own).
+
+    Returns [(shard name, [(tensor name, base shard, dtype, shape), ...]), ...].
+    """
+    tensors = []
+    for shard in shards:
+        header, _ = read_safetensors_header(base_dir / shard)
+        for name in sorted(header, key=lambda n: header[n]["data_offsets"][0]):
+            dtype = header[name]["dtype"]
+            if output_dtype and dtype in FLOAT_DTYPES:
+                dtype = output_dtype
+            tensors.append((name, shard, dtype, header[name]["shape"]))
+
+    if not max_shard_bytes:
+        groups = [[t for t in tensors if t[1] == shard] for shard in shards]
+        return list(zip(shards, groups))
+
+    sizes = [tensor_nbytes(dtype, shape) for _, _, dtype, shape in tensors]
+    total = sum(sizes)
+    count = max(1, math.ceil(total / max_shard_bytes))
+    while True:
+        target = total / count
+        groups = [[] for _ in range(count)]
+        group_sizes = [0] * count
+        offset = 0
+        for tensor, size in zip(tensors, sizes):
+            # Assign by the tensor's midpoint so boundaries fall near multiples of target
+            group = min(count - 1, int((offset + size / 2) // target)) if target else 0
+            groups[group].append(tensor)
+            group_sizes[group] += size
+            offset += size
+        fits = all(size <= max_shard_bytes or len(g) == 1 for g, size in zip(groups, group_sizes))
+        if fits or count >= len(tensors):
+            break
+        count += 1
+    groups = [g for g in groups if g]
+    if len(groups) == 1:
+        return [("model.safetensors", groups[0])]
+    return [(f"model-{i + 1:05d}-of-{len(groups):05d}.safetensors", g) for i, g in enumerate(groups)]
+
+
+def merge_output_shard(base_dir, entries, targets):
+    """
+    Write one planned output shard per adapter, reading each base tensor
+    from its memory-mapped shard once.
+
+    entries is the shard's plan from plan_output_shards(); targets is a list
+    of (output_shard, deltas, replacements, fan_in_fan_out). LoRA deltas are
+    accumulated in fp32 and every tensor is cast to its output dtype once.
+    Returns (LoRA deltas applied per target, output file info per target:
+    {"size", "sha256"}, plus "etag" for s3:// outputs).
+    """
+    layout = [(name, dtype, shape) for name, _, dtype, shape in entries]
+    applied = [0] * len(targets)
+    outputs = []
+    sinks = []
+    failed = True
+    try:
+        writers = []
+        for output_shard, _, _, _ in targets:
+            sinks.append(open_output(output_shard))
+            writers.append(SafetensorsWriter(sinks[-1], layout, {"format": "pt"}))
+        with ExitStack() as stack:
+            bases = {}
+            for name, base_shard, dtype, _ in entries:
+                if base_shard not in bases:
+                    bases[base_shard] = stack.enter_context(safe_open(str(base_dir / base_shard), framework="pt"))
+                base_tensor = bases[base_shard].get_tensor(name)
+                out_dtype = SAFETENSORS_DTYPES[dtype]
+                for i, (_, deltas, replacements, fan_in_fan_out) in enumerate(targets):
+                    # A saved embedding layer replaces the base tensor; its LoRA delta still applies on top
+                    source = replacements.get(name, base_tensor)
+                    if name in deltas:
+                        tensor = apply_delta(source, deltas[name], fan_in_fan_out).to(out_dtype)
+                        applied[i] += 1
+                    else:
+                        tensor = source.to(out_dtype)
+                    writers[i].write(name, tensor)
+                    del tensor
+                del base_tensor
+        for writer in writers:
+            writer.close()
+        for sink in sinks:
+            outputs.append(sink.close())
+        failed = False
+    finally:
+        if failed:
+            for sink in sinks:
+                sink.abort()
+    return applied, outputs
+
+
+# Adapters loaded once per worker process (see _init_worker)
+_WORKER_ADAPTERS = None
+
+
+def _init_worker(adapter_dirs, torch_threads, object_store=None):
+    global _WORKER_ADAPTERS
+    torch.set_num_threads(torch_threads)
+    set_object_store(object_store)
+    _WORKER_ADAPTERS = [load_adapter(adapter_dir) for adapter_dir in adapter_dirs]
+
+
+def _merge_shard_task(base_dir, entries, output_shards):
+    """Process-pool task: write one planned output shard for each of the worker's adapters."""
+    targets = [
+        (output_shard, deltas, replacements, bool(config.get("fan_in_fan_out")))
+        for output_shard, (config, deltas, replacements) in zip(output_shards, _WORKER_ADAPTERS)
+    ]
+    return merge_output_shard(base_dir, entries, targets)
+
+
+def support_files(base_dir, output_dtype=None):
+    """
+    Config and tokenizer files of the base model, as [(name, bytes)]. When
+    the output dtype changes, config.json is updated to declare it.
+    """
+    files = []
+    seen = set()
+    for pattern in SUPPORT_FILE_GLOBS:
+        for src in sorted(base_dir.glob(pattern)):
+            if not src.is_file() or src.name == INDEX_NAME or src.name in seen:
+                continue
+            seen.add(src.name)
+            body = src.read_bytes()
+            if src.name == "config.json" and output_dtype:
+                config = json.loads(body)
+                for key in [k for k in ("torch_dtype", "dtype") if k in config] or ["torch_dtype"]:
+                    config[key] = CONFIG_DTYPE_NAMES[output_dtype]
+                body = (json.dumps(config, indent=2, sort_keys=True) + "\n").encode("utf-8")
+            files.append((src.name, body))
+    return files
+
+
+def finish_remote_output(output, support, index_json, shard_files):
+    """
+    Write the non-shard files of an s3:// output after all shards are
+    uploaded: index, config/tokenizer files, then the upload manifest (same
+    format as upload_model_to_minio.py, so --sync can skip these files).
+    """
+    from upload_model_to_minio import parse_s3_url, save_remote_manifest
+    client = _OBJECT_STORE["client"]
+    bucket, prefix = parse_s3_url(output)
+    files = dict(shard_files)
+    uploads = list(support)
+    if index_json is not None:
+        uploads.insert(0, (INDEX_NAME, json.dumps(index_json, indent=2).encode("utf-8")))
+    for name, body in uploads:
+        result = client.put_object(Bucket=bucket, Key=f"{prefix}/{name}", Body=body)
+        files[name] = {"size": len(body), "sha256": hashlib.sha256(body).hexdigest(),
+                       "etag": result['ETag'].strip('"')}
+    save_remote_manifest(client, bucket, prefix, files)
+
+
+def merge_adapter_streaming(adapter_dir, base_model, output_path, hf_token=None, workers=1, object_store=None,
+                            output_dtype="auto", max_shard_size=None):
+    """
+    Merge a LoRA adapter into the base model shard by shard.
+
+    With workers > 1, output shards are merged concurrently in a process pool
+    (one shard per task). output_dtype ("auto" keeps the base dtype, or
+    "bfloat16"/"float16"/"float32") and max_shard_size (bytes; None mirrors
+    the base shards) control the output layout. output_path may be an s3://
+    URL (see object_store in merge_adapters_streaming). Returns True on success.
+    """
+    return merge_adapters_streaming(
+        [adapter_dir], base_model, [output_path], hf_token, workers, object_store, output_dtype, max_shard_size
+    )[0]
+
+
+def merge_adapters_streaming(adapter_dirs, base_model, output_paths, hf_token=None, workers=1, object_store=None,
+                             output_dtype="auto", max_shard_size=None):
+    """
+    Merge several LoRA adapters into the same base model in one pass.
+
+    Each base shard is memory-mapped and read once; every tensor is written
+    to each adapter's output directory with that adapter's delta applied.
+    Outputs given as s3://bucket/prefix are streamed into multipart uploads
+    configured by object_store ({"minio_config", "part_size_mb",
+    "parts_in_flight"}); a shard uploads while it is merged, so upload time
+    overlaps with compute. output_dtype and max_shard_size are as in
+    merge_adapter_streaming(). Returns a list of booleans, one per adapter
+    (adapters that fail to load or do not match the base model are skipped).
+    """
+    results = [False] * len(adapter_dirs)
+    print("📥 Resolving base model safetensors shards...")
+    print(f"   Model: {base_model}")
+    try:
+        base_dir = resolve_base_model_dir(base_model, hf_token)
+    except Exception as e:
+        print(f"❌ Error resolving base model: {e}")
+        print("   For gated models, set HF_TOKEN environment variable")
+        return results
+
+    shards = base_weight_files(base_dir)
+    if not shards:
+        print(f"❌ Error: no safetensors weights found in {base_dir}")
+        print("   The streaming engine needs safetensors shards; use --engine transformers for .bin checkpoints")
+        return results
+    print(f"✅ Base model: {base_dir} ({len(shards)} shard(s))")
+    print()
+
+    base_names = {}
+    for shard in shards:
+        header, _ = read_safetensors_header(base_dir / shard)
+        for name in header:
+            base_names[name] = shard
+
+    print(f"📥 Loading {len(adapter_dirs)} LoRA adapter(s)..." if len(adapter_dirs) > 1 else "📥 Loading LoRA adapter...")
+    active = []
+    for index, adapter_dir in enumerate(adapter_dirs):
+        try:
+            config, deltas, replacements = load_adapter(adapter_dir)
+        except Exception as e:
+            print(f"❌ Error loading adapter {adapter_dir}: {e}")
+            continue
+        # Every adapter target must exist in the base model
+        missing = sorted(set(deltas) - set(base_names)) + sorted(set(replacements) - set(base_names))
+        if missing:
+            print(f"❌ Error: {len(missing)} target(s) of {adapter_dir} not found in the base model, e.g. {missing[0]}")
+            print("   Ensure adapter matches base model architecture")
+            continue
+        print(f"✅ Adapter loaded: {adapter_dir} ({len(deltas)} LoRA module(s), {len(replacements)} replaced tensor(s))")
+        active.append((index, config, deltas, replacements))
+    print()
+    if not active:
+        return results
+
+    if any(is_remote(output_paths[index]) for index, _, _, _ in active):
+        if object_store is None:
+            print("❌ Error: s3:// output given but no object store configured")
+            return results
+        try:
+            set_object_store(object_store)
+        except ImportError as e:
+            print(f"❌ Error: cannot write to object storage: {e}")
+            return results
+        print(f"☁️  Streaming output shards to object storage "
+              f"({object_store['part_size_mb']} MB parts, {object_store['parts_in_flight']} in flight per shard)")
+
+    out_dtype = None if output_dtype in (None, "auto") else TORCH_NAME_TO_SAFETENSORS[output_dtype]
+    plan = plan_output_shards(base_dir, shards, out_dtype, max_shard_size)
+    plan_sizes = [sum(tensor_nbytes(dtype, shape) for _, _, dtype, shape in entries) for _, entries in plan]
+    print(f"📐 Output layout: {len(plan)} shard(s), {min(plan_sizes) / 1024 ** 2:.0f}-"
+          f"{max(plan_sizes) / 1024 ** 2:.0f} MB each, dtype {output_dtype or 'auto'}")
+
+    workers = max(1, min(workers, len(plan)))
+    print(f"🔀 Merging {len(active)} adapter(s) shard by shard (streaming, {workers} worker process(es))...")
+    weight_map = {}
+    total_size = [0] * len(active)
+    total_applied = [0] * len(active)
+    shard_files = [{} for _ in active]
+    done = 0
+
+    def record(shard, entries, applied, outputs):
+        nonlocal done
+        for name, _, _, _ in entries:
+            weight_map[name] = shard
+        for i in range(len(active)):
+            total_size[i] += outputs[i]["size"]
+            total_applied[i] += applied[i]
+            shard_files[i][shard] = outputs[i]
+        done += 1
+        print(f"   ✅ [{done}/{len(plan)}] {shard}: {len(entries)} tensors, "
+              f"{', '.join(str(a) for a in applied)} LoRA delta(s) applied")
+
+    try:
+        if workers == 1:
+            for shard, entries in plan:
+                targets = [
+                    (output_join(output_paths[index], shard), deltas, replacements, bool(config.get("fan_in_fan_out")))
+                    for index, config, deltas, replacements in active
+                ]
+                applied, outputs = merge_output_shard(base_dir, entries, targets)
+                record(shard, entries, applied, outputs)
+        else:
+            # spawn: the parent has already run torch ops, which makes fork unsafe
+            torch_threads = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=([str(adapter_dirs[index]) for index, _, _, _ in active], torch_threads, object_store)
+            ) as executor:
+                futures = {
+                    executor.submit(
+                        _merge_shard_task,
+                        base_dir,
+                        entries,
+                        [output_join(output_paths[index], shard) for index, _, _, _ in active]
+                    ): (shard, entries)
+                    for shard, entries in plan
+                }
+                for future in as_completed(futures):
+                    applied, outputs = future.result()
+                    record(*futures[future], applied, outputs)
+    except Exception as e:
+        print(f"❌ Error merging adapter: {e}")
+        import traceback
+        traceback.print_exc()
+        return results
+
+    # Support files are written to the first local output and linked into the others.
+    # Local outputs get a model_manifest.json built from the digests computed while writing.
+    support = support_files(base_dir, out_dtype)
+    copied = [name for name, _ in support]
+    first_output = None
+    support_digests = {name: hashlib.sha256(body).hexdigest() for name, body in support}
+    for i, (index, _, _, _) in enumerate(active):
+        index_json = None
+        if len(plan) > 1:
+            index_json = {"metadata": {"total_size": total_size[i]}, "weight_map": dict(sorted(weight_map.items()))}
+        if is_remote(output_paths[index]):
+            try:
+                finish_remote_output(output_paths[index], support, index_json, shard_files[i])
+            except Exception as e:
+                print(f"❌ Error writing {output_paths[index]}: {e}")
+                continue
+            results[index] = True
+            continue
+        output_path = Path(output_paths[index])
+        digests = {shard: info["sha256"] for shard, info in shard_files[i].items()}
+        if index_json is not None:
+            body = json.dumps(index_json, indent=2).encode("utf-8")
+            (output_path / INDEX_NAME).write_bytes(body)
+            digests[INDEX_NAME] = hashlib.sha256(body).hexdigest()
+        if first_output is None:
+            for name, body in support:
+                (output_path / name).unlink(missing_ok=True)
+                (output_path / name).write_bytes(body)
+            first_output = output_path
+        else:
+            for name in copied:
+                link_or_copy(first_output / name, output_path / name)
+        digests.update(support_digests)
+        write_manifest(output_path, digests)
+        results[index] = True
+    if len(active) == 1:
+        print(f"✅ Merge complete: {total_applied[0]} LoRA delta(s) applied, "
+              f"{len(copied)} config/tokenizer file(s) copied")
+    else:
+        print(f"✅ Merge complete: {len(active)} adapter(s), {len(copied)} config/tokenizer file(s) shared")
+    print()
+    return results
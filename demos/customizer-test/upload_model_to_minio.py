@@ -12,8 +12,19 @@ Usage:
     oc port-forward -n $NAMESPACE svc/nemo-infra-minio 9000:80
     MINIO_ENDPOINT=http://localhost:9000 python upload_model_to_minio.py --model-dir ./merged_model --target-path models/llama-3.2-1b-instruct-cust
     
+    Tune parallelism (files in flight / multipart part size):
+    python upload_model_to_minio.py --model-dir ./merged_model --target-path models/llama-3.2-1b-instruct-cust --workers 8 --part-size-mb 128
+    
     Or update existing base model path:
     python upload_model_to_minio.py --model-dir ./merged_model --update-existing
+    
+    Stage an immutable version and promote it to the serving path (server-side copy);
+    roll back to the previously served version later:
+    python upload_model_to_minio.py --model-dir ./merged_model --target-path models/llama-3.2-1b-instruct-cust --version v2
+    python upload_model_to_minio.py --target-path models/llama-3.2-1b-instruct-cust --rollback
+    
+    Re-upload only files that changed since the last upload (and drop removed ones):
+    python upload_model_to_minio.py --model-dir ./merged_model --update-existing --sync --delete-stale
 """
 
 import os
@@ -22,8 +33,15 @@ import json
 import argparse
 import subprocess
 import base64
+import hashlib
+import time
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+from model_manifest import MANIFEST_NAME as LOCAL_MANIFEST_NAME, load_manifest
+
 # Load environment variables from env.donotcommit if it exists
 try:
     from dotenv import load_dotenv
@@ -36,6 +54,19 @@ except ImportError:
 # Configuration
 NMS_NAMESPACE = os.getenv("NMS_NAMESPACE", "anemo-rhoai")
 
+# Parallel upload defaults (override with --workers / --part-size-mb)
+DEFAULT_WORKERS = int(os.getenv("MINIO_UPLOAD_WORKERS", "4"))
+DEFAULT_PART_SIZE_MB = int(os.getenv("MINIO_PART_SIZE_MB", "64"))
+
+# Manifest object written under every target path; records size, sha256 and
+# ETag of each uploaded file so --sync can skip files that did not change
+MANIFEST_NAME = ".upload_manifest.json"
+
+# Staged versions live next to (not under) the serving path, so the serving
+# runtime never downloads them: <serving_path>.versions/<version>/
+VERSIONS_SUFFIX = ".versions"
+PROMOTIONS_NAME = "promotions.json"
+
 
 def get_minio_config():
     """Get MinIO configuration from Kubernetes secret (tries minio-conn1, then minio-conn)."""
@@ -73,31 +104,260 @@ def get_minio_config():
     return None
 
 
-def upload_to_minio(model_dir, target_path, minio_config):
-    """Upload model files to MinIO."""
+def create_s3_client(minio_config, max_pool_connections=10):
+    """Create a boto3 S3 client for MinIO (None if boto3 is missing)."""
     try:
         import boto3
         from botocore.client import Config
     except ImportError:
         print("❌ Error: boto3 not installed")
         print("   Install with: pip install boto3")
+        return None
+    
+    return boto3.client(
+        's3',
+        endpoint_url=minio_config['endpoint'],
+        aws_access_key_id=minio_config['access_key'],
+        aws_secret_access_key=minio_config['secret_key'],
+        config=Config(
+            signature_version='s3v4',
+            max_pool_connections=max_pool_connections
+        ),
+        verify=False
+    )
+
+
+def collect_files(model_path):
+    """Return all files below model_path, largest first (so big shards start early)."""
+    files = [f for f in Path(model_path).rglob('*') if f.is_file()]
+    files.sort(key=lambda f: f.stat().st_size, reverse=True)
+    return files
+
+
+def file_digest(file_path, algorithm="sha256", chunk_size=8 * 1024 * 1024):
+    """Hex digest of a local file, read in chunks."""
+    digest = hashlib.new(algorithm)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_remote_manifest(s3_client, bucket, target_path):
+    """Load the upload manifest stored under target_path ({} if there is none)."""
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=f"{target_path}/{MANIFEST_NAME}")
+        return json.loads(response['Body'].read()).get("files", {})
+    except Exception:
+        return {}
+
+
+def save_remote_manifest(s3_client, bucket, target_path, files, complete=True):
+    """Write the upload manifest under target_path. complete=False marks an upload in which some files failed."""
+    body = json.dumps({"version": 1, "files": files, "complete": complete}, indent=2, sort_keys=True)
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=f"{target_path}/{MANIFEST_NAME}",
+        Body=body.encode("utf-8"),
+        ContentType="application/json"
+    )
+
+
+def remote_upload_complete(s3_client, bucket, target_path):
+    """
+    False if the manifest under target_path records an upload in which
+    some files failed. Manifests written before this flag existed count
+    as complete; no manifest at all means the upload never finished.
+    """
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=f"{target_path}/{MANIFEST_NAME}")
+        return json.loads(response['Body'].read()).get("complete", True)
+    except Exception:
         return False
+
+
+def list_remote_objects(s3_client, bucket, target_path):
+    """List objects under target_path as {relative_path: {"size": ..., "etag": ...}}."""
+    prefix = f"{target_path}/"
+    objects = {}
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            objects[obj['Key'][len(prefix):]] = {
+                "size": obj['Size'],
+                "etag": obj['ETag'].strip('"')
+            }
+    return objects
+
+
+def is_unchanged(local_file, local_entry, remote_object, manifest_entry):
+    """
+    Decide whether a remote object already holds the same bytes as local_file.
     
+    Size must match. Then the manifest sha256 is trusted as long as the
+    object's ETag still matches what the manifest recorded (i.e. nobody
+    overwrote it out of band). Objects without a manifest entry can still be
+    matched by ETag when they were uploaded in a single part (ETag == MD5).
+    """
+    if remote_object is None or remote_object["size"] != local_entry["size"]:
+        return False
+    if manifest_entry:
+        return (manifest_entry.get("sha256") == local_entry["sha256"]
+                and manifest_entry.get("etag") == remote_object["etag"])
+    if "-" not in remote_object["etag"]:
+        return file_digest(local_file, "md5") == remote_object["etag"]
+    return False
+
+
+def delete_remote_keys(s3_client, bucket, keys):
+    """Delete keys in batches of 1000 (the DeleteObjects limit)."""
+    for i in range(0, len(keys), 1000):
+        batch = keys[i:i + 1000]
+        s3_client.delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": k} for k in batch], "Quiet": True}
+        )
+
+
+def parse_s3_url(url):
+    """Split s3://bucket/prefix into (bucket, prefix)."""
+    bucket, _, prefix = url[len("s3://"):].partition("/")
+    if not bucket:
+        raise ValueError(f"Invalid S3 URL (expected s3://bucket/prefix): {url}")
+    return bucket, prefix.strip("/")
+
+
+class MultipartUploadWriter:
+    """
+    File-like sink that streams written bytes into an S3 object.
+
+    Data is cut into part_size parts; up to parts_in_flight parts upload in
+    background threads while the caller keeps writing (write() blocks once
+    that many parts are buffered). Objects smaller than one part go up with a
+    single PutObject. The sha256 is computed on the fly, so after close()
+    result holds {"size", "sha256", "etag"} for the upload manifest. Use as a
+    context manager: an exception aborts the multipart upload.
+    """
+
+    def __init__(self, s3_client, bucket, key, part_size, parts_in_flight=2):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.size = 0
+        self.result = None
+        self._digest = hashlib.sha256()
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._futures = []
+        self._slots = threading.BoundedSemaphore(parts_in_flight)
+        self._pool = ThreadPoolExecutor(max_workers=parts_in_flight)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def write(self, data):
+        view = memoryview(data).cast("B")
+        self._digest.update(view)
+        self.size += len(view)
+        while len(view):
+            take = min(len(view), self.part_size - len(self._buffer))
+            self._buffer += view[:take]
+            view = view[take:]
+            if len(self._buffer) == self.part_size:
+                self._submit_part()
+        return len(data)
+
+    def _submit_part(self):
+        if self._upload_id is None:
+            self._upload_id = self.s3_client.create_multipart_upload(Bucket=self.bucket, Key=self.key)['UploadId']
+        data = bytes(self._buffer)
+        self._buffer = bytearray()
+        part_number = len(self._futures) + 1
+        self._slots.acquire()  # Blocks the writer while parts_in_flight parts are buffered
+
+        def upload_part():
+            try:
+                result = self.s3_client.upload_part(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                    PartNumber=part_number, Body=data
+                )
+                return {"PartNumber": part_number, "ETag": result['ETag']}
+            finally:
+                self._slots.release()
+
+        self._futures.append(self._pool.submit(upload_part))
+
+    def close(self):
+        if self.result is not None:
+            return self.result
+        try:
+            if self._upload_id is None:
+                # Small object: single request
+                result = self.s3_client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer))
+            else:
+                if self._buffer:
+                    self._submit_part()
+                parts = [f.result() for f in self._futures]
+                result = self.s3_client.complete_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                    MultipartUpload={"Parts": parts}
+                )
+        except BaseException:
+            self.abort()
+            raise
+        self._pool.shutdown()
+        self.result = {"size": self.size, "sha256": self._digest.hexdigest(), "etag": result['ETag'].strip('"')}
+        return self.result
+
+    def abort(self):
+        self._pool.shutdown(cancel_futures=True)
+        if self._upload_id is not None:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            self._upload_id = None
+
+
+def upload_to_minio(model_dir, target_path, minio_config, workers=DEFAULT_WORKERS, part_size_mb=DEFAULT_PART_SIZE_MB,
+                    sync=False, delete_stale=False, strict=False):
+    """
+    Upload model files to MinIO.
+    
+    Up to ``workers`` files are uploaded at once, and every file larger than
+    ``part_size_mb`` is sent as a multipart upload whose parts are also
+    uploaded in parallel (``workers`` parts per file). Each file is read
+    once: its sha256 for the manifest is computed while it is uploaded.
+    
+    With ``sync=True`` only new or changed files are uploaded (compared by
+    size and sha256/ETag against the manifest under ``target_path``; files
+    not covered by model_manifest.json are hashed first), and
+    ``delete_stale=True`` also removes remote keys that no longer exist
+    locally. A manifest is written after every upload.
+    
+    Returns True if the upload succeeded: every file uploaded with
+    ``sync`` or ``strict``, otherwise at least one file.
+    """
     print(f"\n📤 Uploading model to MinIO...")
     print(f"   Endpoint: {minio_config['endpoint']}")
     print(f"   Bucket: {minio_config['bucket']}")
     print(f"   Target Path: {target_path}")
+    print(f"   Workers: {workers} file(s) in parallel, part size {part_size_mb} MB")
+    if sync:
+        print(f"   Mode: sync (only new or changed files{', delete stale keys' if delete_stale else ''})")
     
     try:
-        # Create S3 client for MinIO
-        s3_client = boto3.client(
-            's3',
-            endpoint_url=minio_config['endpoint'],
-            aws_access_key_id=minio_config['access_key'],
-            aws_secret_access_key=minio_config['secret_key'],
-            config=Config(signature_version='s3v4'),
-            verify=False
-        )
+        # One connection per in-flight part: files * parts-per-file
+        s3_client = create_s3_client(minio_config, max_pool_connections=max(10, workers * workers))
+        if s3_client is None:
+            return False
+        
+        part_size = part_size_mb * 1024 * 1024
         
         # Find all files in model directory
         model_path = Path(model_dir)
@@ -105,40 +365,116 @@ def upload_to_minio(model_dir, target_path, minio_config):
             print(f"❌ Error: Model directory does not exist: {model_dir}")
             return False
         
-        # Get all files recursively
-        files_to_upload = []
-        for file_path in model_path.rglob('*'):
-            if file_path.is_file():
-                files_to_upload.append(file_path)
+        files_to_upload = collect_files(model_path)
         
         if not files_to_upload:
             print(f"⚠️  No files found in {model_dir}")
             return False
         
-        print(f"\n📋 Found {len(files_to_upload)} files to upload")
+        bucket = minio_config['bucket']
+        
+        def rel_key(local_file):
+            # Relative path from model_dir, with normalized path separators
+            return str(local_file.relative_to(model_path)).replace("\\", "/")
+        
+        # Reuse sha256s from model_manifest.json (written by the merge) for files
+        # whose size and mtime still match
+        known = load_manifest(model_path)
+        local_entries = {rel_key(f): {"size": f.stat().st_size} for f in files_to_upload}
+        for key, entry in local_entries.items():
+            if key in known:
+                entry["sha256"] = known[key]["sha256"]
+        
+        manifest = {}
+        remote_objects = {}
+        if sync:
+            # Comparing needs every digest up front: hash the rest in parallel
+            to_hash = [f for f in files_to_upload if "sha256" not in local_entries[rel_key(f)]]
+            print(f"   Checksums: {len(files_to_upload) - len(to_hash)} reused from {LOCAL_MANIFEST_NAME}, "
+                  f"{len(to_hash)} to hash")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for f, digest in zip(to_hash, executor.map(file_digest, to_hash)):
+                    local_entries[rel_key(f)]["sha256"] = digest
+            
+            print(f"\n🔍 Comparing with objects under {target_path}/ ...")
+            manifest = load_remote_manifest(s3_client, bucket, target_path)
+            remote_objects = list_remote_objects(s3_client, bucket, target_path)
+            remote_objects.pop(MANIFEST_NAME, None)
+            
+            unchanged = []
+            changed = []
+            for f in files_to_upload:
+                key = rel_key(f)
+                if is_unchanged(f, local_entries[key], remote_objects.get(key), manifest.get(key)):
+                    unchanged.append(f)
+                    # Keep the ETag so the rewritten manifest stays valid
+                    local_entries[key]["etag"] = remote_objects[key]["etag"]
+                else:
+                    changed.append(f)
+            
+            print(f"   Unchanged: {len(unchanged)} file(s), to upload: {len(changed)} file(s)")
+            files_to_upload = changed
+        
+        total_bytes = sum(f.stat().st_size for f in files_to_upload)
+        print(f"\n📋 Found {len(files_to_upload)} files to upload ({total_bytes / (1024 * 1024):.1f} MB)")
+        
+        def upload_one(local_file):
+            key = rel_key(local_file)
+            s3_key = f"{target_path}/{key}"
+            # Parts upload in parallel while the file is read (and hashed) once
+            with MultipartUploadWriter(s3_client, bucket, s3_key, part_size, parts_in_flight=workers) as writer:
+                with open(local_file, "rb") as f:
+                    for block in iter(lambda: f.read(part_size), b""):
+                        writer.write(block)
+            local_entries[key].update(writer.result)
+            return s3_key
         
         # Upload files
         uploaded_count = 0
         failed_count = 0
+        start_time = time.monotonic()
         
-        for local_file in files_to_upload:
-            # Get relative path from model_dir
-            rel_path = local_file.relative_to(model_path)
-            s3_key = f"{target_path}/{rel_path}".replace("\\", "/")  # Normalize path separators
-            
-            try:
-                s3_client.upload_file(str(local_file), minio_config['bucket'], s3_key)
-                uploaded_count += 1
-                print(f"   ✅ {s3_key}")
-            except Exception as e:
-                failed_count += 1
-                print(f"   ⚠️  Failed to upload {rel_path}: {str(e)[:80]}")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(upload_one, f): f for f in files_to_upload}
+            for future in as_completed(futures):
+                local_file = futures[future]
+                try:
+                    s3_key = future.result()
+                    uploaded_count += 1
+                    print(f"   ✅ {s3_key}")
+                except Exception as e:
+                    failed_count += 1
+                    print(f"   ⚠️  Failed to upload {local_file.relative_to(model_path)}: {str(e)[:80]}")
+        
+        deleted_count = 0
+        if sync and delete_stale:
+            stale = sorted(set(remote_objects) - set(local_entries))
+            if stale:
+                print(f"\n🗑️  Deleting {len(stale)} stale key(s)...")
+                for key in stale:
+                    print(f"   - {target_path}/{key}")
+                delete_remote_keys(s3_client, bucket, [f"{target_path}/{key}" for key in stale])
+                deleted_count = len(stale)
         
+        # Only record files whose remote copy is known to be current
+        save_remote_manifest(
+            s3_client, bucket, target_path,
+            {key: entry for key, entry in local_entries.items() if "etag" in entry},
+            complete=failed_count == 0
+        )
+        
+        elapsed = max(time.monotonic() - start_time, 1e-6)
         print(f"\n✅ Upload complete!")
-        print(f"   Uploaded: {uploaded_count} files")
+        print(f"   Uploaded: {uploaded_count} files in {elapsed:.1f}s ({total_bytes / (1024 * 1024) / elapsed:.1f} MB/s)")
+        if sync:
+            print(f"   Skipped (unchanged): {len(local_entries) - uploaded_count - failed_count} files")
+        if deleted_count:
+            print(f"   Deleted (stale): {deleted_count} keys")
         if failed_count > 0:
             print(f"   Failed: {failed_count} files")
         
+        if sync or strict:
+            return failed_count == 0
         return uploaded_count > 0
         
     except Exception as e:
@@ -148,6 +484,170 @@ def upload_to_minio(model_dir, target_path, minio_config):
         return False
 
 
+def versions_prefix(serving_path):
+    """Prefix holding the immutable staged versions of a serving path."""
+    return f"{serving_path}{VERSIONS_SUFFIX}"
+
+
+def version_path(serving_path, version):
+    return f"{versions_prefix(serving_path)}/{version}"
+
+
+def list_versions(s3_client, bucket, serving_path):
+    """Names of the versions staged for serving_path."""
+    prefix = f"{versions_prefix(serving_path)}/"
+    versions = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter="/"):
+        for common in page.get('CommonPrefixes', []):
+            versions.append(common['Prefix'][len(prefix):].rstrip("/"))
+    return sorted(versions)
+
+
+def load_promotion_history(s3_client, bucket, serving_path):
+    """Promotion history of serving_path, oldest first ([] if never promoted)."""
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=f"{versions_prefix(serving_path)}/{PROMOTIONS_NAME}")
+        return json.loads(response['Body'].read()).get("promotions", [])
+    except Exception:
+        return []
+
+
+def save_promotion_history(s3_client, bucket, serving_path, history):
+    body = json.dumps({"promotions": history}, indent=2)
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=f"{versions_prefix(serving_path)}/{PROMOTIONS_NAME}",
+        Body=body.encode("utf-8"),
+        ContentType="application/json"
+    )
+
+
+def promote_version(serving_path, version, minio_config, workers=DEFAULT_WORKERS,
+                    part_size_mb=DEFAULT_PART_SIZE_MB, rollback=False):
+    """
+    Point serving_path at a staged version using server-side copies.
+    
+    Objects are copied inside MinIO (CopyObject, or UploadPartCopy for
+    objects above part_size_mb), so no model bytes cross the client link.
+    Keys under serving_path that are not part of the version are deleted
+    afterwards, and the promotion is appended to the version history.
+    """
+    try:
+        from boto3.s3.transfer import TransferConfig
+    except ImportError:
+        print("❌ Error: boto3 not installed")
+        print("   Install with: pip install boto3")
+        return False
+    
+    source_path = version_path(serving_path, version)
+    print(f"\n🚀 {'Rolling back' if rollback else 'Promoting'} {source_path} -> {serving_path} (server-side copy)...")
+    
+    try:
+        s3_client = create_s3_client(minio_config, max_pool_connections=max(10, workers * workers))
+        if s3_client is None:
+            return False
+        bucket = minio_config['bucket']
+        part_size = part_size_mb * 1024 * 1024
+        transfer_config = TransferConfig(
+            multipart_threshold=part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=workers,
+            use_threads=True
+        )
+        
+        source_objects = list_remote_objects(s3_client, bucket, source_path)
+        source_manifest = load_remote_manifest(s3_client, bucket, source_path)
+        source_objects.pop(MANIFEST_NAME, None)
+        if not source_objects:
+            print(f"❌ Error: version '{version}' not found at {source_path}/")
+            available = list_versions(s3_client, bucket, serving_path)
+            if available:
+                print(f"   Available versions: {', '.join(available)}")
+            return False
+        if not remote_upload_complete(s3_client, bucket, source_path):
+            print(f"❌ Error: version '{version}' was only partially staged (some files failed to upload)")
+            print(f"   Re-run the upload with --version {version} to finish staging it")
+            return False
+        
+        def copy_one(key):
+            s3_client.copy(
+                {"Bucket": bucket, "Key": f"{source_path}/{key}"},
+                bucket,
+                f"{serving_path}/{key}",
+                Config=transfer_config
+            )
+            return key
+        
+        start_time = time.monotonic()
+        failed_count = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(copy_one, key): key for key in source_objects}
+            for future in as_completed(futures):
+                try:
+                    print(f"   ✅ {serving_path}/{future.result()}")
+                except Exception as e:
+                    failed_count += 1
+                    print(f"   ⚠️  Failed to copy {futures[future]}: {str(e)[:80]}")
+        
+        if failed_count:
+            print(f"\n❌ {failed_count} object(s) failed to copy; serving path left partially updated")
+            return False
+        
+        # Serving path must mirror the version exactly
+        serving_objects = list_remote_objects(s3_client, bucket, serving_path)
+        serving_objects.pop(MANIFEST_NAME, None)
+        stale = sorted(set(serving_objects) - set(source_objects))
+        if stale:
+            delete_remote_keys(s3_client, bucket, [f"{serving_path}/{key}" for key in stale])
+            print(f"   🗑️  Removed {len(stale)} key(s) not in version {version}")
+        
+        # Copies may get new ETags (multipart layout), so rebuild the manifest from the copies
+        manifest = {}
+        for key, obj in serving_objects.items():
+            if key in source_objects:
+                entry = dict(source_manifest.get(key, {}))
+                entry.update({"size": obj["size"], "etag": obj["etag"]})
+                if "sha256" in entry:
+                    manifest[key] = entry
+        save_remote_manifest(s3_client, bucket, serving_path, manifest)
+        
+        history = load_promotion_history(s3_client, bucket, serving_path)
+        history.append({
+            "version": version,
+            "promoted_at": datetime.now(timezone.utc).isoformat(),
+            "rollback": rollback
+        })
+        save_promotion_history(s3_client, bucket, serving_path, history)
+        
+        elapsed = time.monotonic() - start_time
+        print(f"\n✅ {serving_path} now serves version {version} ({len(source_objects)} objects in {elapsed:.1f}s)")
+        return True
+        
+    except Exception as e:
+        print(f"\n❌ Error promoting version: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def previous_version(history):
+    """
+    The version --rollback should serve (None if there is none). The
+    history is replayed as a stack: a promotion pushes its version, and a
+    rollback pops back to the version below. Repeated rollbacks therefore
+    walk back through earlier promotions instead of toggling between the
+    two newest versions.
+    """
+    stack = []
+    for entry in history:
+        if entry.get("rollback") and len(stack) > 1 and stack[-2] == entry["version"]:
+            stack.pop()
+        elif not stack or stack[-1] != entry["version"]:
+            stack.append(entry["version"])
+    return stack[-2] if len(stack) > 1 else None
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Upload customized model to MinIO"
@@ -155,8 +655,7 @@ def main():
     parser.add_argument(
         "--model-dir",
         type=str,
-        required=True,
-        help="Directory containing downloaded model files"
+        help="Directory containing downloaded model files (required unless --promote, --rollback or --list-versions)"
     )
     parser.add_argument(
         "--target-path",
@@ -188,9 +687,73 @@ def main():
         type=str,
         help="MinIO secret key (overrides secret)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Files uploaded in parallel, and parts in flight per large file (default: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--part-size-mb",
+        type=int,
+        default=DEFAULT_PART_SIZE_MB,
+        help=f"Multipart part size in MB; larger files are split into parallel parts (default: {DEFAULT_PART_SIZE_MB})"
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help=f"Only upload new or changed files (compared against {MANIFEST_NAME} and object ETags under the target path)"
+    )
+    parser.add_argument(
+        "--delete-stale",
+        action="store_true",
+        help="With --sync, also delete remote keys under the target path that no longer exist locally"
+    )
+    parser.add_argument(
+        "--version",
+        type=str,
+        help=f"Stage the upload as an immutable version under <target-path>{VERSIONS_SUFFIX}/<version>/, "
+             "then promote it to the target path with server-side copies"
+    )
+    parser.add_argument(
+        "--stage-only",
+        action="store_true",
+        help="With --version, upload the version but do not promote it"
+    )
+    parser.add_argument(
+        "--promote",
+        type=str,
+        metavar="VERSION",
+        help="Point the target path at an already staged version (server-side copy, no upload)"
+    )
+    parser.add_argument(
+        "--rollback",
+        action="store_true",
+        help="Point the target path back at the version promoted before the current one "
+             "(repeat to walk further back through the promotion history)"
+    )
+    parser.add_argument(
+        "--list-versions",
+        action="store_true",
+        help="List staged versions and the promotion history of the target path"
+    )
     
     args = parser.parse_args()
     
+    version_ops = [bool(args.promote), args.rollback, args.list_versions]
+    if sum(version_ops) > 1:
+        print("❌ Error: use only one of --promote, --rollback, --list-versions")
+        sys.exit(1)
+    if not any(version_ops) and not args.model_dir:
+        print("❌ Error: --model-dir is required for uploads")
+        sys.exit(1)
+    if any(version_ops) and not (args.target_path or args.update_existing):
+        print("❌ Error: --promote/--rollback/--list-versions need --target-path (or --update-existing)")
+        sys.exit(1)
+    if args.stage_only and not args.version:
+        print("❌ Error: --stage-only requires --version")
+        sys.exit(1)
+    
     # Determine target path
     if args.update_existing:
         target_path = "models/llama-3.2-1b-instruct"
@@ -226,14 +789,100 @@ def main():
         if override:
             minio_config = {**minio_config, "endpoint": override}
     
+    if args.workers < 1:
+        print("❌ Error: --workers must be at least 1")
+        sys.exit(1)
+    if args.delete_stale and not args.sync:
+        print("❌ Error: --delete-stale requires --sync")
+        sys.exit(1)
+    if args.part_size_mb < 5:
+        print("❌ Error: --part-size-mb must be at least 5 (S3 minimum part size)")
+        sys.exit(1)
+    
+    if args.list_versions:
+        s3_client = create_s3_client(minio_config)
+        if s3_client is None:
+            return 1
+        versions = list_versions(s3_client, minio_config['bucket'], target_path)
+        history = load_promotion_history(s3_client, minio_config['bucket'], target_path)
+        current = history[-1]["version"] if history else None
+        print(f"📋 Versions staged for {target_path}:")
+        for version in versions:
+            print(f"   {'▶' if version == current else ' '} {version}")
+        if not versions:
+            print("   (none)")
+        if history:
+            print(f"\n🕓 Promotion history (newest last):")
+            for entry in history:
+                print(f"   {entry['promoted_at']}  {entry['version']}{'  (rollback)' if entry.get('rollback') else ''}")
+        return 0
+    
+    if args.promote or args.rollback:
+        version = args.promote
+        if args.rollback:
+            s3_client = create_s3_client(minio_config)
+            if s3_client is None:
+                return 1
+            version = previous_version(load_promotion_history(s3_client, minio_config['bucket'], target_path))
+            if not version:
+                print(f"❌ Error: no earlier version recorded for {target_path}; use --promote <version>")
+                return 1
+        success = promote_version(
+            target_path, version, minio_config,
+            workers=args.workers, part_size_mb=args.part_size_mb, rollback=args.rollback
+        )
+        if success:
+            print(f"\n📋 Next step: restart the InferenceService pod to load version {version}:")
+            print(f"   oc delete pod -n {NMS_NAMESPACE} -l serving.kserve.io/inferenceservice=<inferenceservice-name>")
+            return 0
+        return 1
+    
+    upload_path = target_path
+    if args.version:
+        upload_path = version_path(target_path, args.version)
+        s3_client = create_s3_client(minio_config)
+        if s3_client is None:
+            return 1
+        if list_remote_objects(s3_client, minio_config['bucket'], upload_path):
+            if remote_upload_complete(s3_client, minio_config['bucket'], upload_path):
+                print(f"❌ Error: version '{args.version}' is already staged at {upload_path}/ (versions are immutable)")
+                print(f"   Use a new --version, or --promote {args.version} to serve it")
+                return 1
+            # A failed staging is finished, not replaced: only missing or changed files are uploaded
+            print(f"⚠️  Version '{args.version}' was only partially staged; resuming it")
+            args.sync = True
+    
     print("=" * 70)
     print("Upload Customized Model to MinIO")
     print("=" * 70)
     print(f"Namespace: {NMS_NAMESPACE}")
     print(f"Model Directory: {args.model_dir}")
-    print(f"Target Path: {target_path}")
+    print(f"Target Path: {upload_path}")
     
-    success = upload_to_minio(args.model_dir, target_path, minio_config)
+    success = upload_to_minio(
+        args.model_dir,
+        upload_path,
+        minio_config,
+        workers=args.workers,
+        part_size_mb=args.part_size_mb,
+        sync=args.sync,
+        delete_stale=args.delete_stale,
+        strict=bool(args.version)
+    )
+    
+    if not success and args.version:
+        print(f"\n❌ Version {args.version} was not fully staged; not promoting it")
+        print(f"   Re-run the same command to upload the missing files")
+        return 1
+    if success and args.version:
+        if args.stage_only:
+            print(f"\n✅ Version {args.version} staged at {upload_path}/")
+            print(f"   Promote it with: python upload_model_to_minio.py --target-path {target_path} --promote {args.version}")
+            return 0
+        success = promote_version(
+            target_path, args.version, minio_config,
+            workers=args.workers, part_size_mb=args.part_size_mb
+        )
     
     if success:
         print(f"\n✅ Model uploaded successfully to MinIO!")